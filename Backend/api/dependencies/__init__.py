@@ -1,3 +1,13 @@
-# This package is intentionally empty.
-# The old DB-based service dependencies have been removed.
-# All Azure operations now use the token-based credential in core/auth.py.
+from api.dependencies.services import (
+    get_azure_service,
+    get_environment_repository,
+    get_environment_service,
+    get_status_history_repository,
+)
+
+__all__ = [
+    "get_azure_service",
+    "get_environment_repository",
+    "get_environment_service",
+    "get_status_history_repository",
+]
@@ -1,2 +1,33 @@
-# This file is intentionally empty.
-# The old DB-based service wiring has been removed.
\ No newline at end of file
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from azure.core.credentials import TokenCredential
+
+from core import Settings, get_azure_credential, get_settings
+from db import get_db_session
+from repositories import EnvironmentRepository, StatusHistoryRepository
+from services import AzureContainerAppService, EnvironmentService
+
+
+def get_environment_repository(session: AsyncSession = Depends(get_db_session)) -> EnvironmentRepository:
+    return EnvironmentRepository(session)
+
+
+def get_status_history_repository(session: AsyncSession = Depends(get_db_session)) -> StatusHistoryRepository:
+    return StatusHistoryRepository(session)
+
+
+def get_azure_service(
+    settings: Settings = Depends(get_settings),
+    credential: TokenCredential = Depends(get_azure_credential),
+) -> AzureContainerAppService:
+    return AzureContainerAppService(
+        credential=credential,
+        subscription_id=settings.azure_subscription_id or "",
+    )
+
+
+def get_environment_service(
+    repository: EnvironmentRepository = Depends(get_environment_repository),
+    azure_service: AzureContainerAppService = Depends(get_azure_service),
+) -> EnvironmentService:
+    return EnvironmentService(repository=repository, azure_service=azure_service)
@@ -0,0 +1,379 @@
+import asyncio
+import json
+import logging
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from azure.core.credentials import TokenCredential
+from azure.core.exceptions import HttpResponseError
+from azure.mgmt.appcontainers import ContainerAppsAPIClient
+from azure.mgmt.monitor import MonitorManagementClient
+
+from core import (
+    LRUCache,
+    Settings,
+    TieredCache,
+    credential_cache_scope,
+    get_azure_credential,
+    get_executor,
+    get_settings,
+    get_shared_cache_backend,
+    management_client_options,
+)
+from services import downsample_series
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/app-metrics", tags=["Container App Metrics"])
+
+_METRIC_NAMESPACE = "Microsoft.App/containerApps"
+# Azure Monitor metric -> (aggregation used, scale into the response unit).
+_METRICS: dict[str, tuple[str, float]] = {
+    "CpuUsage": ("average", 1e-9),          # nanocores -> cores
+    "WorkingSetBytes": ("average", 1.0),
+    "Replicas": ("maximum", 1.0),
+}
+# Time grains Azure Monitor accepts, finest first.
+_GRAINS: list[tuple[int, str]] = [
+    (60, "PT1M"), (300, "PT5M"), (900, "PT15M"), (1800, "PT30M"),
+    (3600, "PT1H"), (21600, "PT6H"), (43200, "PT12H"), (86400, "P1D"),
+]
+# Metrics are fetched and cached in fixed, epoch-aligned blocks of this many grains, so
+# overlapping chart windows share blocks and only the newest block is ever refetched.
+_BLOCK_GRAINS = 120
+# Azure Monitor may still backfill the last minutes; blocks ending before this are final.
+_SETTLE = timedelta(minutes=10)
+_BATCH_MAX_RESOURCES = 50
+_BATCH_API_VERSION = "2024-02-01"
+
+_settings = get_settings()
+# One metric block of one app: metric name -> one value (or None) per grain.
+_block_cache: TieredCache[dict[str, list[Optional[float]]]] = TieredCache(
+    "app-metrics",
+    LRUCache(max_bytes=_settings.app_metrics_cache_max_bytes, ttl_seconds=_settings.app_metrics_cache_ttl_seconds),
+    get_shared_cache_backend(),
+    encode=lambda block: json.dumps(block, separators=(",", ":")).encode("utf-8"),
+    decode=json.loads,
+)
+# Keyed per caller: listing the resource group's apps is what checks the caller's RBAC.
+_apps_cache: TieredCache[list[dict[str, str]]] = TieredCache(
+    "app-metrics-apps",
+    LRUCache(max_bytes=4 * 1024 * 1024, ttl_seconds=_settings.discovery_cache_ttl_seconds),
+    get_shared_cache_backend(),
+    encode=lambda apps: json.dumps(apps, separators=(",", ":")).encode("utf-8"),
+    decode=json.loads,
+)
+# Callers whose tokens the regional batch endpoint rejected (e.g. ARM-only bearer tokens).
+# Bounded, and forgotten after an hour so a caller whose token changes gets batching back.
+_batch_unavailable = LRUCache(max_bytes=256 * 1024, ttl_seconds=3600)
+
+
+class AppMetricSeries(BaseModel):
+    app_name: str
+    cpu_cores: list[Optional[float]]
+    memory_bytes: list[Optional[float]]
+    replicas: list[Optional[float]]
+
+
+class AppMetricsResponse(BaseModel):
+    subscription_id: str
+    resource_group: str
+    start: datetime
+    interval_seconds: int
+    count: int
+    apps: list[AppMetricSeries]
+
+
+def _pick_grain(span_seconds: int, points: int) -> tuple[int, str, int]:
+    """``(grain seconds, ISO grain, downsampling factor)`` yielding about ``points`` buckets."""
+    target = max(span_seconds // points, _GRAINS[0][0])
+    grain, iso = _GRAINS[0]
+    for candidate, candidate_iso in _GRAINS:
+        if candidate <= target:
+            grain, iso = candidate, candidate_iso
+    return grain, iso, max(-(-target // grain), 1)
+
+
+def _list_apps(credential: TokenCredential, subscription_id: str, resource_group: str) -> list[dict[str, str]]:
+    client = ContainerAppsAPIClient(credential, subscription_id, **management_client_options(_settings))
+    return [
+        {"id": app.id, "name": app.name, "location": (app.location or "").replace(" ", "").lower()}
+        for app in client.container_apps.list_by_resource_group(resource_group)
+    ]
+
+
+def _iso(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _epoch(value: Any) -> int:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return int(value.timestamp())
+
+
+def _fetch_batch(
+    credential: TokenCredential,
+    subscription_id: str,
+    location: str,
+    resource_ids: list[str],
+    start: int,
+    end: int,
+    grain_iso: str,
+) -> dict[str, dict[str, dict[int, float]]]:
+    """Metrics of up to 50 apps of one region from the regional ``metrics:getBatch`` endpoint."""
+    params = urllib.parse.urlencode({
+        "api-version": _BATCH_API_VERSION,
+        "metricnamespace": _METRIC_NAMESPACE,
+        "metricnames": ",".join(_METRICS),
+        "starttime": _iso(start),
+        "endtime": _iso(end),
+        "interval": grain_iso,
+        "aggregation": "average,maximum",
+    })
+    endpoint = _settings.azure_metrics_batch_endpoint.format(location=location).rstrip("/")
+    url = f"{endpoint}/subscriptions/{subscription_id}/metrics:getBatch?{params}"
+    token = credential.get_token(_settings.azure_metrics_scope).token
+    req = urllib.request.Request(
+        url,
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+        data=json.dumps({"resourceids": resource_ids}).encode("utf-8"),
+    )
+    with urllib.request.urlopen(req, timeout=_settings.app_metrics_request_timeout_seconds) as response:
+        body = json.loads(response.read().decode())
+
+    results: dict[str, dict[str, dict[int, float]]] = {}
+    for resource in body.get("values", []):
+        series = results.setdefault(resource.get("resourceid", "").lower(), {})
+        for metric in resource.get("value", []):
+            name = metric["name"]["value"]
+            if name not in _METRICS:
+                continue
+            aggregation = _METRICS[name][0]
+            points = series.setdefault(name, {})
+            for timeseries in metric.get("timeseries", []):
+                for point in timeseries.get("data", []):
+                    if point.get(aggregation) is not None:
+                        points[_epoch(point["timeStamp"])] = point[aggregation]
+    return results
+
+
+def _fetch_single(
+    credential: TokenCredential,
+    subscription_id: str,
+    resource_id: str,
+    start: int,
+    end: int,
+    grain: int,
+) -> dict[str, dict[int, float]]:
+    """Metrics of one app through the ARM metrics API (accepts the caller's ARM token)."""
+    client = MonitorManagementClient(credential, subscription_id, **management_client_options(_settings))
+    response = client.metrics.list(
+        resource_uri=resource_id,
+        timespan=f"{_iso(start)}/{_iso(end)}",
+        interval=timedelta(seconds=grain),
+        metricnames=",".join(_METRICS),
+        aggregation="Average,Maximum",
+        metricnamespace=_METRIC_NAMESPACE,
+    )
+    series: dict[str, dict[int, float]] = {}
+    for metric in response.value:
+        name = metric.name.value
+        if name not in _METRICS:
+            continue
+        aggregation = _METRICS[name][0]
+        points = series.setdefault(name, {})
+        for timeseries in metric.timeseries or []:
+            for point in timeseries.data or []:
+                value = getattr(point, aggregation, None)
+                if value is not None:
+                    points[_epoch(point.time_stamp)] = value
+    return series
+
+
+def _to_block(series: dict[str, dict[int, float]], block_start: int, grain: int) -> dict[str, list[Optional[float]]]:
+    block: dict[str, list[Optional[float]]] = {}
+    for name, (_, scale) in _METRICS.items():
+        values: list[Optional[float]] = [None] * _BLOCK_GRAINS
+        for epoch, value in series.get(name, {}).items():
+            index = (epoch - block_start) // grain
+            if 0 <= index < _BLOCK_GRAINS:
+                values[index] = value * scale
+        block[name] = values
+    return block
+
+
+async def _fetch_block(
+    credential: TokenCredential,
+    scope: str,
+    subscription_id: str,
+    apps: list[dict[str, str]],
+    block_start: int,
+    grain: int,
+    grain_iso: str,
+    now: int,
+    semaphore: asyncio.Semaphore,
+) -> dict[str, dict[str, dict[int, float]]]:
+    """Raw series of ``apps`` for one block: batched per region, per app as the fallback."""
+    end = min(block_start + grain * _BLOCK_GRAINS, now)
+    results: dict[str, dict[str, dict[int, float]]] = {}
+    if end <= block_start:
+        return results
+
+    async def _single(app: dict[str, str]) -> None:
+        async with semaphore:
+            results[app["id"].lower()] = await get_executor("discovery").run(
+                "azure_monitor", "metrics.list", _fetch_single, credential, subscription_id, app["id"], block_start, end, grain
+            )
+
+    async def _batch(location: str, chunk: list[dict[str, str]]) -> None:
+        try:
+            async with semaphore:
+                results.update(await get_executor("discovery").run(
+                    "azure_monitor", "metrics.get_batch", _fetch_batch, credential, subscription_id, location,
+                    [app["id"] for app in chunk], block_start, end, grain_iso,
+                ))
+        except urllib.error.HTTPError as e:
+            if e.code not in (401, 403):
+                raise
+            logger.info("Batch metrics API rejected the caller's token (%s); using per-app queries", e.code)
+            _batch_unavailable.set(scope, True, size=len(scope))
+            await asyncio.gather(*(_single(app) for app in chunk))
+
+    if _batch_unavailable.get(scope):
+        await asyncio.gather(*(_single(app) for app in apps))
+        return results
+
+    by_location: dict[str, list[dict[str, str]]] = {}
+    for app in apps:
+        by_location.setdefault(app["location"], []).append(app)
+    tasks = []
+    for location, located in by_location.items():
+        if not location:
+            tasks.extend(_single(app) for app in located)
+            continue
+        for i in range(0, len(located), _BATCH_MAX_RESOURCES):
+            tasks.append(_batch(location, located[i:i + _BATCH_MAX_RESOURCES]))
+    await asyncio.gather(*tasks)
+    return results
+
+
+async def _load_blocks(
+    credential: TokenCredential,
+    scope: str,
+    subscription_id: str,
+    apps: list[dict[str, str]],
+    block_start: int,
+    grain: int,
+    grain_iso: str,
+    now: int,
+    settings: Settings,
+    semaphore: asyncio.Semaphore,
+) -> dict[str, dict[str, list[Optional[float]]]]:
+    """One block of every app, from the cache where possible; misses are fetched together."""
+    block_end = block_start + grain * _BLOCK_GRAINS
+    settled = block_end <= now - _SETTLE.total_seconds()
+    ttl = settings.app_metrics_cache_ttl_seconds if settled else settings.app_metrics_recent_ttl_seconds
+
+    keys = {app["id"].lower(): f"{app['id'].lower()}:{grain}:{block_start}" for app in apps}
+    blocks: dict[str, dict[str, list[Optional[float]]]] = {}
+    if ttl > 0:
+        cached = await asyncio.gather(*(_block_cache.aget(key) for key in keys.values()))
+        blocks = {resource_id: block for resource_id, block in zip(keys, cached) if block is not None}
+
+    missing = [app for app in apps if app["id"].lower() not in blocks]
+    if missing:
+        fetched = await _fetch_block(
+            credential, scope, subscription_id, missing, block_start, grain, grain_iso, now, semaphore
+        )
+        for app in missing:
+            resource_id = app["id"].lower()
+            block = blocks[resource_id] = _to_block(fetched.get(resource_id, {}), block_start, grain)
+            # An empty block may be ingestion lag or a transient gap rather than a stopped
+            # app, so it is only kept as long as a recent one.
+            empty = all(value is None for values in block.values() for value in values)
+            block_ttl = min(ttl, settings.app_metrics_recent_ttl_seconds) if empty else ttl
+            if block_ttl > 0:
+                await _block_cache.aset(keys[resource_id], block, ttl_seconds=block_ttl)
+    return blocks
+
+
+@router.get("/{subscription_id}/{resource_group}", response_model=AppMetricsResponse)
+async def get_app_metrics(
+    subscription_id: str,
+    resource_group: str,
+    apps: Optional[list[str]] = Query(default=None, description="App names; defaults to every app in the resource group"),
+    hours: int = Query(default=24, ge=1, le=31 * 24),
+    points: int = Query(default=96, ge=10, le=1000),
+    credential: TokenCredential = Depends(get_azure_credential),
+    settings: Settings = Depends(get_settings),
+):
+    """
+    CPU (cores), memory working set (bytes) and replica count of container apps,
+    downsampled to about ``points`` buckets per app.
+
+    Series are columnar: value ``i`` of each array belongs to the bucket starting at
+    ``start + i * interval_seconds``; ``null`` means Azure Monitor reported nothing.
+    """
+    try:
+        scope = credential_cache_scope(credential)
+        listed = await _apps_cache.get_or_load(
+            f"{scope}:{subscription_id}:{resource_group.lower()}",
+            lambda: get_executor("discovery").run("arm", "container_apps.list_by_resource_group", _list_apps, credential, subscription_id, resource_group),
+        )
+        if apps:
+            wanted = {name.lower() for name in apps}
+            listed = [app for app in listed if app["name"].lower() in wanted]
+
+        now = int(datetime.now(timezone.utc).timestamp())
+        grain, grain_iso, factor = _pick_grain(hours * 3600, points)
+        bucket = grain * factor
+        start = (now - hours * 3600) // bucket * bucket
+        count = -(-(now - start) // bucket)
+        block_span = grain * _BLOCK_GRAINS
+        block_starts = range(start // block_span * block_span, start + count * bucket, block_span)
+
+        semaphore = asyncio.Semaphore(settings.app_metrics_concurrency)
+        per_block = await asyncio.gather(*(
+            _load_blocks(credential, scope, subscription_id, listed, block_start, grain, grain_iso, now, settings, semaphore)
+            for block_start in block_starts
+        ))
+
+        offset = (start - block_starts[0]) // grain if block_starts else 0
+        series = []
+        for app in listed:
+            resource_id = app["id"].lower()
+            columns: dict[str, list[Optional[float]]] = {}
+            for name, (aggregation, _) in _METRICS.items():
+                raw = [value for blocks in per_block for value in blocks[resource_id][name]]
+                raw = raw[offset:offset + count * factor]
+                columns[name] = downsample_series(raw, factor, "max" if aggregation == "maximum" else "mean")
+            series.append(AppMetricSeries(
+                app_name=app["name"],
+                cpu_cores=[None if v is None else round(v, 4) for v in columns["CpuUsage"]],
+                memory_bytes=[None if v is None else round(v) for v in columns["WorkingSetBytes"]],
+                replicas=[None if v is None else round(v) for v in columns["Replicas"]],
+            ))
+
+        return AppMetricsResponse(
+            subscription_id=subscription_id,
+            resource_group=resource_group,
+            start=datetime.fromtimestamp(start, timezone.utc),
+            interval_seconds=bucket,
+            count=count,
+            apps=series,
+        )
+
+    except HTTPException:
+        raise
+    except HttpResponseError as e:
+        logger.exception("Azure Monitor request failed for '%s'", resource_group)
+        raise HTTPException(status_code=e.status_code or 502, detail=str(e))
+    except Exception as e:
+        logger.exception("Failed to fetch metrics for '%s'", resource_group)
+        raise HTTPException(status_code=500, detail=str(e))
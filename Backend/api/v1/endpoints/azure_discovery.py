@@ -1,67 +1,235 @@
 import asyncio
+import json
 import logging
-from typing import Any
+from typing import Any, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
 from azure.core.credentials import TokenCredential
 from azure.mgmt.subscription import SubscriptionClient
 from azure.mgmt.appcontainers import ContainerAppsAPIClient
 
-from core import get_azure_credential
+from core import (
+    ExecutorSaturated,
+    LRUCache,
+    Settings,
+    TieredCache,
+    credential_cache_scope,
+    get_azure_credential,
+    get_executor,
+    get_settings,
+    get_shared_cache_backend,
+    management_client_options,
+)
+from services import AzureContainerAppService, known_cost_scopes, status_history_recorder
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/azure", tags=["Azure Auto-Discovery"])
 
+_settings = get_settings()
+# Keyed per caller: discovery results reflect the caller's own RBAC.
+_discovery_cache: TieredCache[list[dict[str, Any]]] = TieredCache(
+    "discovery",
+    LRUCache(max_bytes=16 * 1024 * 1024, ttl_seconds=_settings.discovery_cache_ttl_seconds),
+    get_shared_cache_backend(),
+    encode=lambda apps: json.dumps(apps, separators=(",", ":")).encode("utf-8"),
+    decode=json.loads,
+)
+
+# Keyed like discovery (per caller), then per app; short-lived since replicas come and go.
+_revision_cache: TieredCache[dict[str, Any]] = TieredCache(
+    "revisions",
+    LRUCache(max_bytes=8 * 1024 * 1024, ttl_seconds=_settings.revision_cache_ttl_seconds),
+    get_shared_cache_backend(),
+    encode=lambda inventory: json.dumps(inventory, separators=(",", ":")).encode("utf-8"),
+    decode=json.loads,
+)
+_MAX_REVISION_APPS = 100
+
+
+class AppRef(BaseModel):
+    subscription_id: str
+    resource_group: str
+    app_name: str
+
+
+class RevisionInventoryRequest(BaseModel):
+    apps: list[AppRef] = Field(..., min_length=1, max_length=_MAX_REVISION_APPS)
+
+
+class TrafficWeight(BaseModel):
+    revision_name: Optional[str] = None
+    latest_revision: bool = False
+    label: Optional[str] = None
+    weight: int
+
+
+class RevisionInfo(BaseModel):
+    name: str
+    active: bool
+    created_time: Optional[str] = None
+    traffic_weight: int
+    running_state: str
+    health_state: str
+    replica_count: int
+    replicas: list[str]
+
+
+class AppRevisionInventory(BaseModel):
+    subscription_id: str
+    resource_group: str
+    app_name: str
+    revision_mode: Optional[str] = None
+    latest_revision: Optional[str] = None
+    latest_ready_revision: Optional[str] = None
+    traffic: list[TrafficWeight] = []
+    revisions: list[RevisionInfo] = []
+    error: Optional[str] = None
+
+
+def _revision_key(scope: str, subscription_id: str, resource_group: str, app_name: str) -> str:
+    return f"{scope}:{subscription_id}:{resource_group.lower()}:{app_name.lower()}"
+
+
+async def _invalidate_discovery(
+    credential: TokenCredential,
+    subscription_id: Optional[str] = None,
+    resource_group: Optional[str] = None,
+    app_name: Optional[str] = None,
+) -> None:
+    """Drop the caller's cached inventory after a lifecycle action changed an app's status."""
+    scope = credential_cache_scope(credential)
+    await _discovery_cache.ainvalidate(scope)
+    if app_name:
+        await _revision_cache.ainvalidate(_revision_key(scope, subscription_id, resource_group, app_name))
+
+
+async def _discover(credential: TokenCredential) -> list[dict[str, Any]]:
+    """Enumerate every container app in every subscription visible to ``credential``."""
+    sub_client = SubscriptionClient(credential, **management_client_options(_settings))
+    def _get_subs():
+        return list(sub_client.subscriptions.list())
+
+    subscriptions = await get_executor("discovery").run("arm", "subscriptions.list", _get_subs)
+
+    all_apps = []
+    for sub in subscriptions:
+        app_client = ContainerAppsAPIClient(credential, sub.subscription_id, **management_client_options(_settings))
+
+        # Bind app_client as a default arg to avoid the loop-closure bug
+        def _get_apps(_client=app_client):
+            return list(_client.container_apps.list_by_subscription())
+
+        apps = await get_executor("discovery").run("arm", "container_apps.list_by_subscription", _get_apps)
+
+        for app in apps:
+            # ARM ID: /subscriptions/{id}/resourceGroups/{rg}/providers/...
+            parts = app.id.split('/')
+            rg_name = parts[parts.index('resourceGroups') + 1] if 'resourceGroups' in parts else 'Unknown'
+
+            running_status = getattr(app, "running_status", None)
+            if not running_status or str(running_status).lower() == "unknown":
+                running_status = getattr(app, "provisioning_state", "Unknown")
+            status_history_recorder.record(sub.subscription_id, rg_name, app.name, str(running_status))
+
+            all_apps.append({
+                "id": app.id,
+                "name": app.name,
+                "resourceGroup": rg_name,
+                "subscriptionId": sub.subscription_id,
+                "subscriptionName": getattr(sub, "display_name", sub.subscription_id),
+                "status": str(running_status),
+            })
+
+    return all_apps
+
+
+async def discover_apps(credential: TokenCredential, settings: Settings) -> list[dict[str, Any]]:
+    """The caller's container app inventory, from the discovery cache when enabled."""
+    if settings.discovery_cache_ttl_seconds <= 0:
+        apps = await _discover(credential)
+    else:
+        apps = await _discovery_cache.get_or_load(
+            credential_cache_scope(credential),
+            lambda: _discover(credential),
+            ttl_seconds=settings.discovery_cache_ttl_seconds,
+        )
+    # Candidates for the daily cost prefetch.
+    known_cost_scopes.update((app["subscriptionId"], app["resourceGroup"]) for app in apps)
+    return apps
+
 
 @router.get("/discover-all", response_model=list[dict[str, Any]])
-async def discover_all_apps(credential: TokenCredential = Depends(get_azure_credential)):
+async def discover_all_apps(
+    credential: TokenCredential = Depends(get_azure_credential),
+    settings: Settings = Depends(get_settings),
+):
     """
     Auto-Discovery (dual-mode):
     1. Authenticates via the developer's `az login` session (preferred) or a service principal.
     2. Finds all subscriptions visible to that identity.
     3. Finds all container apps across those subscriptions.
+
+    Results are cached per caller for ``DISCOVERY_CACHE_TTL_SECONDS``.
     """
     try:
-        sub_client = SubscriptionClient(credential)
-        def _get_subs():
-            return list(sub_client.subscriptions.list())
-
-        subscriptions = await asyncio.to_thread(_get_subs)
+        return await discover_apps(credential, settings)
 
-        all_apps = []
-        for sub in subscriptions:
-            app_client = ContainerAppsAPIClient(credential, sub.subscription_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Failed during auto-discovery")
+        raise HTTPException(status_code=500, detail=str(e))
 
-            # Bind app_client as a default arg to avoid the loop-closure bug
-            def _get_apps(_client=app_client):
-                return list(_client.container_apps.list_by_subscription())
 
-            apps = await asyncio.to_thread(_get_apps)
+@router.post("/revisions", response_model=list[AppRevisionInventory])
+async def get_revision_inventory(
+    payload: RevisionInventoryRequest,
+    credential: TokenCredential = Depends(get_azure_credential),
+    settings: Settings = Depends(get_settings),
+):
+    """
+    Revisions, traffic split and replicas of each requested app, fetched in parallel
+    under ``REVISION_FETCH_CONCURRENCY`` and cached per caller for ``REVISION_CACHE_TTL_SECONDS``.
+    Apps that fail are reported individually instead of failing the response.
+    """
+    scope = credential_cache_scope(credential)
+    semaphore = asyncio.Semaphore(settings.revision_fetch_concurrency)
+    services: dict[str, AzureContainerAppService] = {}
 
-            for app in apps:
-                # ARM ID: /subscriptions/{id}/resourceGroups/{rg}/providers/...
-                parts = app.id.split('/')
-                rg_name = parts[parts.index('resourceGroups') + 1] if 'resourceGroups' in parts else 'Unknown'
+    async def _inventory(app: AppRef) -> AppRevisionInventory:
+        service = services.setdefault(
+            app.subscription_id, AzureContainerAppService(credential, app.subscription_id)
+        )
 
-                running_status = getattr(app, "running_status", None)
-                if not running_status or str(running_status).lower() == "unknown":
-                    running_status = getattr(app, "provisioning_state", "Unknown")
+        def loader():
+            return service.get_revision_inventory(app.resource_group, app.app_name, semaphore)
 
-                all_apps.append({
-                    "id": app.id,
-                    "name": app.name,
-                    "resourceGroup": rg_name,
-                    "subscriptionId": sub.subscription_id,
-                    "subscriptionName": getattr(sub, "display_name", sub.subscription_id),
-                    "status": str(running_status),
-                })
+        try:
+            if settings.revision_cache_ttl_seconds <= 0:
+                inventory = await loader()
+            else:
+                inventory = await _revision_cache.get_or_load(
+                    _revision_key(scope, app.subscription_id, app.resource_group, app.app_name),
+                    loader,
+                    ttl_seconds=settings.revision_cache_ttl_seconds,
+                )
+            return AppRevisionInventory.model_validate(inventory)
+        except ExecutorSaturated:
+            raise
+        except Exception as e:
+            logger.warning("Revision inventory failed for '%s/%s'", app.resource_group, app.app_name, exc_info=True)
+            return AppRevisionInventory(
+                subscription_id=app.subscription_id,
+                resource_group=app.resource_group,
+                app_name=app.app_name,
+                error=str(e),
+            )
 
-        return all_apps
+    apps = list({_revision_key("", a.subscription_id, a.resource_group, a.app_name): a for a in payload.apps}.values())
+    return await asyncio.gather(*(_inventory(app) for app in apps))
 
-    except Exception as e:
-        logger.exception("Failed during auto-discovery")
-        raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/{subscription_id}/{resource_group}/{app_name}/start")
 async def start_app(
@@ -69,9 +237,12 @@ async def start_app(
     credential: TokenCredential = Depends(get_azure_credential),
 ):
     try:
-        client = ContainerAppsAPIClient(credential, subscription_id)
-        await asyncio.to_thread(lambda: client.container_apps.begin_start(resource_group, app_name).wait())
+        client = ContainerAppsAPIClient(credential, subscription_id, **management_client_options(_settings))
+        await get_executor("lifecycle").run("arm", "container_apps.start", lambda: client.container_apps.begin_start(resource_group, app_name).wait())
+        await _invalidate_discovery(credential, subscription_id, resource_group, app_name)
         return {"status": "started"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -82,9 +253,12 @@ async def stop_app(
     credential: TokenCredential = Depends(get_azure_credential),
 ):
     try:
-        client = ContainerAppsAPIClient(credential, subscription_id)
-        await asyncio.to_thread(lambda: client.container_apps.begin_stop(resource_group, app_name).wait())
+        client = ContainerAppsAPIClient(credential, subscription_id, **management_client_options(_settings))
+        await get_executor("lifecycle").run("arm", "container_apps.stop", lambda: client.container_apps.begin_stop(resource_group, app_name).wait())
+        await _invalidate_discovery(credential, subscription_id, resource_group, app_name)
         return {"status": "stopped"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -95,12 +269,15 @@ async def restart_app(
     credential: TokenCredential = Depends(get_azure_credential),
 ):
     try:
-        client = ContainerAppsAPIClient(credential, subscription_id)
+        client = ContainerAppsAPIClient(credential, subscription_id, **management_client_options(_settings))
         def _restart():
             client.container_apps.begin_stop(resource_group, app_name).wait()
             client.container_apps.begin_start(resource_group, app_name).wait()
-        await asyncio.to_thread(_restart)
+        await get_executor("lifecycle").run("arm", "container_apps.restart", _restart)
+        await _invalidate_discovery(credential, subscription_id, resource_group, app_name)
         return {"status": "restarted"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
  
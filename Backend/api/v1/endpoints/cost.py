@@ -1,12 +1,26 @@
 import asyncio
+import csv
 import datetime
+import hashlib
+import io
+import json
 import logging
-import threading
-from typing import List, Optional
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+import numpy as np
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from sqlalchemy.exc import SQLAlchemyError
+from azure.core.credentials import TokenCredential
+from azure.core.exceptions import HttpResponseError
+from azure.core.rest import HttpRequest
+from azure.identity import DefaultAzureCredential
 from azure.mgmt.costmanagement import CostManagementClient
+from azure.mgmt.subscription import SubscriptionClient
 from azure.mgmt.costmanagement.models import (
     QueryDefinition,
     QueryTimePeriod,
@@ -15,7 +29,32 @@ from azure.mgmt.costmanagement.models import (
     QueryGrouping,
 )
 
-from core import Settings, get_azure_credential, get_settings
+from core import (
+    ExecutorSaturated,
+    ExportFormat,
+    LRUCache,
+    Settings,
+    TieredCache,
+    credential_cache_scope,
+    get_azure_credential,
+    get_executor,
+    get_settings,
+    get_shared_cache_backend,
+    management_client_options,
+    stream_in_order,
+)
+from db import SessionLocal
+from db.models import CostHistory
+from repositories import CostHistoryRepository, EnvironmentRepository
+from services import (
+    CostMatrix,
+    CostPrefetchScheduler,
+    CostRateLimiter,
+    GroupedCosts,
+    analyze_costs,
+    known_cost_scopes,
+    parse_grouped_pages,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -41,36 +80,143 @@ class CostResponse(BaseModel):
     per_app_costs: List[AppCost] = []
 
 
-_cost_cache: dict[str, tuple[datetime.datetime, CostResponse]] = {}
-_cost_cache_lock = threading.Lock()
+class DailyCostAnalytics(BaseModel):
+    date: str
+    cost: float
+    rolling_average: float
+    change: float
+    anomaly: bool
+
+
+class PeriodCost(BaseModel):
+    start: str
+    cost: float
+
+
+class AppCostShare(BaseModel):
+    app_name: str
+    cost: float
+    share: float
+
+
+class CostAnomaly(BaseModel):
+    app_name: str
+    date: str
+    cost: float
+    change: float
+    score: float
+
+
+class CostForecast(BaseModel):
+    month: str
+    actual_to_date: float
+    daily_run_rate: float
+    days_remaining: int
+    projected_total: float
+
+
+class CostAnalyticsResponse(CostResponse):
+    average_daily_cost: float = 0.0
+    daily: List[DailyCostAnalytics] = []
+    weekly: List[PeriodCost] = []
+    monthly: List[PeriodCost] = []
+    per_app_share: List[AppCostShare] = []
+    anomalies: List[CostAnomaly] = []
+    forecast: Optional[CostForecast] = None
+
+
+class SubscriptionCostSummary(BaseModel):
+    subscription_id: str
+    display_name: Optional[str] = None
+    currency: Optional[str] = None
+    total_cost: Optional[float] = None
+    last_updated: Optional[str] = None
+    error: Optional[str] = None
+
+
+class CurrencyTotal(BaseModel):
+    currency: str
+    total_cost: float
+    subscription_count: int
+
+
+class PortfolioCostResponse(BaseModel):
+    # One entry per billing currency; amounts in different currencies are never added up.
+    totals: List[CurrencyTotal] = []
+    subscriptions: List[SubscriptionCostSummary] = []
+    failed_count: int = 0
+
 
+@dataclass(frozen=True)
+class _EncodedResponse:
+    """A cost response serialized once, at cache-fill time, and never mutated afterwards."""
 
-def _copy_model(model: BaseModel) -> BaseModel:
-    if hasattr(model, "model_copy"):
-        return model.model_copy(deep=True)  # type: ignore[attr-defined]
-    return model.copy(deep=True)  # type: ignore[attr-defined]
+    body: bytes
+    etag: str
 
+    @classmethod
+    def from_body(cls, body: bytes) -> "_EncodedResponse":
+        return cls(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
 
-def _get_cached_response(cache_key: str, ttl_seconds: int) -> Optional[CostResponse]:
+    @classmethod
+    def from_model(cls, response: CostResponse) -> "_EncodedResponse":
+        return cls.from_body(response.model_dump_json().encode("utf-8"))
+
+
+_settings = get_settings()
+# Fed by the quota headers of every Cost Management response; background prefetching
+# waits on it, interactive requests only register with it. Quota pauses are shared
+# between workers through the shared cache tier.
+_rate_limiter = CostRateLimiter(shared=get_shared_cache_backend())
+# Shared across workers, so each UTC day costs one Cost Management call per scope and
+# caller in total; keys carry the caller (see _caller_cache_key).
+# Entries are immutable encoded bytes: a hit is served without copying, validating or
+# re-serializing a CostResponse.
+_cost_cache: TieredCache[_EncodedResponse] = TieredCache(
+    "cost",
+    LRUCache(max_bytes=_settings.cost_cache_max_bytes, ttl_seconds=_settings.cost_cache_ttl_seconds),
+    get_shared_cache_backend(),
+    encode=lambda encoded: encoded.body,
+    decode=_EncodedResponse.from_body,
+    sizeof=lambda encoded: len(encoded.body),
+    # Cost Management queries routinely take 10s+; wait for another worker's result
+    # rather than duplicating the call.
+    lock_wait_seconds=30.0,
+)
+
+
+async def _get_cached_response(cache_key: str, ttl_seconds: int) -> Optional[_EncodedResponse]:
     if ttl_seconds <= 0:
         return None
-    now = datetime.datetime.now(datetime.timezone.utc)
-    with _cost_cache_lock:
-        entry = _cost_cache.get(cache_key)
-        if not entry:
-            return None
-        timestamp, response = entry
-        if (now - timestamp).total_seconds() > ttl_seconds:
-            del _cost_cache[cache_key]
-            return None
-        return _copy_model(response)
-
-
-def _set_cached_response(cache_key: str, ttl_seconds: int, value: CostResponse) -> None:
+    return await _cost_cache.aget(cache_key)
+
+
+async def _set_cached_response(cache_key: str, ttl_seconds: int, value: CostResponse) -> None:
     if ttl_seconds <= 0:
         return
-    with _cost_cache_lock:
-        _cost_cache[cache_key] = (datetime.datetime.now(datetime.timezone.utc), _copy_model(value))
+    await _cost_cache.aset(cache_key, _EncodedResponse.from_model(value), ttl_seconds=ttl_seconds)
+
+
+async def _load_cached_response(
+    cache_key: str,
+    ttl_seconds: int,
+    loader: Callable[[], Awaitable[CostResponse]],
+) -> _EncodedResponse:
+    """Return the cached response or run ``loader`` once, however many requests race for it."""
+    async def _load_encoded() -> _EncodedResponse:
+        return _EncodedResponse.from_model(await loader())
+
+    if ttl_seconds <= 0:
+        return await _load_encoded()
+    return await _cost_cache.get_or_load(cache_key, _load_encoded, ttl_seconds=ttl_seconds)
+
+
+def _encoded_json_response(encoded: _EncodedResponse, if_none_match: Optional[str]) -> Response:
+    """Serve pre-encoded JSON as-is, or ``304`` when the client already holds this version."""
+    headers = {"ETag": encoded.etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and encoded.etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=encoded.body, media_type="application/json", headers=headers)
 
 
 def _seconds_until_end_of_day(now: datetime.datetime) -> int:
@@ -85,6 +231,14 @@ def _daily_cache_key(base_key: str, now: datetime.datetime) -> str:
     return f"{now.date().isoformat()}::{base_key}"
 
 
+def _caller_cache_key(credential, base_key: str, now: datetime.datetime) -> str:
+    """
+    Daily cache key of ``base_key`` for the caller behind ``credential``: Azure applies RBAC
+    per identity, so cost data is only served back to the identity that loaded it.
+    """
+    return _daily_cache_key(f"{credential_cache_scope(credential)}:{base_key}", now)
+
+
 def _effective_cache_ttl(now: datetime.datetime, settings: Settings) -> int:
     """
     Ensure cost queries stay cached for the rest of the UTC day.
@@ -97,8 +251,15 @@ def _effective_cache_ttl(now: datetime.datetime, settings: Settings) -> int:
     return max(configured_ttl, _seconds_until_end_of_day(now))
 
 
-def _build_query(start: datetime.datetime, end: datetime.datetime, group_by_resource: bool = False) -> QueryDefinition:
+def _build_query(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    group_by_resource: bool = False,
+    group_by_resource_group: bool = False,
+) -> QueryDefinition:
     grouping = []
+    if group_by_resource_group:
+        grouping.append(QueryGrouping(type="Dimension", name="ResourceGroupName"))
     if group_by_resource:
         grouping.append(QueryGrouping(type="Dimension", name="ResourceId"))
 
@@ -116,41 +277,491 @@ def _build_query(start: datetime.datetime, end: datetime.datetime, group_by_reso
     )
 
 
-def _parse_rows(rows, has_resource_group: bool = False):
+def _usage_pages(cost_client: CostManagementClient, scope: str, query: QueryDefinition):
+    """
+    Run a usage query and yield ``(column names, rows)`` for every page (blocking).
+
+    Grouped queries over a whole subscription easily exceed one page; the SDK only
+    returns the first, so ``next_link`` is followed by re-posting the same body to it.
+    """
+    result = cost_client.query.usage(scope, query, raw_response_hook=_rate_limiter.observe_response)
+    yield [column.name for column in result.columns or []], result.rows or []
+    next_link = result.next_link
+    while next_link:
+        response = cost_client.send_request(HttpRequest("POST", next_link, json=query.serialize()))
+        _rate_limiter.observe(response.headers)
+        response.raise_for_status()
+        properties = response.json().get("properties", {})
+        yield [column["name"] for column in properties.get("columns") or []], properties.get("rows") or []
+        next_link = properties.get("nextLink")
+
+
+@dataclass(frozen=True)
+class _CostPlan:
     """
-    Parse Azure Cost Management query rows.
-    Without grouping: [cost, usageDate, currency]
-    With ResourceId grouping: [cost, usageDate, resourceId, currency]
+    Daily cost per (resource group, resource) for one scope and window, from a single
+    grouped query. Subscription totals, resource-group series and per-app breakdowns
+    are all reductions over this matrix, so one plan answers every view of the subscription.
     """
-    total_cost = 0.0
+
+    # Resource groups are lower-cased; the resource group and name are empty for
+    # charges not attributed to a resource.
+    costs: GroupedCosts
+
+    @property
+    def currency(self) -> str:
+        return self.costs.currency
+
+    @classmethod
+    def from_cells(cls, currency: str, cells) -> "_CostPlan":
+        return cls(costs=GroupedCosts.from_cells(currency, cells))
+
+    def encode(self) -> bytes:
+        # Only the non-zero cells are stored; most resources run on a fraction of the days.
+        costs = self.costs
+        rows, cols = np.nonzero(costs.matrix)
+        return json.dumps(
+            {
+                "currency": costs.currency,
+                "dates": costs.dates,
+                "resources": costs.resources,
+                "cells": [rows.tolist(), cols.tolist(), costs.matrix[rows, cols].tolist()],
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+    @classmethod
+    def decode(cls, data: bytes) -> "_CostPlan":
+        payload = json.loads(data)
+        resources = [tuple(resource) for resource in payload["resources"]]
+        matrix = np.zeros((len(resources), len(payload["dates"])))
+        rows, cols, values = payload["cells"]
+        matrix[np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)] = values
+        return cls(costs=GroupedCosts(
+            currency=payload["currency"], dates=payload["dates"], resources=resources, matrix=matrix,
+        ))
+
+    def rows(self) -> list[tuple[str, str, str, float]]:
+        """``(usage date, resource group, resource name, cost)`` for every non-zero cell, in date order."""
+        return sorted(self.costs.cells())
+
+    def summarize(self, since: str, resource_group: Optional[str] = None):
+        """
+        Totals for usage dates from ``since`` onwards, optionally restricted to one
+        resource group. Returns ``(total, currency, daily costs, per-resource costs, last date)``.
+        """
+        selected = self.costs.select(since, resource_group)
+        matrix = selected.matrix
+        daily = matrix.sum(axis=0).tolist()
+        reported = matrix.any(axis=0).tolist()
+        daily_costs_dict = {date: cost for date, cost, seen in zip(selected.dates, daily, reported) if seen}
+
+        resource_costs_dict: dict[str, float] = {}
+        resource_totals = matrix.sum(axis=1).tolist()
+        for r in np.flatnonzero(matrix.any(axis=1)).tolist():
+            name = selected.resources[r][1] or "unknown"
+            resource_costs_dict[name] = resource_costs_dict.get(name, 0.0) + resource_totals[r]
+
+        positive = np.flatnonzero((matrix > 0).any(axis=0))
+        last_date = selected.dates[positive[-1]] if len(positive) else None
+        return float(matrix.sum()), self.currency, daily_costs_dict, resource_costs_dict, last_date
+
+
+def _query_plan(
+    cost_client: CostManagementClient,
+    scope: str,
+    start: datetime.datetime,
+    end: datetime.datetime,
+) -> GroupedCosts:
+    """Run the grouped query for the window and parse every page (blocking)."""
+    query = _build_query(start, end, group_by_resource=True, group_by_resource_group=True)
+    return parse_grouped_pages(_usage_pages(cost_client, scope, query))
+
+
+# (caller, scope) pairs whose own credential recently read ``scope`` from Cost Management.
+_history_access = LRUCache(max_bytes=1024 * 1024, ttl_seconds=3600)
+
+
+async def _plan_from_history(
+    cost_client: CostManagementClient,
+    caller: str,
+    scope: str,
+    start: datetime.datetime,
+    end: datetime.datetime,
+    settle_days: int,
+) -> _CostPlan:
+    """
+    Build a plan from the ``cost_history`` table.
+
+    Cost Management data stops changing roughly ``settle_days`` after the usage date, so a
+    stored day is final once it was fetched at least that long after it happened. Only the
+    span from the first missing or unsettled day to ``end`` is queried and written back,
+    which turns a 90-day request into a 2-day delta on warm scopes. Each day has a
+    scope-total marker row (empty resource name) plus one row per ``resource_group/name``.
+    No database connection is held while Cost Management is being queried.
+
+    The table is shared by every identity, so stored rows are only served to a ``caller``
+    whose own credential has read ``scope`` within the last hour; when nothing needs
+    fetching, a one-day query proves it (and fails with Azure's 401/403 if it cannot).
+    """
+    start_date, end_date = start.date(), end.date()
+    async with SessionLocal() as session:
+        stored = await CostHistoryRepository(session).list_days(scope, start_date, end_date)
+
+    final_days = {
+        row.usage_date for row in stored
+        if row.resource_name == "" and (row.fetched_at.date() - row.usage_date).days >= settle_days
+    }
+    day = start_date
+    fetch_from = None
+    while day <= end_date:
+        if day not in final_days:
+            fetch_from = day
+            break
+        day += datetime.timedelta(days=1)
+
+    if fetch_from is None and _history_access.get((caller, scope)) is None:
+        check_start = datetime.datetime.combine(end_date, datetime.time.min, tzinfo=datetime.timezone.utc)
+        await get_executor("cost").run("cost_management", "query.usage", _query_plan, cost_client, scope, check_start, end)
+        _history_access.set((caller, scope), True, size=len(caller) + len(scope))
+
+    if fetch_from is not None:
+        logger.debug("Cost history for '%s': fetching %s..%s", scope, fetch_from, end_date)
+        fetch_start = datetime.datetime.combine(fetch_from, datetime.time.min, tzinfo=datetime.timezone.utc)
+        grouped = await get_executor("cost").run("cost_management", "query.usage", _query_plan, cost_client, scope, fetch_start, end)
+        currency = grouped.currency
+        daily_costs_dict = dict(zip(grouped.dates, grouped.daily_totals.tolist()))
+
+        fetched_at = datetime.datetime.now(datetime.timezone.utc)
+        new_rows = []
+        day = fetch_from
+        while day <= end_date:
+            new_rows.append(CostHistory(
+                scope=scope, usage_date=day, resource_name="",
+                cost=daily_costs_dict.get(day.isoformat(), 0.0), currency=currency, fetched_at=fetched_at,
+            ))
+            day += datetime.timedelta(days=1)
+        for date_str, group, name, cost in grouped.cells():
+            new_rows.append(CostHistory(
+                scope=scope, usage_date=datetime.date.fromisoformat(date_str), resource_name=f"{group}/{name}",
+                cost=cost, currency=currency, fetched_at=fetched_at,
+            ))
+        _history_access.set((caller, scope), True, size=len(caller) + len(scope))
+        async with SessionLocal() as session:
+            await CostHistoryRepository(session).replace_days(scope, fetch_from, end_date, new_rows)
+        stored = [row for row in stored if row.usage_date < fetch_from] + new_rows
+
     currency = "USD"
-    daily_costs_dict: dict[str, float] = {}
-    resource_costs_dict: dict[str, float] = {}
-    last_date = None
-
-    if not rows:
-        return total_cost, currency, daily_costs_dict, resource_costs_dict, last_date
-
-    for row in rows:
-        cost_val = float(row[0])
-        date_str = str(row[1])
-        formatted_date = f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}"
-
-        if has_resource_group:
-            resource_id = str(row[2]) if len(row) > 2 else "unknown"
-            currency = str(row[3]) if len(row) > 3 and row[3] else currency
-            # Extract just the resource name from the full resource ID
-            app_name = resource_id.split("/")[-1] if "/" in resource_id else resource_id
-            resource_costs_dict[app_name] = resource_costs_dict.get(app_name, 0.0) + cost_val
-        else:
-            currency = str(row[2]) if len(row) > 2 and row[2] else currency
+    cells = []
+    for row in stored:
+        currency = row.currency or currency
+        if row.resource_name:
+            group, _, name = row.resource_name.partition("/")
+            cells.append((row.usage_date.isoformat(), group, name, row.cost))
+    return _CostPlan.from_cells(currency, cells)
+
+
+async def _fetch_plan(
+    cost_client: CostManagementClient,
+    caller: str,
+    scope: str,
+    start: datetime.datetime,
+    end: datetime.datetime,
+    settings: Settings,
+) -> _CostPlan:
+    """Plan for the window, served from the history table when it is available."""
+    if settings.cost_history_enabled:
+        try:
+            return await _plan_from_history(cost_client, caller, scope, start, end, settings.cost_history_settle_days)
+        except SQLAlchemyError:
+            logger.warning("Cost history unavailable for '%s'; querying Cost Management directly", scope, exc_info=True)
+    return _CostPlan(await get_executor("cost").run("cost_management", "query.usage", _query_plan, cost_client, scope, start, end))
+
+
+# Plans are fetched for the smallest of these windows covering the request, so the
+# default 30-day resource-group view and the month-to-date view share one query.
+_PLAN_WINDOW_DAYS = (31, 92, 183, 366)
+
+_plan_cache: TieredCache[_CostPlan] = TieredCache(
+    "cost-plan",
+    LRUCache(max_bytes=_settings.cost_cache_max_bytes, ttl_seconds=_settings.cost_cache_ttl_seconds),
+    get_shared_cache_backend(),
+    encode=_CostPlan.encode,
+    decode=_CostPlan.decode,
+    lock_wait_seconds=30.0,
+)
+
+
+async def _get_plan(
+    credential,
+    scope: str,
+    now: datetime.datetime,
+    days_needed: int,
+    settings: Settings,
+    background: bool = False,
+) -> _CostPlan:
+    """
+    The cached plan for ``scope`` covering at least the last ``days_needed`` usage dates.
+
+    A wider plan already cached today answers narrower requests as well; otherwise the
+    smallest standard window is loaded once, however many scopes or requests race for it.
+    Background loads wait for the rate limiter; interactive ones take priority over them.
+    """
+    window = next((w for w in _PLAN_WINDOW_DAYS if w >= days_needed), days_needed)
+    effective_ttl = _effective_cache_ttl(now, settings)
+    if effective_ttl > 0:
+        for wider in (w for w in _PLAN_WINDOW_DAYS if w > window):
+            plan = await _plan_cache.aget(_caller_cache_key(credential, f"plan:{scope}:{wider}", now))
+            if plan is not None:
+                return plan
+
+    start = (now - datetime.timedelta(days=window - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    async def _load() -> _CostPlan:
+        cost_client = CostManagementClient(credential, **management_client_options(_settings))
+        caller = credential_cache_scope(credential)
+        if background:
+            await _rate_limiter.wait_for_background()
+            return await _fetch_plan(cost_client, caller, scope, start, now, settings)
+        with _rate_limiter.interactive():
+            return await _fetch_plan(cost_client, caller, scope, start, now, settings)
+
+    if effective_ttl <= 0:
+        return await _load()
+    return await _plan_cache.get_or_load(_caller_cache_key(credential, f"plan:{scope}:{window}", now), _load, ttl_seconds=effective_ttl)
+
+
+async def _subscription_response(
+    credential,
+    subscription_id: str,
+    now: datetime.datetime,
+    settings: Settings,
+    background: bool = False,
+) -> CostResponse:
+    scope = f"/subscriptions/{subscription_id}"
+    start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    plan = await _get_plan(credential, scope, now, now.day, settings, background)
+    total_cost, currency, daily_costs_dict, _, last_date = plan.summarize(start_of_month.date().isoformat())
+
+    return CostResponse(
+        currency=currency,
+        total_cost=round(total_cost, 2),
+        scope=scope,
+        last_updated=last_date,
+        daily_costs=[DailyCost(date=k, cost=round(v, 2)) for k, v in sorted(daily_costs_dict.items())],
+    )
+
+
+async def _resource_group_plan(
+    credential,
+    subscription_id: str,
+    resource_group: str,
+    now: datetime.datetime,
+    days_needed: int,
+    settings: Settings,
+    background: bool = False,
+) -> _CostPlan:
+    """
+    The subscription's plan, shared by every resource group in it. Callers with only
+    resource-group access cannot read the subscription scope, so they get a plan of their own.
+    """
+    try:
+        return await _get_plan(credential, f"/subscriptions/{subscription_id}", now, days_needed, settings, background)
+    except HttpResponseError as e:
+        if e.status_code not in (401, 403):
+            raise
+        logger.info("No subscription-level cost access for '%s'; querying RG scope", subscription_id)
+        scope = f"/subscriptions/{subscription_id}/resourceGroups/{resource_group}"
+        return await _get_plan(credential, scope, now, days_needed, settings, background)
+
+
+async def _resource_group_response(
+    credential,
+    subscription_id: str,
+    resource_group: str,
+    days: int,
+    now: datetime.datetime,
+    settings: Settings,
+    background: bool = False,
+) -> CostResponse:
+    scope = f"/subscriptions/{subscription_id}/resourceGroups/{resource_group}"
+    since = (now - datetime.timedelta(days=days)).date().isoformat()
+    plan = await _resource_group_plan(credential, subscription_id, resource_group, now, days + 1, settings, background)
+    total_cost, currency, daily_costs_dict, resource_costs_dict, last_date = plan.summarize(since, resource_group)
+
+    per_app = [
+        AppCost(app_name=name, cost=round(cost, 2))
+        for name, cost in sorted(resource_costs_dict.items(), key=lambda x: x[1], reverse=True)
+    ]
+
+    return CostResponse(
+        currency=currency,
+        total_cost=round(total_cost, 2),
+        scope=scope,
+        last_updated=last_date,
+        daily_costs=[DailyCost(date=k, cost=round(v, 2)) for k, v in sorted(daily_costs_dict.items())],
+        per_app_costs=per_app,
+    )
+
 
-        daily_costs_dict[formatted_date] = daily_costs_dict.get(formatted_date, 0.0) + cost_val
-        if (not last_date or formatted_date > last_date) and cost_val > 0:
-            last_date = formatted_date
-        total_cost += cost_val
+def _build_analytics(
+    plan: _CostPlan,
+    scope: str,
+    resource_group: Optional[str],
+    start: datetime.date,
+    end: datetime.date,
+) -> CostAnalyticsResponse:
+    """Vectorized rollups over the plan's per-resource daily series (CPU-bound)."""
+    # Reach back to the first of the month so the forecast always sees the full month to date.
+    history_start = min(start, end.replace(day=1))
+    costs = plan.costs.select(history_start.isoformat(), resource_group)
+    history = CostMatrix.from_grouped(costs, history_start, end)
+    matrix = history.since(start)
+    analytics = analyze_costs(matrix, history=history)
+
+    dates = [str(d) for d in matrix.dates]
+    totals = analytics.totals.tolist()
+    rolling = analytics.rolling_average.tolist()
+    change = analytics.change.tolist()
+    anomaly = analytics.anomaly.tolist()
+    resource_totals = analytics.resource_totals.tolist()
+    resource_share = analytics.resource_share.tolist()
+    # The matrix keeps every resource of the month; drop those without cost in the window.
+    by_cost = sorted(
+        (i for i in range(len(matrix.names)) if resource_totals[i]), key=lambda i: resource_totals[i], reverse=True
+    )
+    span = analytics.last_day + 1
+    forecast = analytics.forecast
+    outliers = analytics.resource_anomalies
+
+    return CostAnalyticsResponse(
+        currency=plan.currency,
+        total_cost=round(sum(totals), 2),
+        scope=scope,
+        last_updated=dates[analytics.last_day] if span else None,
+        daily_costs=[DailyCost(date=d, cost=round(c, 2)) for d, c in zip(dates, totals) if c],
+        per_app_costs=[AppCost(app_name=matrix.names[i], cost=round(resource_totals[i], 2)) for i in by_cost],
+        average_daily_cost=round(sum(totals[:span]) / span, 2) if span else 0.0,
+        daily=[
+            DailyCostAnalytics(date=d, cost=round(c, 2), rolling_average=round(r, 2), change=round(x, 2), anomaly=a)
+            for d, c, r, x, a in zip(dates, totals, rolling, change, anomaly)
+        ],
+        weekly=[
+            PeriodCost(start=str(d), cost=round(c, 2))
+            for d, c in zip(analytics.weekly.starts, analytics.weekly.costs.tolist())
+        ],
+        monthly=[
+            PeriodCost(start=str(d), cost=round(c, 2))
+            for d, c in zip(analytics.monthly.starts, analytics.monthly.costs.tolist())
+        ],
+        per_app_share=[
+            AppCostShare(app_name=matrix.names[i], cost=round(resource_totals[i], 2), share=round(resource_share[i], 4))
+            for i in by_cost
+        ],
+        anomalies=[
+            CostAnomaly(
+                app_name=matrix.names[r],
+                date=dates[d],
+                cost=round(float(matrix.costs[r, d]), 2),
+                change=round(x, 2),
+                score=round(z, 2),
+            )
+            for r, d, x, z in zip(
+                outliers.resource.tolist(), outliers.day.tolist(), outliers.change.tolist(), outliers.score.tolist()
+            )
+        ],
+        forecast=CostForecast(
+            month=str(forecast.month),
+            actual_to_date=round(forecast.actual_to_date, 2),
+            daily_run_rate=round(forecast.daily_run_rate, 2),
+            days_remaining=forecast.days_remaining,
+            projected_total=round(forecast.projected_total, 2),
+        ),
+    )
+
+
+async def _analytics_response(
+    credential,
+    subscription_id: str,
+    resource_group: Optional[str],
+    days: int,
+    now: datetime.datetime,
+    settings: Settings,
+) -> CostAnalyticsResponse:
+    start = (now - datetime.timedelta(days=days)).date()
+    days_needed = (now.date() - min(start, now.date().replace(day=1))).days + 1
+    if resource_group is None:
+        scope = f"/subscriptions/{subscription_id}"
+        plan = await _get_plan(credential, scope, now, days_needed, settings)
+    else:
+        scope = f"/subscriptions/{subscription_id}/resourceGroups/{resource_group}"
+        plan = await _resource_group_plan(credential, subscription_id, resource_group, now, days_needed, settings)
+    return await get_executor("cost").run("cpu", "cost.build_analytics", _build_analytics, plan, scope, resource_group, start, now.date())
+
+
+# ── Daily prefetch ───────────────────────────────────────────────────────────
+
+_DEFAULT_RG_DAYS = 30
+
+
+@lru_cache
+def _prefetch_credential() -> TokenCredential:
+    """The server's own identity (managed identity, environment or ``az login``)."""
+    return DefaultAzureCredential()
+
+
+async def _prefetch_scopes() -> list[tuple[str, Optional[str]]]:
+    """
+    Scopes users have opened in this worker plus, if configured, the registered environments.
+    The scheduler merges these with the scopes other workers published.
+    """
+    scopes = known_cost_scopes.snapshot()
+    subscription_id = get_settings().azure_subscription_id
+    if subscription_id:
+        try:
+            async with SessionLocal() as session:
+                groups = await EnvironmentRepository(session).list_resource_groups()
+            scopes.extend((subscription_id, group) for group in groups)
+        except SQLAlchemyError:
+            logger.warning("Could not read environment resource groups for cost prefetch", exc_info=True)
+    return scopes
 
-    return total_cost, currency, daily_costs_dict, resource_costs_dict, last_date
+
+async def _prefetch_subscription(subscription_id: str, resource_groups: list[str]) -> None:
+    """
+    Load a subscription and its resource groups' default view with the server's identity.
+    Responses are cached for that identity only; what users gain is the history table,
+    which leaves their own queries with the unsettled last days to fetch.
+    """
+    settings = get_settings()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    effective_ttl = _effective_cache_ttl(now, settings)
+    if effective_ttl <= 0:
+        return
+    credential = _prefetch_credential()
+
+    await _load_cached_response(
+        _caller_cache_key(credential, f"subscription:{subscription_id}", now),
+        effective_ttl,
+        lambda: _subscription_response(credential, subscription_id, now, settings, background=True),
+    )
+    for resource_group in resource_groups:
+        await _load_cached_response(
+            _caller_cache_key(credential, f"resource-group:{subscription_id}:{resource_group}:{_DEFAULT_RG_DAYS}", now),
+            effective_ttl,
+            lambda rg=resource_group: _resource_group_response(
+                credential, subscription_id, rg, _DEFAULT_RG_DAYS, now, settings, background=True
+            ),
+        )
+
+
+cost_prefetch_scheduler = CostPrefetchScheduler(
+    _prefetch_scopes,
+    _prefetch_subscription,
+    delay_seconds=_settings.cost_prefetch_delay_seconds,
+    interval_seconds=_settings.cost_prefetch_interval_seconds,
+    shared=get_shared_cache_backend(),
+)
 
 
 @router.get("/subscription/{subscription_id}", response_model=CostResponse)
@@ -158,40 +769,29 @@ async def get_subscription_cost(
     subscription_id: str,
     credential=Depends(get_azure_credential),
     settings: Settings = Depends(get_settings),
+    if_none_match: Optional[str] = Header(default=None),
 ):
     """
     Get Month-To-Date cost for a given Azure subscription.
     Note: Azure Cost Management data is typically delayed by 24-48 hours.
     """
-    scope = f"/subscriptions/{subscription_id}"
+    known_cost_scopes.add(subscription_id)
     now = datetime.datetime.now(datetime.timezone.utc)
     effective_ttl = _effective_cache_ttl(now, settings)
-    cache_key = _daily_cache_key(f"subscription:{subscription_id}", now)
-    cached_response = _get_cached_response(cache_key, effective_ttl)
+    cache_key = _caller_cache_key(credential, f"subscription:{subscription_id}", now)
+    cached_response = await _get_cached_response(cache_key, effective_ttl)
     if cached_response:
         logger.debug("Returning cached subscription cost for '%s' from cache", subscription_id)
-        return cached_response
-
-    start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    query = _build_query(start_of_month, now, group_by_resource=False)
+        return _encoded_json_response(cached_response, if_none_match)
 
     try:
-        cost_client = CostManagementClient(credential)
-        result = await asyncio.to_thread(lambda: cost_client.query.usage(scope, query))
-
-        total_cost, currency, daily_costs_dict, _, last_date = _parse_rows(result.rows or [], has_resource_group=False)
-
-        response = CostResponse(
-            currency=currency,
-            total_cost=round(total_cost, 2),
-            scope=scope,
-            last_updated=last_date,
-            daily_costs=[DailyCost(date=k, cost=round(v, 2)) for k, v in sorted(daily_costs_dict.items())],
+        encoded = await _load_cached_response(
+            cache_key, effective_ttl, lambda: _subscription_response(credential, subscription_id, now, settings)
         )
-        _set_cached_response(cache_key, effective_ttl, response)
-
-        return response
+        return _encoded_json_response(encoded, if_none_match)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("Error fetching cost for subscription '%s'", subscription_id)
         raise HTTPException(status_code=500, detail=f"Azure Cost Management Error: {str(e)}")
@@ -201,20 +801,20 @@ async def get_subscription_cost(
 async def get_resource_group_cost(
     subscription_id: str,
     resource_group: str,
-    days: int = 30,
+    days: int = Query(default=_DEFAULT_RG_DAYS, ge=1, le=365),
     credential=Depends(get_azure_credential),
     settings: Settings = Depends(get_settings),
+    if_none_match: Optional[str] = Header(default=None),
 ):
     """
     Get cost breakdown for a specific Resource Group, grouped per container app.
     Note: Azure Cost Management data is typically delayed by 24-48 hours.
     """
-    scope = f"/subscriptions/{subscription_id}/resourceGroups/{resource_group}"
+    known_cost_scopes.add(subscription_id, resource_group)
     now = datetime.datetime.now(datetime.timezone.utc)
-    start = now - datetime.timedelta(days=days)
     effective_ttl = _effective_cache_ttl(now, settings)
-    cache_key = _daily_cache_key(f"resource-group:{subscription_id}:{resource_group}:{days}", now)
-    cached_response = _get_cached_response(cache_key, effective_ttl)
+    cache_key = _caller_cache_key(credential, f"resource-group:{subscription_id}:{resource_group}:{days}", now)
+    cached_response = await _get_cached_response(cache_key, effective_ttl)
     if cached_response:
         logger.debug(
             "Returning cached resource group cost for '%s/%s' (days=%d)",
@@ -222,42 +822,276 @@ async def get_resource_group_cost(
             resource_group,
             days,
         )
-        return cached_response
+        return _encoded_json_response(cached_response, if_none_match)
 
-    # Query 1: daily total for the RG (no grouping)
-    daily_query = _build_query(start, now, group_by_resource=False)
-    # Query 2: per-app breakdown (group by ResourceId)
-    app_query = _build_query(start, now, group_by_resource=True)
+    try:
+        encoded = await _load_cached_response(
+            cache_key,
+            effective_ttl,
+            lambda: _resource_group_response(credential, subscription_id, resource_group, days, now, settings),
+        )
+        return _encoded_json_response(encoded, if_none_match)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error fetching cost for RG '%s' in sub '%s'", resource_group, subscription_id)
+        raise HTTPException(status_code=500, detail=f"Azure Cost Management Error: {str(e)}")
+ 
+
+
+@router.get("/analytics/subscription/{subscription_id}", response_model=CostAnalyticsResponse)
+async def get_subscription_cost_analytics(
+    subscription_id: str,
+    days: int = Query(default=_DEFAULT_RG_DAYS, ge=7, le=365),
+    credential=Depends(get_azure_credential),
+    settings: Settings = Depends(get_settings),
+    if_none_match: Optional[str] = Header(default=None),
+):
+    """
+    Rolling averages, week/month rollups, per-app share, a month-end forecast and
+    day-over-day anomalies for a subscription, computed server-side.
+    """
+    known_cost_scopes.add(subscription_id)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    effective_ttl = _effective_cache_ttl(now, settings)
+    cache_key = _caller_cache_key(credential, f"analytics:subscription:{subscription_id}:{days}", now)
 
     try:
-        cost_client = CostManagementClient(credential)
+        encoded = await _load_cached_response(
+            cache_key,
+            effective_ttl,
+            lambda: _analytics_response(credential, subscription_id, None, days, now, settings),
+        )
+        return _encoded_json_response(encoded, if_none_match)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error computing cost analytics for subscription '%s'", subscription_id)
+        raise HTTPException(status_code=500, detail=f"Azure Cost Management Error: {str(e)}")
 
-        daily_result, app_result = await asyncio.gather(
-            asyncio.to_thread(lambda: cost_client.query.usage(scope, daily_query)),
-            asyncio.to_thread(lambda: cost_client.query.usage(scope, app_query)),
+
+@router.get("/analytics/resource-group/{subscription_id}/{resource_group}", response_model=CostAnalyticsResponse)
+async def get_resource_group_cost_analytics(
+    subscription_id: str,
+    resource_group: str,
+    days: int = Query(default=_DEFAULT_RG_DAYS, ge=7, le=365),
+    credential=Depends(get_azure_credential),
+    settings: Settings = Depends(get_settings),
+    if_none_match: Optional[str] = Header(default=None),
+):
+    """
+    Rolling averages, week/month rollups, per-app share, a month-end forecast and
+    day-over-day anomalies for a Resource Group, computed server-side.
+    """
+    known_cost_scopes.add(subscription_id, resource_group)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    effective_ttl = _effective_cache_ttl(now, settings)
+    cache_key = _caller_cache_key(credential, f"analytics:resource-group:{subscription_id}:{resource_group}:{days}", now)
+
+    try:
+        encoded = await _load_cached_response(
+            cache_key,
+            effective_ttl,
+            lambda: _analytics_response(credential, subscription_id, resource_group, days, now, settings),
         )
+        return _encoded_json_response(encoded, if_none_match)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error computing cost analytics for RG '%s' in sub '%s'", resource_group, subscription_id)
+        raise HTTPException(status_code=500, detail=f"Azure Cost Management Error: {str(e)}")
 
-        total_cost, currency, daily_costs_dict, _, last_date = _parse_rows(daily_result.rows or [], has_resource_group=False)
-        _, _, _, resource_costs_dict, _ = _parse_rows(app_result.rows or [], has_resource_group=True)
-
-        per_app = [
-            AppCost(app_name=name, cost=round(cost, 2))
-            for name, cost in sorted(resource_costs_dict.items(), key=lambda x: x[1], reverse=True)
-        ]
-
-        response = CostResponse(
-            currency=currency,
-            total_cost=round(total_cost, 2),
-            scope=scope,
-            last_updated=last_date,
-            daily_costs=[DailyCost(date=k, cost=round(v, 2)) for k, v in sorted(daily_costs_dict.items())],
-            per_app_costs=per_app,
+
+async def _subscription_summary(
+    credential,
+    subscription_id: str,
+    display_name: Optional[str],
+    now: datetime.datetime,
+    settings: Settings,
+) -> SubscriptionCostSummary:
+    """Month-to-date cost of one subscription through the same cache path as ``get_subscription_cost``."""
+    known_cost_scopes.add(subscription_id)
+    try:
+        encoded = await _load_cached_response(
+            _caller_cache_key(credential, f"subscription:{subscription_id}", now),
+            _effective_cache_ttl(now, settings),
+            lambda: _subscription_response(credential, subscription_id, now, settings),
         )
-        _set_cached_response(cache_key, effective_ttl, response)
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        logger.warning("Portfolio cost failed for subscription '%s'", subscription_id, exc_info=True)
+        return SubscriptionCostSummary(subscription_id=subscription_id, display_name=display_name, error=str(e))
+
+    cost = CostResponse.model_validate_json(encoded.body)
+    return SubscriptionCostSummary(
+        subscription_id=subscription_id,
+        display_name=display_name,
+        currency=cost.currency,
+        total_cost=cost.total_cost,
+        last_updated=cost.last_updated,
+    )
+
+
+@router.get("/portfolio", response_model=PortfolioCostResponse)
+async def get_portfolio_cost(
+    subscription_ids: Optional[List[str]] = Query(default=None),
+    credential=Depends(get_azure_credential),
+    settings: Settings = Depends(get_settings),
+):
+    """
+    Month-To-Date cost across every subscription visible to the caller (or only
+    ``subscription_ids``), with per-currency totals and a per-subscription breakdown.
+    Subscriptions that fail are reported individually instead of failing the response.
+    """
+    try:
+        if subscription_ids:
+            subscriptions = [(sub_id, None) for sub_id in dict.fromkeys(subscription_ids)]
+        else:
+            def _list_subscriptions():
+                return [
+                    (sub.subscription_id, getattr(sub, "display_name", None))
+                    for sub in SubscriptionClient(credential, **management_client_options(_settings)).subscriptions.list()
+                ]
+
+            subscriptions = await get_executor("cost").run("arm", "subscriptions.list", _list_subscriptions)
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        semaphore = asyncio.Semaphore(settings.cost_portfolio_concurrency)
 
-        return response
+        async def _bounded(sub_id: str, name: Optional[str]) -> SubscriptionCostSummary:
+            async with semaphore:
+                return await _subscription_summary(credential, sub_id, name, now, settings)
 
+        summaries = await asyncio.gather(*(_bounded(sub_id, name) for sub_id, name in subscriptions))
+
+        totals: dict[str, CurrencyTotal] = {}
+        for summary in summaries:
+            if summary.error is not None or summary.currency is None:
+                continue
+            total = totals.setdefault(
+                summary.currency, CurrencyTotal(currency=summary.currency, total_cost=0.0, subscription_count=0)
+            )
+            total.total_cost = round(total.total_cost + (summary.total_cost or 0.0), 2)
+            total.subscription_count += 1
+
+        return PortfolioCostResponse(
+            totals=sorted(totals.values(), key=lambda t: t.total_cost, reverse=True),
+            subscriptions=sorted(summaries, key=lambda s: s.total_cost or 0.0, reverse=True),
+            failed_count=sum(1 for summary in summaries if summary.error is not None),
+        )
+
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.exception("Error fetching cost for RG '%s' in sub '%s'", resource_group, subscription_id)
+        logger.exception("Error fetching cost portfolio")
         raise HTTPException(status_code=500, detail=f"Azure Cost Management Error: {str(e)}")
- 
\ No newline at end of file
+
+
+# ── Long-range export ────────────────────────────────────────────────────────
+
+_MAX_EXPORT_DAYS = 730
+_EXPORT_MAX_ATTEMPTS = 4
+
+
+def _month_chunks(first: datetime.date, last: datetime.date) -> list[tuple[datetime.date, datetime.date]]:
+    """Split ``[first, last]`` into calendar-month pieces."""
+    chunks = []
+    cursor = first
+    while cursor <= last:
+        next_month = (cursor.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+        chunk_end = min(next_month - datetime.timedelta(days=1), last)
+        chunks.append((cursor, chunk_end))
+        cursor = chunk_end + datetime.timedelta(days=1)
+    return chunks
+
+
+async def _load_export_chunk(
+    cost_client: CostManagementClient,
+    caller: str,
+    scope: str,
+    chunk: tuple[datetime.date, datetime.date],
+    settings: Settings,
+    fmt: ExportFormat,
+) -> str:
+    """
+    One month of grouped daily costs (history table first, then Cost Management), encoded.
+    Throttled queries are retried after the quota's retry-after, or an exponential backoff.
+    """
+    first, last = chunk
+    start = datetime.datetime.combine(first, datetime.time.min, tzinfo=datetime.timezone.utc)
+    end = datetime.datetime.combine(last, datetime.time.max, tzinfo=datetime.timezone.utc)
+    attempt = 0
+    while True:
+        await _rate_limiter.wait_for_quota()
+        try:
+            with _rate_limiter.interactive():
+                plan = await _fetch_plan(cost_client, caller, scope, start, end, settings)
+            return _encode_cost_rows(plan, fmt) if plan.costs.matrix.any() else ""
+        except HttpResponseError as e:
+            attempt += 1
+            if e.status_code != 429 or attempt >= _EXPORT_MAX_ATTEMPTS:
+                raise
+        logger.info("Cost export chunk %s..%s for '%s' throttled; retrying", first, last, scope)
+        await asyncio.sleep(max(_rate_limiter.quota_delay(), 2.0 ** attempt))
+
+
+def _encode_cost_rows(plan: _CostPlan, fmt: str) -> str:
+    rows = plan.rows()
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for date_str, group, name, cost in rows:
+            writer.writerow([date_str, group, name, round(cost, 6), plan.currency])
+        return buffer.getvalue()
+    return "".join(
+        json.dumps({
+            "date": date_str, "resource_group": group, "resource_name": name,
+            "cost": round(cost, 6), "currency": plan.currency,
+        }) + "\n"
+        for date_str, group, name, cost in rows
+    )
+
+
+@router.get("/export/{subscription_id}")
+async def export_cost(
+    subscription_id: str,
+    resource_group: Optional[str] = None,
+    days: int = Query(default=365, ge=1, le=_MAX_EXPORT_DAYS),
+    format: Literal["ndjson", "csv"] = Query(default="ndjson"),
+    credential=Depends(get_azure_credential),
+    settings: Settings = Depends(get_settings),
+):
+    """
+    Stream daily cost per resource for a subscription (or one of its resource groups)
+    as NDJSON or CSV. The range is split into calendar months that are queried
+    concurrently under the Cost Management quota and emitted oldest-first. If a month
+    fails after streaming has begun, the body ends with an error record (``{"error": ...}``
+    in NDJSON, a ``#error`` row in CSV).
+    """
+    scope = f"/subscriptions/{subscription_id}"
+    if resource_group:
+        scope += f"/resourceGroups/{resource_group}"
+    last = datetime.datetime.now(datetime.timezone.utc).date()
+    first = last - datetime.timedelta(days=days - 1)
+    chunks = _month_chunks(first, last)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"cost-{resource_group or subscription_id}-{first:%Y%m%d}-{last:%Y%m%d}.{format}"
+    cost_client = CostManagementClient(credential, **management_client_options(_settings))
+    caller = credential_cache_scope(credential)
+    return StreamingResponse(
+        stream_in_order(
+            chunks,
+            lambda chunk: _load_export_chunk(cost_client, caller, scope, chunk, settings, format),
+            settings.cost_export_concurrency,
+            format,
+            header="date,resource_group,resource_name,cost,currency\r\n" if format == "csv" else "",
+            name=f"Cost export of '{scope}'",
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
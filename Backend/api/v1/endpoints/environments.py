@@ -1,51 +1,156 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+import csv
+import io
+import json
+import logging
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from azure.core.credentials import TokenCredential
 
 from api.dependencies import get_environment_service
-from schemas import ContainerStatus, EnvironmentCreate, EnvironmentRead
-from services import EnvironmentService
+from api.v1.endpoints.azure_discovery import discover_apps
+from core import Settings, get_azure_credential, get_settings
+from schemas import (
+    ContainerStatus,
+    DiscoveryImportRequest,
+    EnvironmentCreate,
+    EnvironmentImportResponse,
+    EnvironmentRead,
+)
+from services import EnvironmentService, pair_discovered_apps
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/environments", tags=["Environments"])
 
+_MAX_IMPORT_ROWS = 5000
+
+
+def _parse_import_body(body: bytes, content_type: str) -> list[Any]:
+    """A JSON array of environment objects, or CSV with a header row of field names."""
+    if "csv" in content_type:
+        reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+        # Blank cells fall back to the schema defaults.
+        return [{key: value for key, value in row.items() if key and value not in (None, "")} for row in reader]
+    rows = json.loads(body)
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON array of environments.")
+    return rows
+
 
 @router.post(
     "/",
     response_model=EnvironmentRead,
     status_code=status.HTTP_201_CREATED,
 )
-def create_environment(
+async def create_environment(
     payload: EnvironmentCreate,
     service: EnvironmentService = Depends(get_environment_service),
 ) -> EnvironmentRead:
     try:
-        environment = service.create_environment(payload)
+        environment = await service.create_environment(payload)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
     return EnvironmentRead.model_validate(environment)
 
 
+@router.post(
+    "/import",
+    response_model=EnvironmentImportResponse,
+)
+async def import_environments(
+    request: Request,
+    service: EnvironmentService = Depends(get_environment_service),
+) -> EnvironmentImportResponse:
+    """
+    Register many environments at once from a JSON array or a CSV upload
+    (``Content-Type: text/csv``). Every row gets a created/skipped/invalid result.
+    """
+    try:
+        rows = _parse_import_body(await request.body(), request.headers.get("content-type", ""))
+    except (ValueError, csv.Error) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unreadable import body: {exc}") from exc
+    if len(rows) > _MAX_IMPORT_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {_MAX_IMPORT_ROWS} environments per import.",
+        )
+    return await service.import_environments(rows)
+
+
+@router.post(
+    "/import/discovery",
+    response_model=EnvironmentImportResponse,
+)
+async def import_discovered_environments(
+    payload: DiscoveryImportRequest,
+    credential: TokenCredential = Depends(get_azure_credential),
+    settings: Settings = Depends(get_settings),
+    service: EnvironmentService = Depends(get_environment_service),
+) -> EnvironmentImportResponse:
+    """Register every frontend/backend pair found by auto-discovery."""
+    try:
+        apps = await discover_apps(credential, settings)
+    except HTTPException:
+        raise
+    except Exception as exc:
+        logger.exception("Failed during auto-discovery")
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
+    return await service.import_environments(pair_discovered_apps(apps, payload))
+
+
 @router.get(
     "/",
     response_model=list[EnvironmentRead],
 )
-def list_environments(
-    skip: int = 0,
-    limit: int = 100,
+async def list_environments(
+    response: Response,
+    after: Optional[int] = Query(default=None, ge=0, description="Cursor: the X-Next-Cursor of the previous page"),
+    limit: int = Query(default=100, ge=1, le=500),
+    type: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    resource_group: Optional[str] = None,
     service: EnvironmentService = Depends(get_environment_service),
 ) -> list[EnvironmentRead]:
-    environments = service.list_environments(skip=skip, limit=limit)
-    return [EnvironmentRead.model_validate(env) for env in environments]
+    # Keyset paging on id: each page costs the same however deep it is, and rows
+    # created or deleted between pages don't shift later pages.
+    environments = await service.list_environments(
+        after_id=after,
+        limit=limit + 1,
+        type=type,
+        is_active=is_active,
+        resource_group=resource_group,
+    )
+    page = environments[:limit]
+    if len(environments) > limit:
+        response.headers["X-Next-Cursor"] = str(page[-1].id)
+    return [EnvironmentRead.model_validate(env) for env in page]
+
+
+@router.get(
+    "/by-name/{name}",
+    response_model=EnvironmentRead,
+)
+async def get_environment_by_name(
+    name: str,
+    service: EnvironmentService = Depends(get_environment_service),
+) -> EnvironmentRead:
+    environment = await service.get_environment_by_name(name)
+    if environment is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Environment not found.")
+    return environment
 
 
 @router.delete(
     "/{env_id}",
     status_code=status.HTTP_204_NO_CONTENT,
 )
-def delete_environment(
+async def delete_environment(
     env_id: int,
     service: EnvironmentService = Depends(get_environment_service),
 ) -> Response:
     try:
-        service.delete_environment(env_id)
+        await service.delete_environment(env_id)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -59,7 +164,7 @@ async def get_environment_status(
     env_id: int,
     service: EnvironmentService = Depends(get_environment_service),
 ) -> ContainerStatus:
-    environment = service.get_environment(env_id)
+    environment = await service.get_environment(env_id)
     if environment is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Environment not found.")
     return await service.get_environment_status(environment)
@@ -73,7 +178,7 @@ async def restart_environment(
     env_id: int,
     service: EnvironmentService = Depends(get_environment_service),
 ) -> dict[str, str]:
-    environment = service.get_environment(env_id)
+    environment = await service.get_environment(env_id)
     if environment is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Environment not found.")
 
@@ -91,7 +196,7 @@ async def stop_environment(
     env_id: int,
     service: EnvironmentService = Depends(get_environment_service),
 ) -> dict[str, str]:
-    environment = service.get_environment(env_id)
+    environment = await service.get_environment(env_id)
     if environment is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Environment not found.")
 
@@ -109,7 +214,7 @@ async def start_environment(
     env_id: int,
     service: EnvironmentService = Depends(get_environment_service),
 ) -> dict[str, str]:
-    environment = service.get_environment(env_id)
+    environment = await service.get_environment(env_id)
     if environment is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Environment not found.")
 
@@ -1,18 +1,62 @@
 import asyncio
+import csv
+import hashlib
+import io
+import json
 import logging
-from typing import Literal, Optional
+import re
+import time
+import urllib.error
+import urllib.request
+from dataclasses import asdict
+from typing import Any, Literal, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from azure.core.credentials import TokenCredential
 from datetime import datetime, timedelta, timezone
 
-from core import get_azure_credential
+from core import (
+    ExportFormat,
+    LRUCache,
+    Settings,
+    Split,
+    TieredCache,
+    TieredCacheStats,
+    credential_cache_scope,
+    get_azure_credential,
+    get_executor,
+    get_settings,
+    get_shared_cache_backend,
+    profile_phase,
+    stream_in_order,
+)
+from services.kql import KqlQuery
+from services.log_patterns import LogTemplateMiner
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/logs", tags=["Container App Logs"])
 
+_settings = get_settings()
+# Parsed ``(columns, rows)`` tables keyed by (caller, workspace URL, normalized KQL, time bucket).
+# The caller is part of every key: the shared tier must never hand one user's Log
+# Analytics results to another whose RBAC may not cover the workspace.
+_log_cache: TieredCache[tuple[list[dict[str, Any]], list[list[Any]]]] = TieredCache(
+    "logs",
+    LRUCache(max_bytes=_settings.log_cache_max_bytes, ttl_seconds=_settings.log_cache_ttl_seconds),
+    get_shared_cache_backend(),
+    encode=lambda table: json.dumps(table, separators=(",", ":")).encode("utf-8"),
+    decode=lambda data: tuple(json.loads(data)),
+    sizeof=lambda table: _table_size(*table),
+)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Slices narrower than this are never split further, even if they are truncated.
+_MIN_EXPORT_SLICE = timedelta(seconds=30)
+
 
 class LogEntry(BaseModel):
     timestamp: str
@@ -21,6 +65,14 @@ class LogEntry(BaseModel):
     message: str
 
 
+class LogPattern(BaseModel):
+    template: str
+    count: int
+    first_seen: str
+    last_seen: str
+    samples: list[str]
+
+
 class LogsResponse(BaseModel):
     app_name: str
     resource_group: str
@@ -30,6 +82,31 @@ class LogsResponse(BaseModel):
     error_count: int
     entries: list[LogEntry]
     has_more: bool
+    patterns: Optional[list[LogPattern]] = None
+
+
+class AppLogEntry(LogEntry):
+    app_name: str
+
+
+class AppLogCounts(BaseModel):
+    app_name: str
+    total: int
+    info_count: int
+    warn_count: int
+    error_count: int
+
+
+class MultiAppLogsResponse(BaseModel):
+    resource_group: str
+    app_names: list[str]
+    total: int
+    info_count: int
+    warn_count: int
+    error_count: int
+    per_app_counts: list[AppLogCounts]
+    entries: list[AppLogEntry]
+    has_more: bool
 
 
 def _classify_level(message: str, level_col: str | None) -> str:
@@ -50,6 +127,229 @@ def _classify_level(message: str, level_col: str | None) -> str:
     return "INFO"
 
 
+def _workspace_query_url(subscription_id: str, resource_group: str) -> str:
+    """Return the ARM proxy URL of the Log Analytics workspace for a resource group."""
+    # We assume the LA workspace naturally uses the "-logs" suffix.
+    workspace_name = f"{resource_group}-logs"
+    return (
+        f"{_settings.azure_management_endpoint.rstrip('/')}/subscriptions/{subscription_id}/resourcegroups/{resource_group}"
+        f"/providers/Microsoft.OperationalInsights/workspaces/{workspace_name}/api/query?api-version=2020-08-01"
+    )
+
+
+def _query_headers(credential: TokenCredential) -> dict[str, str]:
+    # Get token from credential (which holds the Frontend's ARM token)
+    token = credential.get_token(_settings.azure_management_token_scope).token
+    return {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json"
+    }
+
+
+def _execute_query(url: str, headers: dict[str, str], query: KqlQuery) -> dict[str, Any]:
+    """Run a KQL query through the ARM proxy and return the decoded JSON body."""
+    req = urllib.request.Request(url, headers=headers, data=json.dumps(query.body()).encode('utf-8'))
+    try:
+        with urllib.request.urlopen(req) as response:
+            return json.loads(response.read().decode())
+    except urllib.error.HTTPError as e:
+        err_text = e.read().decode()
+        # If table doesn't exist yet (e.g. brand new workspace/app), it throws SyntaxError
+        if e.code == 400 and "SyntaxError" in err_text:
+            return {"Tables": []}
+        # If workspace genuinely not found, 404
+        if e.code == 404:
+            raise HTTPException(
+                status_code=404,
+                detail=(
+                    "Log Analytics Workspace not found. "
+                    "Please link a workspace to your Container App Environment in the Azure Portal: "
+                    "Container Apps Environment → Monitoring → Log Analytics."
+                )
+            )
+        raise Exception(f"Azure Monitor error [{e.code}]: {err_text}")
+
+
+def _first_table(result: dict[str, Any] | None) -> tuple[list[dict[str, Any]], list[list[Any]]]:
+    """Return ``(columns, rows)`` of the first result table, or empty lists."""
+    if result and result.get("Tables"):
+        table = result["Tables"][0]
+        return table.get("Columns", []), table.get("Rows", [])
+    return [], []
+
+
+def _format_timestamp(ts: str) -> str:
+    try:
+        dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+        return dt.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    except Exception:
+        return ts
+
+
+def _parse_entries(cols: list[dict[str, Any]], rows: list[list[Any]], app_name: str) -> list[LogEntry]:
+    """Convert raw ``TimeGenerated, Level_s, ContainerName_s, Log_s`` rows into entries."""
+    idx_time = next((i for i, c in enumerate(cols) if c["ColumnName"] == "TimeGenerated"), 0)
+    idx_level = next((i for i, c in enumerate(cols) if c["ColumnName"] == "Level_s"), 1)
+    idx_container = next((i for i, c in enumerate(cols) if c["ColumnName"] == "ContainerName_s"), 2)
+    idx_log = next((i for i, c in enumerate(cols) if c["ColumnName"] == "Log_s"), 3)
+
+    entries: list[LogEntry] = []
+    for row in rows:
+        ts = str(row[idx_time]) if len(row) > idx_time and row[idx_time] is not None else ""
+        level_col = str(row[idx_level]) if len(row) > idx_level and row[idx_level] is not None else ""
+        container = str(row[idx_container]) if len(row) > idx_container and row[idx_container] is not None else app_name
+        message = str(row[idx_log]) if len(row) > idx_log and row[idx_log] is not None else ""
+
+        entries.append(LogEntry(
+            timestamp=_format_timestamp(ts),
+            level=_classify_level(message, level_col),
+            container=container,
+            message=message,
+        ))
+    return entries
+
+
+# Severity keywords keep `contains`: they must also match inside longer words
+# ("WARNING", "TypeError"), which whole-term `has` would miss.
+_WARN_PREDICATE = "(Level_s =~ 'Warning' or Log_s contains 'WARN')"
+_ERROR_PREDICATE = "(Level_s =~ 'Error' or Log_s contains 'ERROR' or Log_s contains 'Exception')"
+_COUNTS_SUMMARIZE = """summarize
+    total    = count(),
+    errors   = countif(Level_s =~ 'Error' or Log_s contains 'ERROR'),
+    warnings = countif(Level_s =~ 'Warning' or Log_s contains 'WARN')"""
+
+
+def _apply_entry_filters(query: KqlQuery, severity: str, search: Optional[str]) -> KqlQuery:
+    """Add the severity/search predicates applied to log entries (not to the counts)."""
+    if severity == "warn":
+        query.where(_WARN_PREDICATE)
+    elif severity == "error":
+        query.where(_ERROR_PREDICATE)
+    if search:
+        query.where_contains("Log_s", search)
+    return query
+
+
+def _parse_counts(cols: list[dict[str, Any]], row: list[Any]) -> tuple[int, int, int]:
+    """Return ``(total, errors, warnings)`` from a counts row, locating columns by name."""
+    # Find indexes dynamically
+    idx_total = next((i for i, c in enumerate(cols) if c["ColumnName"] == "total"), 0)
+    idx_errs = next((i for i, c in enumerate(cols) if c["ColumnName"] == "errors"), 1)
+    idx_warns = next((i for i, c in enumerate(cols) if c["ColumnName"] == "warnings"), 2)
+
+    total = int(row[idx_total] if len(row) > idx_total and row[idx_total] is not None else 0)
+    error_count = int(row[idx_errs] if len(row) > idx_errs and row[idx_errs] is not None else 0)
+    warn_count = int(row[idx_warns] if len(row) > idx_warns and row[idx_warns] is not None else 0)
+    return total, error_count, warn_count
+
+
+def _normalize_kql(query: KqlQuery) -> str:
+    """Collapse whitespace so formatting differences don't fragment the cache."""
+    return _WHITESPACE_RE.sub(" ", query.render()).strip()
+
+
+def _cache_key(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def _time_bucket(settings: Settings) -> int:
+    """Snap "now" to a bucket so relative windows like ``ago(1h)`` share cache entries."""
+    return int(time.time() // settings.log_cache_bucket_seconds)
+
+
+def _table_size(cols: list[dict[str, Any]], rows: list[list[Any]]) -> int:
+    """Cheap estimate of the memory held by a parsed table."""
+    size = 64 * (len(cols) + len(rows))
+    for row in rows:
+        for value in row:
+            size += len(value) if isinstance(value, str) else 16
+    return size
+
+
+async def _cached_query(
+    scope: str,
+    url: str,
+    headers: dict[str, str],
+    query: KqlQuery,
+    bucket: int,
+) -> tuple[list[dict[str, Any]], list[list[Any]]]:
+    """Run ``query`` through the caller's (``scope``) log cache, returning the parsed first table."""
+    async def _load() -> tuple[list[dict[str, Any]], list[list[Any]]]:
+        result = await get_executor("logs").run("log_analytics", "query", _execute_query, url, headers, query)
+        with profile_phase("parse"):
+            return _first_table(result)
+
+    return await _log_cache.get_or_load(_cache_key(scope, url, _normalize_kql(query), bucket), _load)
+
+
+def _filter_rows_locally(
+    cols: list[dict[str, Any]],
+    rows: list[list[Any]],
+    severity: str,
+    search: Optional[str],
+) -> list[list[Any]]:
+    """Apply the same predicates as :func:`_apply_entry_filters` to already-fetched rows."""
+    if severity == "all" and not search:
+        return rows
+    idx_level = next((i for i, c in enumerate(cols) if c["ColumnName"] == "Level_s"), 1)
+    idx_log = next((i for i, c in enumerate(cols) if c["ColumnName"] == "Log_s"), 3)
+    needle = search.lower() if search else None
+
+    # `=~` and `contains` are case-insensitive in KQL, so compare lower-cased values.
+    filtered = []
+    for row in rows:
+        level = str(row[idx_level] or "").lower() if len(row) > idx_level else ""
+        message = str(row[idx_log] or "").lower() if len(row) > idx_log else ""
+        if severity == "warn" and not (level == "warning" or "warn" in message):
+            continue
+        if severity == "error" and not (level == "error" or "error" in message or "exception" in message):
+            continue
+        if needle is not None and needle not in message:
+            continue
+        filtered.append(row)
+    return filtered
+
+
+def _mine_patterns(cols: list[dict[str, Any]], rows: list[list[Any]], limit: int) -> list[LogPattern]:
+    """Collapse raw ``TimeGenerated, Log_s`` rows into their most frequent templates."""
+    idx_time = next((i for i, c in enumerate(cols) if c["ColumnName"] == "TimeGenerated"), 0)
+    idx_log = next((i for i, c in enumerate(cols) if c["ColumnName"] == "Log_s"), 1)
+
+    miner = LogTemplateMiner()
+    add = miner.add
+    for row in rows:
+        message = row[idx_log]
+        if message is not None:
+            add(str(message), str(row[idx_time] or ""))
+
+    # Timestamps are only formatted for the clusters we return, not per line.
+    return [
+        LogPattern(
+            template=cluster.template,
+            count=cluster.count,
+            first_seen=_format_timestamp(cluster.first_seen),
+            last_seen=_format_timestamp(cluster.last_seen),
+            samples=cluster.samples,
+        )
+        for cluster in miner.top(limit)
+    ]
+
+
+def _is_truncated(result: dict[str, Any], row_count: int, row_limit: int) -> bool:
+    """True when a slice returned more rows than allowed or Log Analytics cut the result short."""
+    if row_count > row_limit:
+        return True
+    error = result.get("error") or result.get("Error")
+    return bool(error) and "PartialError" in json.dumps(error)
+
+
+@router.get("/cache-stats", dependencies=[Depends(get_azure_credential)])
+async def get_log_cache_stats() -> dict[str, Any]:
+    """Hit/miss/eviction counters of the log query cache (in-process and shared tiers)."""
+    stats: TieredCacheStats = _log_cache.stats()
+    return {**asdict(stats), "local_hit_ratio": round(stats.local.hit_ratio, 4)}
+
+
 @router.get("/{subscription_id}/{resource_group}/{app_name}", response_model=LogsResponse)
 async def get_container_app_logs(
     subscription_id: str,
@@ -59,137 +359,103 @@ async def get_container_app_logs(
     severity: Literal["all", "warn", "error"] = Query(default="all"),
     search: Optional[str] = Query(default=None),
     limit: int = Query(default=50, ge=1, le=500),
+    view: Literal["entries", "patterns"] = Query(
+        default="entries",
+        description="'patterns' returns up to `limit` mined message templates instead of raw entries",
+    ),
     credential: TokenCredential = Depends(get_azure_credential),
+    settings: Settings = Depends(get_settings),
 ):
     """
     Fetch logs for an Azure Container App from Log Analytics Workspace via ARM Proxy.
     This routes the query through management.azure.com so the Frontend's ARM token works natively without Audience mismatch!
     Requires Log Analytics Workspace to be linked to the Container App Environment.
+
+    In ``patterns`` view the matching lines in the window are mined into message templates
+    (with counts, first/last timestamps and samples) and ``entries`` is left empty.
+
+    Results are cached briefly. When an unfiltered query already returned every row in
+    the window, later severity/search/limit variations are answered from it locally.
     """
     try:
-        # Get token from credential (which holds the Frontend's ARM token)
-        token = credential.get_token("https://management.azure.com/.default").token
-        
+        headers = _query_headers(credential)
+        scope = credential_cache_scope(credential)
+
         # ── Build KQL query ──────────────────────────────────────────────────
-        base_filter = f"ContainerAppName_s =~ '{app_name}'"
-
-        if severity == "warn":
-            base_filter += " and (Level_s =~ 'Warning' or Log_s contains 'WARN')"
-        elif severity == "error":
-            base_filter += " and (Level_s =~ 'Error' or Log_s contains 'ERROR' or Log_s contains 'Exception')"
-
-        if search:
-            safe_search = search.replace("'", "\\'")
-            base_filter += f" and Log_s contains '{safe_search}'"
-
-        kql = f"""
-ContainerAppConsoleLogs_CL
-| where {base_filter}
-| project TimeGenerated, Level_s, ContainerName_s, Log_s
-| order by TimeGenerated desc
-| limit {limit + 1}
-"""
-
-        count_kql = f"""
-ContainerAppConsoleLogs_CL
-| where ContainerAppName_s =~ '{app_name}'
-| summarize
-    total    = count(),
-    errors   = countif(Level_s =~ 'Error' or Log_s contains 'ERROR'),
-    warnings = countif(Level_s =~ 'Warning' or Log_s contains 'WARN')
-"""
-
-        # We assume the LA workspace naturally uses the "-logs" suffix.
-        workspace_name = f"{resource_group}-logs"
-        url = (
-            f"https://management.azure.com/subscriptions/{subscription_id}/resourcegroups/{resource_group}"
-            f"/providers/Microsoft.OperationalInsights/workspaces/{workspace_name}/api/query?api-version=2020-08-01"
-        )
-        
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-
-        def _execute_query(q: str):
-            import urllib.request
-            import urllib.error
-            import json
-            req = urllib.request.Request(url, headers=headers, data=json.dumps({"query": q}).encode('utf-8'))
-            try:
-                with urllib.request.urlopen(req) as response:
-                    return json.loads(response.read().decode())
-            except urllib.error.HTTPError as e:
-                err_text = e.read().decode()
-                # If table doesn't exist yet (e.g. brand new workspace/app), it throws SyntaxError
-                if e.code == 400 and "SyntaxError" in err_text:
-                    return {"Tables": []}
-                # If workspace genuinely not found, 404
-                if e.code == 404:
-                    raise HTTPException(
-                        status_code=404,
-                        detail=(
-                            "Log Analytics Workspace not found. "
-                            "Please link a workspace to your Container App Environment in the Azure Portal: "
-                            "Container Apps Environment → Monitoring → Log Analytics."
-                        )
-                    )
-                raise Exception(f"Azure Monitor error [{e.code}]: {err_text}")
-
-        # Run queries concurrently
-        logs_result, counts_result = await asyncio.gather(
-            asyncio.to_thread(_execute_query, kql),
-            asyncio.to_thread(_execute_query, count_kql)
+        kql = (
+            _apply_entry_filters(
+                KqlQuery(hours=hours).where_equals("ContainerAppName_s", app_name), severity, search
+            )
+            .pipe("project TimeGenerated, Level_s, ContainerName_s, Log_s")
+            .pipe(f"top {limit + 1} by TimeGenerated desc")
         )
 
+        count_kql = KqlQuery(hours=hours).where_equals("ContainerAppName_s", app_name).pipe(_COUNTS_SUMMARIZE)
+
+        url = _workspace_query_url(subscription_id, resource_group)
+        bucket = _time_bucket(settings)
+
+        if view == "patterns":
+            row_limit = settings.log_pattern_row_limit
+            pattern_kql = (
+                _apply_entry_filters(
+                    KqlQuery(hours=hours).where_equals("ContainerAppName_s", app_name), severity, search
+                )
+                .pipe("project TimeGenerated, Log_s")
+                .pipe(f"take {row_limit + 1}")
+            )
+            (pattern_cols, pattern_rows), (count_cols, count_rows) = await asyncio.gather(
+                _cached_query(scope, url, headers, pattern_kql, bucket),
+                _cached_query(scope, url, headers, count_kql, bucket),
+            )
+            patterns = await get_executor("logs").run("cpu", "logs.mine_patterns", _mine_patterns, pattern_cols, pattern_rows[:row_limit], limit)
+            total = warn_count = error_count = 0
+            if count_cols and count_rows:
+                total, error_count, warn_count = _parse_counts(count_cols, count_rows[0])
+            return LogsResponse(
+                app_name=app_name,
+                resource_group=resource_group,
+                total=total,
+                info_count=max(0, total - warn_count - error_count),
+                warn_count=warn_count,
+                error_count=error_count,
+                entries=[],
+                has_more=len(pattern_rows) > row_limit,
+                patterns=patterns,
+            )
+
+        # A complete, unfiltered result for this app and window (if one is cached)
+        # answers any filtered or smaller query without going upstream.
+        superset_key = _cache_key("superset", scope, url, app_name.lower(), hours, bucket)
+        superset = await _log_cache.aget(superset_key)
+
+        if superset is not None:
+            cols, all_rows = superset
+            logs_table = (cols, _filter_rows_locally(cols, all_rows, severity, search)[:limit + 1])
+            counts_table = await _cached_query(scope, url, headers, count_kql, bucket)
+        else:
+            # Run queries concurrently
+            logs_table, counts_table = await asyncio.gather(
+                _cached_query(scope, url, headers, kql, bucket),
+                _cached_query(scope, url, headers, count_kql, bucket),
+            )
+            cols, all_rows = logs_table
+            if severity == "all" and not search and len(all_rows) <= limit:
+                await _log_cache.aset(superset_key, logs_table)
+
         # ── Parse counts ─────────────────────────────────────────────────────
         total = warn_count = error_count = 0
-        if counts_result and counts_result.get("Tables") and counts_result["Tables"][0].get("Rows"):
-            row = counts_result["Tables"][0]["Rows"][0]
-            if result_cols := counts_result["Tables"][0].get("Columns"):
-                # Find indexes dynamically
-                idx_total = next((i for i, c in enumerate(result_cols) if c["ColumnName"] == "total"), 0)
-                idx_errs = next((i for i, c in enumerate(result_cols) if c["ColumnName"] == "errors"), 1)
-                idx_warns = next((i for i, c in enumerate(result_cols) if c["ColumnName"] == "warnings"), 2)
-                
-                total = int(row[idx_total] if len(row) > idx_total and row[idx_total] is not None else 0)
-                error_count = int(row[idx_errs] if len(row) > idx_errs and row[idx_errs] is not None else 0)
-                warn_count = int(row[idx_warns] if len(row) > idx_warns and row[idx_warns] is not None else 0)
+        result_cols, count_rows = counts_table
+        if result_cols and count_rows:
+            total, error_count, warn_count = _parse_counts(result_cols, count_rows[0])
 
         info_count = max(0, total - warn_count - error_count)
 
         # ── Parse log entries ─────────────────────────────────────────────────
-        entries: list[LogEntry] = []
-        has_more = False
-        
-        if logs_result and logs_result.get("Tables") and logs_result["Tables"]:
-            raw_rows = logs_result["Tables"][0].get("Rows", [])
-            cols = logs_result["Tables"][0].get("Columns", [])
-            
-            idx_time = next((i for i, c in enumerate(cols) if c["ColumnName"] == "TimeGenerated"), 0)
-            idx_level = next((i for i, c in enumerate(cols) if c["ColumnName"] == "Level_s"), 1)
-            idx_container = next((i for i, c in enumerate(cols) if c["ColumnName"] == "ContainerName_s"), 2)
-            idx_log = next((i for i, c in enumerate(cols) if c["ColumnName"] == "Log_s"), 3)
-
-            has_more = len(raw_rows) > limit
-            for row in raw_rows[:limit]:
-                ts = str(row[idx_time]) if len(row) > idx_time and row[idx_time] is not None else ""
-                level_col = str(row[idx_level]) if len(row) > idx_level and row[idx_level] is not None else ""
-                container = str(row[idx_container]) if len(row) > idx_container and row[idx_container] is not None else app_name
-                message = str(row[idx_log]) if len(row) > idx_log and row[idx_log] is not None else ""
-
-                try:
-                    dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-                    ts = dt.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-                except Exception:
-                    pass
-
-                entries.append(LogEntry(
-                    timestamp=ts,
-                    level=_classify_level(message, level_col),
-                    container=container,
-                    message=message,
-                ))
+        cols, raw_rows = logs_table
+        has_more = len(raw_rows) > limit
+        with profile_phase("parse"):
+            entries = _parse_entries(cols, raw_rows[:limit], app_name)
 
         return LogsResponse(
             app_name=app_name,
@@ -207,3 +473,217 @@ ContainerAppConsoleLogs_CL
     except Exception as e:
         logger.exception("Unexpected error fetching logs for app '%s'", app_name)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{subscription_id}/{resource_group}", response_model=MultiAppLogsResponse)
+async def get_multi_app_logs(
+    subscription_id: str,
+    resource_group: str,
+    apps: list[str] = Query(..., min_length=1, max_length=20, description="Container app names, e.g. an environment's frontend and backend"),
+    hours: int = Query(default=1, ge=1, le=168, description="Time window in hours (1-168)"),
+    severity: Literal["all", "warn", "error"] = Query(default="all"),
+    search: Optional[str] = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=500),
+    credential: TokenCredential = Depends(get_azure_credential),
+    settings: Settings = Depends(get_settings),
+):
+    """
+    Fetch merged logs for several Container Apps (e.g. an environment's frontend and backend)
+    with a single Log Analytics query. Entries are merged newest-first on the server and
+    per-app counts come from one ``summarize ... by ContainerAppName_s`` in the same query.
+    """
+    app_names = list(dict.fromkeys(apps))
+    try:
+        headers = _query_headers(credential)
+        scope = credential_cache_scope(credential)
+
+        # One round trip: counts and entries are unioned into a single table and told
+        # apart by the RowKind column.
+        kql = KqlQuery(hours=hours).where_in("ContainerAppName_s", app_names).materialize("base")
+        entries_kql = (
+            _apply_entry_filters(kql.branch(), severity, search)
+            .pipe(f"top {limit + 1} by TimeGenerated desc")
+            .pipe("project TimeGenerated, Level_s, ContainerName_s, Log_s, ContainerAppName_s")
+            .pipe("extend RowKind = 'entry'")
+        )
+        kql.pipe(f"{_COUNTS_SUMMARIZE}\n    by ContainerAppName_s").pipe("extend RowKind = 'counts'").union(entries_kql)
+
+        url = _workspace_query_url(subscription_id, resource_group)
+        cols, rows = await _cached_query(scope, url, headers, kql, _time_bucket(settings))
+        idx_kind = next((i for i, c in enumerate(cols) if c["ColumnName"] == "RowKind"), None)
+        idx_app = next((i for i, c in enumerate(cols) if c["ColumnName"] == "ContainerAppName_s"), None)
+        idx_time = next((i for i, c in enumerate(cols) if c["ColumnName"] == "TimeGenerated"), None)
+
+        # Canonical casing comes from the request, matching is case-insensitive like `in~`.
+        canonical = {name.lower(): name for name in app_names}
+        counts: dict[str, tuple[int, int, int]] = {}
+        entry_rows: list[list[Any]] = []
+        if idx_kind is not None and idx_app is not None:
+            for row in rows:
+                raw_app = str(row[idx_app] or "")
+                app = canonical.get(raw_app.lower(), raw_app)
+                if row[idx_kind] == "counts":
+                    total, errors, warnings = _parse_counts(cols, row)
+                    prev = counts.get(app, (0, 0, 0))
+                    counts[app] = (prev[0] + total, prev[1] + errors, prev[2] + warnings)
+                else:
+                    entry_rows.append(row)
+
+        # Union output order is not guaranteed — merge by timestamp on our side.
+        if idx_time is not None:
+            entry_rows.sort(key=lambda r: str(r[idx_time] or ""), reverse=True)
+        has_more = len(entry_rows) > limit
+
+        page = entry_rows[:limit]
+        entries: list[AppLogEntry] = []
+        for row, entry in zip(page, _parse_entries(cols, page, "")):
+            raw_app = str(row[idx_app] or "")
+            app = canonical.get(raw_app.lower(), raw_app)
+            entries.append(AppLogEntry(
+                app_name=app,
+                timestamp=entry.timestamp,
+                level=entry.level,
+                container=entry.container or app,
+                message=entry.message,
+            ))
+
+        per_app_counts = []
+        for name in app_names:
+            total, errors, warnings = counts.get(name, (0, 0, 0))
+            per_app_counts.append(AppLogCounts(
+                app_name=name,
+                total=total,
+                info_count=max(0, total - warnings - errors),
+                warn_count=warnings,
+                error_count=errors,
+            ))
+
+        total = sum(c.total for c in per_app_counts)
+        warn_count = sum(c.warn_count for c in per_app_counts)
+        error_count = sum(c.error_count for c in per_app_counts)
+        return MultiAppLogsResponse(
+            resource_group=resource_group,
+            app_names=app_names,
+            total=total,
+            info_count=max(0, total - warn_count - error_count),
+            warn_count=warn_count,
+            error_count=error_count,
+            per_app_counts=per_app_counts,
+            entries=entries,
+            has_more=has_more,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unexpected error fetching merged logs for apps %s", app_names)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ── Bulk export ──────────────────────────────────────────────────────────────
+
+def _slice_window(start: datetime, end: datetime, width: timedelta) -> list[tuple[datetime, datetime]]:
+    """Split ``[start, end)`` into consecutive slices of at most ``width``."""
+    slices = []
+    cursor = start
+    while cursor < end:
+        slice_end = min(cursor + width, end)
+        slices.append((cursor, slice_end))
+        cursor = slice_end
+    return slices
+
+
+def _export_kql(app_name: str, start: datetime, end: datetime, row_limit: int) -> KqlQuery:
+    return (
+        KqlQuery(start=start, end=end)
+        .where_equals("ContainerAppName_s", app_name)
+        .pipe("project TimeGenerated, Level_s, ContainerName_s, Log_s")
+        .pipe("order by TimeGenerated asc")
+        .pipe(f"take {row_limit + 1}")
+    )
+
+
+async def _load_slice(
+    url: str,
+    headers: dict[str, str],
+    app_name: str,
+    window: tuple[datetime, datetime],
+    row_limit: int,
+    fmt: ExportFormat,
+) -> str | Split[tuple[datetime, datetime]]:
+    """
+    Fetch and encode one time slice. A slice Log Analytics truncates is split in half
+    instead; the halves are then streamed one after the other like any other slice.
+    """
+    start, end = window
+    query = _export_kql(app_name, start, end, row_limit)
+    result = await get_executor("logs").run("log_analytics", "query", _execute_query, url, headers, query)
+    cols, rows = _first_table(result)
+
+    if _is_truncated(result, len(rows), row_limit):
+        if end - start > _MIN_EXPORT_SLICE:
+            mid = start + (end - start) / 2
+            logger.debug("Export slice %s..%s truncated, splitting at %s", start, end, mid)
+            return Split(((start, mid), (mid, end)))
+        logger.warning(
+            "Export slice %s..%s for app '%s' still exceeds %d rows; emitting a truncated slice",
+            start, end, app_name, row_limit,
+        )
+        rows = rows[:row_limit]
+
+    return _encode_entries(_parse_entries(cols, rows, app_name), fmt)
+
+
+def _encode_entries(entries: list[LogEntry], fmt: str) -> str:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for entry in entries:
+            writer.writerow([entry.timestamp, entry.level, entry.container, entry.message])
+        return buffer.getvalue()
+    return "".join(entry.model_dump_json() + "\n" for entry in entries)
+
+
+@router.get("/{subscription_id}/{resource_group}/{app_name}/export")
+async def export_container_app_logs(
+    subscription_id: str,
+    resource_group: str,
+    app_name: str,
+    hours: int = Query(default=24, ge=1, le=720, description="Time window in hours (1-720)"),
+    format: Literal["ndjson", "csv"] = Query(default="ndjson"),
+    credential: TokenCredential = Depends(get_azure_credential),
+    settings: Settings = Depends(get_settings),
+):
+    """
+    Stream every log line of a Container App within the time window as NDJSON or CSV.
+    The window is split into time slices that are queried concurrently and emitted
+    oldest-first; slices that hit the Log Analytics result-size limit are split further.
+    If a slice fails after streaming has begun, the body ends with an error record
+    (``{"error": ...}`` in NDJSON, a ``#error`` row in CSV).
+    """
+    try:
+        headers = _query_headers(credential)
+    except Exception as e:
+        logger.exception("Unable to acquire token for log export of app '%s'", app_name)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(hours=hours)
+    slices = _slice_window(start, end, timedelta(minutes=settings.log_export_slice_minutes))
+    url = _workspace_query_url(subscription_id, resource_group)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"{app_name}-{start:%Y%m%dT%H%M}-{end:%Y%m%dT%H%M}.{format}"
+    row_limit = settings.log_export_slice_row_limit
+    return StreamingResponse(
+        stream_in_order(
+            slices,
+            lambda window: _load_slice(url, headers, app_name, window, row_limit, format),
+            settings.log_export_concurrency,
+            format,
+            header="timestamp,level,container,message\r\n" if format == "csv" else "",
+            name=f"Log export of app '{app_name}'",
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,115 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from azure.core.credentials import TokenCredential
+
+from api.dependencies import get_status_history_repository
+from api.v1.endpoints.azure_discovery import discover_apps
+from core import Settings, get_azure_credential, get_settings
+from repositories import StatusHistoryRepository
+from services import status_history_recorder
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/status-history", tags=["Status History"])
+
+
+class StatusHistoryPoint(BaseModel):
+    time: datetime
+    samples: int
+    up_samples: int
+    uptime: float
+    status: Optional[str] = None
+
+
+class StatusHistoryResponse(BaseModel):
+    subscription_id: str
+    resource_group: str
+    app_name: str
+    resolution: Literal["raw", "hour", "day"]
+    start: datetime
+    end: datetime
+    samples: int
+    uptime: Optional[float] = None
+    points: list[StatusHistoryPoint]
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+async def _can_see_app(
+    credential: TokenCredential,
+    settings: Settings,
+    subscription_id: str,
+    resource_group: str,
+    app_name: str,
+) -> bool:
+    """Whether the app is in the caller's (cached) container app inventory."""
+    wanted = (subscription_id.lower(), resource_group.lower(), app_name.lower())
+    return any(
+        (app["subscriptionId"].lower(), app["resourceGroup"].lower(), app["name"].lower()) == wanted
+        for app in await discover_apps(credential, settings)
+    )
+
+
+@router.get("/{subscription_id}/{resource_group}/{app_name}", response_model=StatusHistoryResponse)
+async def get_status_history(
+    subscription_id: str,
+    resource_group: str,
+    app_name: str,
+    start: Optional[datetime] = Query(default=None, description="Defaults to 24 hours before end"),
+    end: Optional[datetime] = Query(default=None, description="Defaults to now"),
+    repository: StatusHistoryRepository = Depends(get_status_history_repository),
+    credential: TokenCredential = Depends(get_azure_credential),
+    settings: Settings = Depends(get_settings),
+):
+    """
+    Observed status of one container app over ``[start, end)``.
+
+    Spans up to a day return individual observations, up to 31 days hourly buckets,
+    and anything longer daily buckets; each point carries its uptime ratio. Only apps
+    the caller can see in Azure are served.
+    """
+    end = _utc(end) if end else datetime.now(timezone.utc)
+    start = _utc(start) if start else end - timedelta(hours=24)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    try:
+        if not await _can_see_app(credential, settings, subscription_id, resource_group, app_name):
+            raise HTTPException(status_code=404, detail="Container app not found.")
+        history = await status_history_recorder.read(
+            repository, subscription_id, resource_group, app_name, start, end
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Failed to read status history for '%s/%s/%s'", subscription_id, resource_group, app_name)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    samples = sum(point.samples for point in history.points)
+    up_samples = sum(point.up_samples for point in history.points)
+    return StatusHistoryResponse(
+        subscription_id=subscription_id,
+        resource_group=resource_group,
+        app_name=app_name,
+        resolution=history.resolution,
+        start=start,
+        end=end,
+        samples=samples,
+        uptime=up_samples / samples if samples else None,
+        points=[
+            StatusHistoryPoint(
+                time=point.time,
+                samples=point.samples,
+                up_samples=point.up_samples,
+                uptime=point.up_samples / point.samples if point.samples else 0.0,
+                status=point.status,
+            )
+            for point in history.points
+        ],
+    )
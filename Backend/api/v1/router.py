@@ -1,9 +1,12 @@
 from fastapi import APIRouter
 
-from api.v1.endpoints import azure_discovery, cost, logs
+from api.v1.endpoints import app_metrics, azure_discovery, cost, environments, logs, status_history
 
 api_router = APIRouter()
+api_router.include_router(app_metrics.router)
 api_router.include_router(azure_discovery.router)
 api_router.include_router(cost.router)
+api_router.include_router(environments.router)
 api_router.include_router(logs.router)
+api_router.include_router(status_history.router)
 
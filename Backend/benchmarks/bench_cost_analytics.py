@@ -0,0 +1,87 @@
+"""
+Server-side cost analytics over 1,000 resources x 365 days.
+
+"before" replays the per-metric passes the Analytics page used to make over
+``daily_costs`` (averages, weekly rollups) plus the per-app and rolling-average
+passes the new response adds, in plain Python over the plan's cost rows. "after"
+is the endpoint's path: align the plan's resource x day matrix to the window
+(``CostMatrix.from_grouped``) and run the vectorized analysis.
+
+Run from the Backend directory:  python -m benchmarks.bench_cost_analytics
+"""
+
+import datetime
+import random
+import time
+
+from services.cost_analytics import CostMatrix, analyze
+from services.cost_rows import GroupedCosts
+
+RESOURCES = 1000
+DAYS = 365
+ITERATIONS = 5
+
+
+def make_costs() -> tuple[GroupedCosts, datetime.date, datetime.date]:
+    rng = random.Random(42)
+    end = datetime.date(2026, 6, 30)
+    start = end - datetime.timedelta(days=DAYS - 1)
+    cells = []
+    for r in range(RESOURCES):
+        base = rng.uniform(0.5, 50.0)
+        for i in range(DAYS):
+            cost = base * rng.uniform(0.8, 1.2)
+            if rng.random() < 0.001:
+                cost *= 10
+            cells.append(((start + datetime.timedelta(days=i)).isoformat(), f"rg-{r % 20:02d}", f"container-app-{r:04d}", cost))
+    return GroupedCosts.from_cells("USD", cells), start, end
+
+
+def python_passes(rows: list[tuple[str, str, str, float]]) -> tuple[float, list[float], list[float], list[tuple[str, float]]]:
+    daily: dict[str, float] = {}
+    per_app: dict[str, float] = {}
+    for date, _, name, cost in rows:
+        daily[date] = daily.get(date, 0.0) + cost
+        per_app[name] = per_app.get(name, 0.0) + cost
+    series = [daily[d] for d in sorted(daily)]
+    average = sum(series) / len(series)
+    weekly = [sum(series[i:i + 7]) for i in range(0, len(series), 7)]
+    rolling = [sum(series[max(0, i - 6):i + 1]) / (i + 1 - max(0, i - 6)) for i in range(len(series))]
+    total = sum(per_app.values())
+    share = sorted(((n, c / total) for n, c in per_app.items()), key=lambda x: x[1], reverse=True)
+    return average, weekly, rolling, share
+
+
+def vectorized(costs: GroupedCosts, start: datetime.date, end: datetime.date) -> None:
+    analyze(CostMatrix.from_grouped(costs, start, end))
+
+
+def measure(label: str, fn, *args) -> None:
+    samples = []
+    for _ in range(ITERATIONS):
+        started = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - started)
+    print(f"{label:<22} best={min(samples) * 1e3:8.1f}ms  mean={sum(samples) / len(samples) * 1e3:8.1f}ms")
+
+
+def main() -> None:
+    costs, start, end = make_costs()
+    rows = sorted(costs.cells())
+    print(f"{RESOURCES} resources x {DAYS} days = {len(rows):,} cells, {ITERATIONS} runs")
+
+    measure("python passes", python_passes, rows)
+    measure("matrix build", CostMatrix.from_grouped, costs, start, end)
+    matrix = CostMatrix.from_grouped(costs, start, end)
+    measure("analyze (numpy)", analyze, matrix)
+    measure("build + analyze", vectorized, costs, start, end)
+
+    analytics = analyze(matrix)
+    print(
+        f"forecast {analytics.forecast.month}: {analytics.forecast.projected_total:,.2f}, "
+        f"{int(analytics.anomaly.sum())} anomalous days, {len(analytics.resource_anomalies.day)} resource anomalies"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Cache-hit cost of a 90-day, 500-resource resource-group cost response.
+
+"before" replays what a hit used to cost: a deep ``model_copy`` out of the cache,
+then FastAPI's response_model validation and JSON serialization.
+"after" is the current path: an LRU lookup returning immutable pre-encoded bytes.
+
+Run from the Backend directory:  python -m benchmarks.bench_cost_cache
+"""
+
+import datetime
+import json
+import statistics
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+from api.v1.endpoints.cost import AppCost, CostResponse, DailyCost, _EncodedResponse
+from core import LRUCache
+
+DAYS = 90
+RESOURCES = 500
+ITERATIONS = 2000
+
+
+def make_response() -> CostResponse:
+    start = datetime.date(2026, 1, 1)
+    return CostResponse(
+        currency="USD",
+        total_cost=123456.78,
+        scope="/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench",
+        last_updated=(start + datetime.timedelta(days=DAYS - 1)).isoformat(),
+        daily_costs=[
+            DailyCost(date=(start + datetime.timedelta(days=i)).isoformat(), cost=100.0 + i)
+            for i in range(DAYS)
+        ],
+        per_app_costs=[AppCost(app_name=f"container-app-{i:04d}", cost=float(i) * 1.37) for i in range(RESOURCES)],
+    )
+
+
+def hit_before(cache: dict, key: str) -> bytes:
+    cached = cache[key].model_copy(deep=True)
+    validated = CostResponse.model_validate(cached.model_dump())
+    content = jsonable_encoder(validated.model_dump(mode="json"))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def hit_after(cache: LRUCache, key: str) -> bytes:
+    encoded = cache.get(key)
+    return Response(content=encoded.body, media_type="application/json", headers={"ETag": encoded.etag}).body
+
+
+def measure(label: str, fn, *args) -> None:
+    for _ in range(50):
+        fn(*args)
+
+    samples = []
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+
+    # Peak bytes allocated while serving a single hit.
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    samples.sort()
+    print(
+        f"{label:<7} p50={statistics.median(samples) * 1e6:8.1f}us "
+        f"p99={samples[int(len(samples) * 0.99)] * 1e6:8.1f}us "
+        f"alloc_peak={peak / 1024:8.1f}KiB"
+    )
+
+
+def main() -> None:
+    response = make_response()
+    key = "2026-01-01::resource-group:sub:rg-bench:90"
+
+    old_cache = {key: response.model_copy(deep=True)}
+    new_cache = LRUCache(max_bytes=64 * 1024 * 1024, ttl_seconds=3600)
+    encoded = _EncodedResponse.from_model(response)
+    new_cache.set(key, encoded, size=len(encoded.body))
+
+    assert json.loads(hit_before(old_cache, key)) == json.loads(hit_after(new_cache, key))
+    print(f"{DAYS} days x {RESOURCES} resources, body={len(encoded.body) / 1024:.1f}KiB, {ITERATIONS} hits")
+    measure("before", hit_before, old_cache, key)
+    measure("after", hit_after, new_cache, key)
+
+
+if __name__ == "__main__":
+    main()
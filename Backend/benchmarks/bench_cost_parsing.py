@@ -0,0 +1,100 @@
+"""
+Parsing throughput of ResourceGroupName/ResourceId-grouped usage rows.
+
+"before" is the per-row parser the plan used to go through: date slicing, resource
+ID splitting and ``dict.get`` accumulation on every row, with daily and per-resource
+totals derived in further passes. "after" is ``parse_grouped_pages``, which returns
+daily totals, per-resource totals and the resource x day matrix from one pass.
+
+Run from the Backend directory:  python -m benchmarks.bench_cost_parsing [rows]
+"""
+
+import datetime
+import random
+import sys
+import time
+
+from services.cost_rows import parse_grouped_pages
+
+COLUMNS = ["PreTaxCost", "UsageDate", "ResourceGroupName", "ResourceId", "Currency"]
+DAYS = 90
+ITERATIONS = 5
+
+
+def make_pages(n: int) -> list[tuple[list[str], list[list]]]:
+    rng = random.Random(42)
+    start = datetime.date(2026, 1, 1)
+    dates = [int((start + datetime.timedelta(days=i)).strftime("%Y%m%d")) for i in range(DAYS)]
+    resources = [
+        (f"rg-{i % 20:02d}", f"/subscriptions/0000/resourceGroups/RG-{i % 20:02d}/providers/"
+                             f"Microsoft.App/containerApps/container-app-{i:04d}")
+        for i in range(max(n // DAYS, 1))
+    ]
+    rows = [
+        [rng.uniform(0.0, 40.0), dates[i % DAYS], *resources[(i // DAYS) % len(resources)], "USD"]
+        for i in range(n)
+    ]
+    # Cost Management pages hold 5,000 rows.
+    return [(COLUMNS, rows[i:i + 5000]) for i in range(0, n, 5000)]
+
+
+def parse_before(pages):
+    currency = "USD"
+    costs: dict[tuple[str, str, str], float] = {}
+    for columns, rows in pages:
+        index = {name.lower(): i for i, name in enumerate(columns)}
+        date_i = index.get("usagedate", 1)
+        group_i = index.get("resourcegroupname", index.get("resourcegroup"))
+        resource_i = index.get("resourceid")
+        currency_i = index.get("currency")
+        for row in rows:
+            date_str = str(row[date_i])
+            resource_id = str(row[resource_i] or "")
+            key = (
+                f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}",
+                str(row[group_i] or "").lower(),
+                resource_id.split("/")[-1] if "/" in resource_id else resource_id,
+            )
+            costs[key] = costs.get(key, 0.0) + float(row[0])
+            if row[currency_i]:
+                currency = str(row[currency_i])
+    daily: dict[str, float] = {}
+    per_resource: dict[tuple[str, str], float] = {}
+    for (date_str, group, name), cost in costs.items():
+        daily[date_str] = daily.get(date_str, 0.0) + cost
+        per_resource[(group, name)] = per_resource.get((group, name), 0.0) + cost
+    return currency, costs, daily, per_resource
+
+
+def parse_after(pages):
+    grouped = parse_grouped_pages(pages)
+    return grouped, grouped.daily_totals, grouped.resource_totals
+
+
+def measure(label: str, fn, pages) -> None:
+    samples = []
+    for _ in range(ITERATIONS):
+        started = time.perf_counter()
+        fn(pages)
+        samples.append(time.perf_counter() - started)
+    best = min(samples)
+    rows = sum(len(r) for _, r in pages)
+    print(f"{label:<7} best={best * 1e3:8.1f}ms  ({rows / best:,.0f} rows/s)")
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    pages = make_pages(n)
+
+    _, _, daily, per_resource = parse_before(pages)
+    grouped, daily_totals, resource_totals = parse_after(pages)
+    assert len(grouped.resources) == len(per_resource)
+    assert abs(sum(daily.values()) - float(daily_totals.sum())) < 1e-6 * max(sum(daily.values()), 1.0)
+
+    print(f"{n:,} rows, {len(grouped.resources)} resources x {len(grouped.dates)} days")
+    measure("before", parse_before, pages)
+    measure("after", parse_after, pages)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Environment lookups under concurrent load: the old sync repository on the default
+thread pool (what sync ``def`` handlers do) versus the async repository on the event loop.
+
+Each simulated request fetches one environment by id and lists a page of 50. Latency
+is measured the same way for both: from when the request is admitted (the concurrency
+limit) until it completes, so the sync side includes the wait for a pool thread.
+Point DATABASE_URL at a scratch database; the ``environment_apps`` table is created
+if missing and seeded with benchmark rows. A local SQLite stand-in works too
+(``pip install aiosqlite``):
+
+    DATABASE_URL=sqlite+aiosqlite:///bench.sqlite3 python -m benchmarks.bench_db_concurrency [requests] [concurrency]
+
+On SQLite the async side is the slower one: aiosqlite funnels every statement through a
+per-connection thread, so it measures that hop rather than the event loop. Compare the
+two against the deployment's PostgreSQL to judge the async repository.
+
+Run from the Backend directory.
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from db import Base, SessionLocal, engine
+from db.models import EnvironmentApp
+from repositories import EnvironmentRepository
+
+SEED_ROWS = 500
+# Starlette's default thread pool for sync endpoints.
+THREADPOOL_SIZE = 40
+
+
+def _sync_url() -> str:
+    url = engine.url
+    if url.drivername == "sqlite+aiosqlite":
+        url = url.set(drivername="sqlite")
+    return url.render_as_string(hide_password=False)
+
+
+async def seed() -> list[int]:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[EnvironmentApp.__table__])
+    async with SessionLocal() as session:
+        existing = await session.scalar(select(func.count()).select_from(EnvironmentApp))
+        for i in range(existing or 0, SEED_ROWS):
+            session.add(EnvironmentApp(
+                name=f"bench-env-{i:04d}", resource_group=f"rg-bench-{i % 25:02d}",
+                frontend_app_name=f"bench-fe-{i:04d}", backend_app_name=f"bench-be-{i:04d}", type="DEV",
+            ))
+        await session.commit()
+        return list((await session.scalars(select(EnvironmentApp.id))).all())
+
+
+def sync_request(session_factory, env_id: int) -> None:
+    with session_factory() as session:
+        session.get(EnvironmentApp, env_id)
+        session.scalars(select(EnvironmentApp).order_by(EnvironmentApp.id).limit(50)).all()
+
+
+async def async_request(env_id: int) -> None:
+    async with SessionLocal() as session:
+        repository = EnvironmentRepository(session)
+        await repository.get(env_id)
+        await repository.list(limit=50)
+
+
+async def run(label: str, requests: list[int], concurrency: int, fn) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _one(env_id: int) -> float:
+        async with semaphore:
+            submitted = time.perf_counter()
+            await fn(env_id)
+            return time.perf_counter() - submitted
+
+    started = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(_one(env_id) for env_id in requests)))
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<22} {len(requests) / elapsed:8.0f} req/s  "
+        f"p50={statistics.median(latencies) * 1e3:7.1f}ms  "
+        f"p99={latencies[int(len(latencies) * 0.99)] * 1e3:7.1f}ms"
+    )
+
+
+async def main() -> None:
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    ids = await seed()
+    rng = random.Random(42)
+    requests = [rng.choice(ids) for _ in range(total)]
+    print(f"{total} requests, concurrency {concurrency}, database {engine.url.render_as_string()}")
+
+    sync_engine = create_engine(_sync_url(), pool_pre_ping=True)
+    executor = ThreadPoolExecutor(max_workers=THREADPOOL_SIZE)
+    loop = asyncio.get_running_loop()
+
+    def _session() -> Session:
+        return Session(sync_engine)
+
+    async def _threaded(env_id: int) -> None:
+        await loop.run_in_executor(executor, sync_request, _session, env_id)
+
+    await run("sync + threadpool", requests, concurrency, _threaded)
+    await run("async engine", requests, concurrency, async_request)
+
+    executor.shutdown()
+    sync_engine.dispose()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    if "DATABASE_URL" not in os.environ:
+        print("DATABASE_URL not set; using the configured application database.")
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+"""
+Throughput of the log template miner used by the logs endpoint's ``patterns`` view.
+
+Run from the Backend directory:  python -m benchmarks.bench_log_patterns [lines]
+"""
+
+import random
+import sys
+import time
+import uuid
+
+from services.log_patterns import LogTemplateMiner
+
+TEMPLATES = [
+    'INFO: 10.0.{a}.{b}:5{c} - "GET /api/v1/items/{d} HTTP/1.1" 200 OK',
+    "Request {u} completed in {c}ms for user user{d}",
+    "Connection pool size={a} active={b} idle={c}",
+    "WARNING worker-{a} retrying job {u} attempt {b}",
+    "ERROR Failed to connect to db-host-{a}: timeout after {c}s",
+    "Processed batch {d} with {c} records",
+    "Started server process [{d}]",
+    "Waiting for application startup.",
+    "Application startup complete.",
+]
+
+
+def make_lines(n: int) -> list[tuple[str, str]]:
+    rng = random.Random(42)
+    lines = []
+    for i in range(n):
+        template = rng.choice(TEMPLATES)
+        message = template.format(
+            a=rng.randint(0, 255), b=rng.randint(0, 255), c=rng.randint(0, 999),
+            d=rng.randint(0, 99999), u=uuid.UUID(int=rng.getrandbits(128)),
+        )
+        lines.append((message, f"2026-01-01T{(i // 3600) % 24:02d}:{(i // 60) % 60:02d}:{i % 60:02d}Z"))
+    return lines
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    lines = make_lines(n)
+
+    miner = LogTemplateMiner()
+    start = time.perf_counter()
+    for message, ts in lines:
+        miner.add(message, ts)
+    elapsed = time.perf_counter() - start
+
+    print(f"{n} lines -> {len(miner.clusters)} templates in {elapsed:.3f}s ({n / elapsed:,.0f} lines/s)")
+    for cluster in miner.top(10):
+        print(f"{cluster.count:>8}  {cluster.template}")
+
+
+if __name__ == "__main__":
+    main()
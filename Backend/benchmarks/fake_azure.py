@@ -0,0 +1,453 @@
+"""
+Local stand-in for the Azure APIs the backend calls: ARM (subscriptions, container apps,
+revisions, replicas, lifecycle operations), Cost Management queries, Log Analytics queries
+through the ARM proxy, and Azure Monitor metrics (per resource and ``metrics:getBatch``).
+
+Responses are synthetic but shaped like the real ones, so the SDK clients and parsers run
+unmodified. Latency, pagination, throttling (429 with ``Retry-After``) and payload sizes are
+configurable. Any bearer token is accepted.
+
+The Azure SDK refuses to send bearer tokens over plain HTTP, so the server speaks TLS with a
+throwaway self-signed certificate (made with the ``openssl`` CLI). Point the backend at it with
+the environment printed on startup:
+
+    python -m benchmarks.fake_azure [--port 8443] [--latency-ms 80] [--throttle-rate 0.02]
+
+Run from the Backend directory. ``benchmarks.load_test`` starts one automatically.
+"""
+
+import argparse
+import dataclasses
+import datetime
+import json
+import random
+import re
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional
+
+SUBSCRIPTION_ID_FORMAT = "00000000-0000-0000-0000-{:012d}"
+LOCATION = "westeurope"
+
+
+@dataclass
+class FakeAzureConfig:
+    latency_ms: float = 80.0
+    latency_jitter_ms: float = 40.0
+    # Extra time a start/stop operation takes to complete, spread over its polls.
+    lifecycle_ms: float = 2000.0
+    lifecycle_polls: int = 2
+    throttle_rate: float = 0.0
+    retry_after_seconds: float = 0.5
+    page_size: int = 100
+    cost_page_rows: int = 1000
+    subscriptions: int = 2
+    resource_groups: int = 5
+    apps_per_resource_group: int = 8
+    revisions_per_app: int = 3
+    replicas_per_revision: int = 2
+    cost_days: int = 92
+    log_rows: int = 500
+    log_message_bytes: int = 160
+    seed: int = 42
+
+
+def subscription_ids(config: FakeAzureConfig) -> list[str]:
+    return [SUBSCRIPTION_ID_FORMAT.format(i + 1) for i in range(config.subscriptions)]
+
+
+def resource_group_names(config: FakeAzureConfig) -> list[str]:
+    return [f"rg-bench-{i:02d}" for i in range(config.resource_groups)]
+
+
+def app_names(config: FakeAzureConfig) -> list[str]:
+    return [f"app-{i:03d}" for i in range(config.apps_per_resource_group)]
+
+
+def _app_id(subscription_id: str, resource_group: str, app_name: str) -> str:
+    return f"/subscriptions/{subscription_id}/resourceGroups/{resource_group}/providers/Microsoft.App/containerApps/{app_name}"
+
+
+def _container_app(subscription_id: str, resource_group: str, app_name: str, running: str = "Running") -> dict[str, Any]:
+    latest = f"{app_name}--rev{0:03d}"
+    return {
+        "id": _app_id(subscription_id, resource_group, app_name),
+        "name": app_name,
+        "type": "Microsoft.App/containerApps",
+        "location": "West Europe",
+        "properties": {
+            "provisioningState": "Succeeded",
+            "runningStatus": running,
+            "latestRevisionName": latest,
+            "latestReadyRevisionName": latest,
+            "configuration": {
+                "activeRevisionsMode": "Multiple",
+                "ingress": {
+                    "external": True,
+                    "targetPort": 8080,
+                    "traffic": [{"revisionName": latest, "weight": 80}, {"latestRevision": False, "revisionName": f"{app_name}--rev001", "weight": 20}],
+                },
+            },
+        },
+    }
+
+
+class _State:
+    """Everything the fake serves, derived from the config and a seed."""
+
+    def __init__(self, config: FakeAzureConfig) -> None:
+        self.config = config
+        self.lock = threading.Lock()
+        # app id (lower) -> running status, changed by start/stop operations.
+        self.running: dict[str, str] = {}
+        # operation id -> (completes at, final status, app id)
+        self.operations: dict[str, tuple[float, str, str]] = {}
+        self.requests = 0
+        self.throttled = 0
+        self._operation_ids = iter(range(1, 1 << 62))
+        rng = random.Random(config.seed)
+        words = ["request", "completed", "user", "order", "cache", "timeout", "retry", "db", "worker", "GET", "POST"]
+        self.messages = [
+            " ".join(rng.choice(words) for _ in range(max(1, config.log_message_bytes // 7)))[: config.log_message_bytes]
+            for _ in range(64)
+        ]
+        self.daily_cost = {name: rng.uniform(0.5, 40.0) for name in app_names(config)}
+
+    def new_operation(self, app_id: str, status: str) -> str:
+        with self.lock:
+            operation_id = f"op{next(self._operation_ids)}"
+            self.operations[operation_id] = (time.monotonic() + self.config.lifecycle_ms / 1000.0, status, app_id)
+        return operation_id
+
+
+def _page(items: list[Any], query: dict[str, list[str]], page_size: int, base_url: str) -> dict[str, Any]:
+    skip = int(query.get("$skiptoken", ["0"])[0])
+    body: dict[str, Any] = {"value": items[skip:skip + page_size]}
+    if skip + page_size < len(items):
+        body["nextLink"] = f"{base_url}?api-version=fake&$skiptoken={skip + page_size}"
+    return body
+
+
+def _log_tables(state: _State, query_text: str) -> dict[str, Any]:
+    config = state.config
+    now = datetime.datetime.now(datetime.timezone.utc)
+    match = re.search(r"\b(?:top|take)\s+(\d+)", query_text)
+    limit = min(int(match.group(1)) if match else config.log_rows, config.log_rows)
+    levels = ["Informational", "Informational", "Informational", "Warning", "Error"]
+
+    def entry(i: int, app: str = "") -> list[Any]:
+        return [
+            (now - datetime.timedelta(seconds=i * 7)).isoformat().replace("+00:00", "Z"),
+            levels[i % len(levels)],
+            app or "main",
+            state.messages[i % len(state.messages)],
+        ]
+
+    def columns(*names: str) -> list[dict[str, str]]:
+        return [{"ColumnName": name, "DataType": "String"} for name in names]
+
+    counts = [config.log_rows, config.log_rows // 5, config.log_rows // 5]
+    if "RowKind" in query_text:
+        # App names arrive as bound ``let`` parameters referenced by the ``in~`` predicate.
+        bindings = dict(re.findall(r'let (\w+) = "([^"]*)";', query_text))
+        match = re.search(r"ContainerAppName_s in~ \(([^)]*)\)", query_text)
+        apps = [bindings.get(name.strip(), name.strip()) for name in match.group(1).split(",")] if match else ["app"]
+        rows = [[None, None, None, None, app, *counts, "counts"] for app in apps]
+        rows += [entry(i, apps[i % len(apps)]) + [apps[i % len(apps)], None, None, None, "entry"] for i in range(limit)]
+        cols = columns("TimeGenerated", "Level_s", "ContainerName_s", "Log_s", "ContainerAppName_s", "total", "errors", "warnings", "RowKind")
+    elif "summarize" in query_text:
+        cols, rows = columns("total", "errors", "warnings"), [counts]
+    elif "project TimeGenerated, Log_s" in query_text:
+        cols, rows = columns("TimeGenerated", "Log_s"), [[e[0], e[3]] for e in map(entry, range(limit))]
+    else:
+        cols, rows = columns("TimeGenerated", "Level_s", "ContainerName_s", "Log_s"), [entry(i) for i in range(limit)]
+    return {"Tables": [{"TableName": "PrimaryResult", "Columns": cols, "Rows": rows}]}
+
+
+def _cost_page(state: _State, scope: str, body: dict[str, Any], skip: int, base_url: str) -> dict[str, Any]:
+    config = state.config
+    period = body.get("timePeriod") or {}
+    end = datetime.date.fromisoformat(str(period.get("to", datetime.date.today().isoformat()))[:10])
+    start = datetime.date.fromisoformat(str(period.get("from", (end - datetime.timedelta(days=config.cost_days)).isoformat()))[:10])
+    match = re.match(r"/subscriptions/([^/]+)(?:/resourceGroups/([^/]+))?", scope, re.IGNORECASE)
+    subscription_id, only_group = match.group(1), match.group(2)
+    groups = [only_group] if only_group else resource_group_names(config)
+
+    rows = []
+    day = start
+    while day <= end:
+        usage_date = int(day.strftime("%Y%m%d"))
+        for group in groups:
+            for name in app_names(config):
+                rows.append([round(state.daily_cost[name], 4), usage_date, group.lower(), _app_id(subscription_id, group, name).lower(), "USD"])
+        day += datetime.timedelta(days=1)
+
+    page_rows = rows[skip:skip + config.cost_page_rows]
+    properties: dict[str, Any] = {
+        "columns": [
+            {"name": "PreTaxCost", "type": "Number"},
+            {"name": "UsageDate", "type": "Number"},
+            {"name": "ResourceGroupName", "type": "String"},
+            {"name": "ResourceId", "type": "String"},
+            {"name": "Currency", "type": "String"},
+        ],
+        "rows": page_rows,
+        "nextLink": None,
+    }
+    if skip + len(page_rows) < len(rows):
+        properties["nextLink"] = f"{base_url}?api-version=fake&$skiptoken={skip + len(page_rows)}"
+    return {"id": "fake", "name": "fake", "type": "Microsoft.CostManagement/query", "properties": properties}
+
+
+def _metric_values(resource_id: str, query: dict[str, list[str]]) -> list[dict[str, Any]]:
+    timespan = query.get("timespan", [""])[0] or f"{query.get('starttime', [''])[0]}/{query.get('endtime', [''])[0]}"
+    start_text, _, end_text = timespan.partition("/")
+    start = datetime.datetime.fromisoformat(start_text.replace("Z", "+00:00"))
+    end = datetime.datetime.fromisoformat(end_text.replace("Z", "+00:00"))
+    interval = query.get("interval", ["PT1M"])[0]
+    grain = {"PT1M": 60, "PT5M": 300, "PT15M": 900, "PT30M": 1800, "PT1H": 3600, "PT6H": 21600, "PT12H": 43200, "P1D": 86400}.get(interval, 60)
+    rng = random.Random(resource_id)
+    base = {"CpuUsage": 2.5e8, "WorkingSetBytes": 3.2e8, "Replicas": 2.0}
+    metrics = []
+    for name in query.get("metricnames", [""])[0].split(","):
+        points = []
+        t = start
+        while t < end:
+            value = base.get(name, 1.0) * rng.uniform(0.6, 1.4)
+            points.append({"timeStamp": t.isoformat().replace("+00:00", "Z"), "average": value, "maximum": value * 1.2})
+            t += datetime.timedelta(seconds=grain)
+        metrics.append({
+            "id": f"{resource_id}/providers/Microsoft.Insights/metrics/{name}",
+            "type": "Microsoft.Insights/metrics",
+            "name": {"value": name, "localizedValue": name},
+            "unit": "Count",
+            "timeseries": [{"metadatavalues": [], "data": points}],
+        })
+    return metrics
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeAzureServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send(self, status: int, body: Optional[dict[str, Any]] = None, headers: Optional[dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self) -> dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def _handle(self, method: str) -> None:
+        state = self.server.state
+        config = state.config
+        body = self._read_body() if method == "POST" else {}
+        with state.lock:
+            state.requests += 1
+        time.sleep(max(0.0, config.latency_ms + random.uniform(-1, 1) * config.latency_jitter_ms) / 1000.0)
+        if config.throttle_rate and random.random() < config.throttle_rate:
+            with state.lock:
+                state.throttled += 1
+            self._send(429, {"error": {"code": "TooManyRequests", "message": "Throttled by fake"}},
+                       {"Retry-After": str(config.retry_after_seconds)})
+            return
+
+        parsed = urllib.parse.urlsplit(self.path)
+        # Scopes are templated as "/{scope}/...", which doubles the leading slash.
+        path, query = re.sub("/+", "/", parsed.path), urllib.parse.parse_qs(parsed.query)
+        base_url = f"{self.server.base_url}{path}"
+        try:
+            response = self._route(method, path, query, body, base_url)
+        except (KeyError, ValueError, AttributeError) as e:
+            self._send(400, {"error": {"code": "BadRequest", "message": f"{type(e).__name__}: {e}"}})
+            return
+        if response is None:
+            self._send(404, {"error": {"code": "NotFound", "message": f"No fake for {method} {path}"}})
+        else:
+            self._send(*response)
+
+    def _route(self, method: str, path: str, query: dict[str, list[str]], body: dict[str, Any], base_url: str):
+        state = self.server.state
+        config = state.config
+
+        if method == "GET" and path == "/subscriptions":
+            items = [
+                {"id": f"/subscriptions/{s}", "subscriptionId": s, "displayName": f"Bench {i}", "state": "Enabled"}
+                for i, s in enumerate(subscription_ids(config))
+            ]
+            return 200, _page(items, query, config.page_size, base_url)
+
+        if m := re.fullmatch(r"/operations/(\w+)", path):
+            completes_at, status, app_id = state.operations[m.group(1)]
+            if time.monotonic() < completes_at:
+                delay = config.lifecycle_ms / 1000.0 / max(config.lifecycle_polls, 1)
+                return 202, None, {"Location": f"{self.server.base_url}{path}", "Retry-After": f"{delay:.3f}"}
+            with state.lock:
+                state.running[app_id] = status
+            return 200, {"status": "Succeeded"}
+
+        if m := re.fullmatch(r"/subscriptions/([^/]+)/providers/Microsoft\.App/containerApps", path, re.IGNORECASE):
+            items = [
+                _container_app(m.group(1), group, name, state.running.get(_app_id(m.group(1), group, name).lower(), "Running"))
+                for group in resource_group_names(config) for name in app_names(config)
+            ]
+            return 200, _page(items, query, config.page_size, base_url)
+
+        if m := re.fullmatch(r"/subscriptions/([^/]+)/resourceGroups/([^/]+)/providers/Microsoft\.App/containerApps", path, re.IGNORECASE):
+            items = [_container_app(m.group(1), m.group(2), name) for name in app_names(config)]
+            return 200, _page(items, query, config.page_size, base_url)
+
+        app_pattern = r"/subscriptions/([^/]+)/resourceGroups/([^/]+)/providers/Microsoft\.App/containerApps/([^/]+)"
+        if m := re.fullmatch(app_pattern + r"/(start|stop)", path, re.IGNORECASE):
+            app_id = _app_id(*m.group(1, 2, 3)).lower()
+            operation_id = state.new_operation(app_id, "Running" if m.group(4).lower() == "start" else "Stopped")
+            delay = config.lifecycle_ms / 1000.0 / max(config.lifecycle_polls, 1)
+            return 202, None, {"Location": f"{self.server.base_url}/operations/{operation_id}", "Retry-After": f"{delay:.3f}"}
+
+        if m := re.fullmatch(app_pattern + r"/revisions/([^/]+)/replicas", path, re.IGNORECASE):
+            return 200, {"value": [
+                {"id": f"{path}/{m.group(4)}-{i}", "name": f"{m.group(4)}-{i}", "properties": {
+                    "createdTime": "2026-01-01T00:00:00Z", "runningState": "Running",
+                    "containers": [{"name": "main", "ready": True, "restartCount": i}],
+                }}
+                for i in range(config.replicas_per_revision)
+            ]}
+
+        if m := re.fullmatch(app_pattern + r"/revisions", path, re.IGNORECASE):
+            app_name = m.group(3)
+            return 200, _page([
+                {"id": f"{path}/{app_name}--rev{i:03d}", "name": f"{app_name}--rev{i:03d}", "properties": {
+                    "createdTime": f"2026-01-{i + 1:02d}T00:00:00Z", "active": i < 2, "replicas": config.replicas_per_revision,
+                    "trafficWeight": 80 if i == 0 else 20 if i == 1 else 0, "healthState": "Healthy",
+                    "provisioningState": "Provisioned", "runningState": "Running",
+                }}
+                for i in range(config.revisions_per_app)
+            ], query, config.page_size, base_url)
+
+        if m := re.fullmatch(app_pattern + r"/providers/Microsoft\.Insights/metrics", path, re.IGNORECASE):
+            resource_id = _app_id(*m.group(1, 2, 3))
+            return 200, {"cost": 0, "timespan": query.get("timespan", [""])[0], "interval": query.get("interval", ["PT1M"])[0],
+                         "namespace": "Microsoft.App/containerApps", "resourceregion": LOCATION,
+                         "value": _metric_values(resource_id, query)}
+
+        if m := re.fullmatch(app_pattern, path, re.IGNORECASE):
+            app_id = _app_id(*m.group(1, 2, 3))
+            return 200, _container_app(*m.group(1, 2, 3), state.running.get(app_id.lower(), "Running"))
+
+        if re.fullmatch(r"/subscriptions/[^/]+/metrics:getBatch", path):
+            return 200, {"values": [
+                {"resourceid": resource_id, "starttime": query["starttime"][0], "endtime": query["endtime"][0],
+                 "interval": query["interval"][0], "value": _metric_values(resource_id, query)}
+                for resource_id in body.get("resourceids", [])
+            ]}
+
+        if m := re.fullmatch(r"(/subscriptions/.+?)/providers/Microsoft\.CostManagement/query", path, re.IGNORECASE):
+            skip = int(query.get("$skiptoken", ["0"])[0])
+            return 200, _cost_page(state, m.group(1), body, skip, base_url)
+
+        if re.fullmatch(r"/subscriptions/[^/]+/resourcegroups/[^/]+/providers/Microsoft\.OperationalInsights/workspaces/[^/]+/api/query", path, re.IGNORECASE):
+            return 200, _log_tables(state, body.get("query", ""))
+
+        return None
+
+
+class FakeAzureServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, config: FakeAzureConfig, port: int = 0, cert_dir: Optional[str] = None) -> None:
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.state = _State(config)
+        self.cert_file = make_certificate(cert_dir or tempfile.mkdtemp(prefix="fake-azure-"))
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(self.cert_file)
+        # Handshake in the handler threads, not in the accept loop.
+        self.socket = context.wrap_socket(self.socket, server_side=True, do_handshake_on_connect=False)
+        self.base_url = f"https://localhost:{self.server_address[1]}"
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "FakeAzureServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-azure", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def backend_environment(self) -> dict[str, str]:
+        """Environment that points the backend (and its TLS trust) at this server."""
+        return {
+            "AZURE_MANAGEMENT_ENDPOINT": self.base_url,
+            "AZURE_METRICS_BATCH_ENDPOINT": self.base_url,
+            # requests (Azure SDK) and urllib (logs, batch metrics) trust the throwaway cert.
+            "REQUESTS_CA_BUNDLE": self.cert_file,
+            "SSL_CERT_FILE": self.cert_file,
+        }
+
+
+def make_certificate(directory: str) -> str:
+    """Write a self-signed localhost certificate and key into one PEM file; returns its path."""
+    path = Path(directory) / "fake-azure.pem"
+    key = Path(directory) / "fake-azure.key"
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "2",
+            "-keyout", str(key), "-out", str(path), "-subj", "/CN=localhost",
+            "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    path.write_text(path.read_text() + key.read_text())
+    return str(path)
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    for field in dataclasses.fields(FakeAzureConfig):
+        parser.add_argument(f"--{field.name.replace('_', '-')}", type=type(field.default), default=field.default)
+
+
+def config_from_arguments(args: argparse.Namespace) -> FakeAzureConfig:
+    return FakeAzureConfig(**{field.name: getattr(args, field.name) for field in dataclasses.fields(FakeAzureConfig)})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8443)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    server = FakeAzureServer(config_from_arguments(args), args.port)
+    print(f"Fake Azure listening on {server.base_url}; start the backend with:")
+    for name, value in server.backend_environment().items():
+        print(f"  export {name}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+End-to-end load test of the API against a local fake Azure (``benchmarks.fake_azure``).
+
+Starts the fake, starts the backend under uvicorn pointed at it, then drives each scenario
+(discovery, revisions, lifecycle, cost, logs, metrics) at each concurrency level over
+keep-alive connections and reports throughput and p50/p95/p99 latency. Results can be
+saved as a baseline and later runs compared against it; a comparison exits non-zero when
+p95 latency or throughput regresses by more than ``--tolerance``.
+
+    python -m benchmarks.load_test [--scenarios logs,cost] [--concurrency 1,8,32] [--requests 200]
+                                   [--cache cold|warm] [--workers 1] [--latency-ms 80] [--throttle-rate 0.02]
+                                   [--save-baseline [PATH]] [--compare [PATH]] [--tolerance 0.2]
+
+``--cache cold`` (the default) sets every response cache TTL to 0 so each request reaches the
+fake; ``warm`` leaves the configured caches on. The backend needs a database URL it can open
+at import time; by default a scratch SQLite file is used (``pip install aiosqlite``), and the
+features that write to it in the background are turned off. Use ``--app-url`` to drive an
+already running backend instead (it must be configured with the fake's environment, which
+``python -m benchmarks.fake_azure`` prints).
+
+Run from the Backend directory.
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from benchmarks.fake_azure import (
+    FakeAzureConfig,
+    FakeAzureServer,
+    add_config_arguments,
+    app_names,
+    config_from_arguments,
+    resource_group_names,
+    subscription_ids,
+)
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "load_test.json"
+_COLD_CACHE_ENV = {
+    "COST_CACHE_TTL_SECONDS": "0",
+    "DISCOVERY_CACHE_TTL_SECONDS": "0",
+    "REVISION_CACHE_TTL_SECONDS": "0",
+    "APP_METRICS_CACHE_TTL_SECONDS": "0",
+    "APP_METRICS_RECENT_TTL_SECONDS": "0",
+    "LOG_CACHE_TTL_SECONDS": "0",
+}
+
+
+@dataclass(frozen=True)
+class Request:
+    method: str
+    path: str
+    body: Optional[dict[str, Any]] = None
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    make: Callable[[random.Random], Request]
+
+
+def scenarios(config: FakeAzureConfig) -> dict[str, Scenario]:
+    subs, groups, apps = subscription_ids(config), resource_group_names(config), app_names(config)
+
+    def pick(rng: random.Random) -> tuple[str, str, str]:
+        return rng.choice(subs), rng.choice(groups), rng.choice(apps)
+
+    def revisions(rng: random.Random) -> Request:
+        sub, group, _ = pick(rng)
+        refs = [{"subscription_id": sub, "resource_group": group, "app_name": app} for app in apps[:10]]
+        return Request("POST", "/api/v1/azure/revisions", {"apps": refs})
+
+    def multi_logs(rng: random.Random) -> Request:
+        sub, group, _ = pick(rng)
+        query = urllib.parse.urlencode([("apps", app) for app in rng.sample(apps, min(2, len(apps)))])
+        return Request("GET", f"/api/v1/logs/{sub}/{group}?{query}")
+
+    return {scenario.name: scenario for scenario in [
+        Scenario("discovery", lambda rng: Request("GET", "/api/v1/azure/discover-all")),
+        Scenario("revisions", revisions),
+        Scenario("lifecycle", lambda rng: Request("POST", "/api/v1/azure/{}/{}/{}/restart".format(*pick(rng)))),
+        Scenario("cost", lambda rng: Request("GET", "/api/v1/cost/resource-group/{}/{}?days=30".format(*pick(rng)[:2]))),
+        Scenario("cost-subscription", lambda rng: Request("GET", f"/api/v1/cost/subscription/{rng.choice(subs)}")),
+        Scenario("cost-analytics", lambda rng: Request("GET", "/api/v1/cost/analytics/resource-group/{}/{}".format(*pick(rng)[:2]))),
+        Scenario("logs", lambda rng: Request("GET", "/api/v1/logs/{}/{}/{}?hours=1&limit=50".format(*pick(rng)))),
+        Scenario("logs-multi", multi_logs),
+        Scenario("logs-patterns", lambda rng: Request("GET", "/api/v1/logs/{}/{}/{}?view=patterns".format(*pick(rng)))),
+        Scenario("metrics", lambda rng: Request("GET", "/api/v1/app-metrics/{}/{}?hours=6".format(*pick(rng)[:2]))),
+    ]}
+
+
+@dataclass
+class Result:
+    scenario: str
+    concurrency: int
+    requests: int
+    errors: int
+    seconds: float
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.scenario}@{self.concurrency}"
+
+
+def _percentiles(latencies: list[float]) -> tuple[float, float, float]:
+    if len(latencies) < 2:
+        value = latencies[0] if latencies else 0.0
+        return value, value, value
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+def run_scenario(app_url: str, scenario: Scenario, concurrency: int, total: int, warmup: int, seed: int) -> Result:
+    target = urllib.parse.urlsplit(app_url)
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    latencies: list[float] = []
+    errors = 0
+    first_error: list[str] = []
+
+    def _worker(requests: list[Request], counter: Iterator[int], record: bool) -> None:
+        nonlocal errors
+        connection = http.client.HTTPConnection(target.hostname, target.port, timeout=300)
+        headers = {"Authorization": "Bearer load-test", "Content-Type": "application/json"}
+        while (i := next(counter)) < len(requests):
+            request = requests[i]
+            body = json.dumps(request.body).encode("utf-8") if request.body is not None else None
+            started = time.perf_counter()
+            try:
+                connection.request(request.method, request.path, body=body, headers=headers)
+                response = connection.getresponse()
+                payload = response.read()
+                ok = response.status < 400
+                detail = f"{response.status} {payload[:200]!r}"
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                ok, detail = False, repr(e)
+            elapsed = time.perf_counter() - started
+            if not record:
+                continue
+            with lock:
+                latencies.append(elapsed)
+                if not ok:
+                    errors += 1
+                    if not first_error:
+                        first_error.append(f"{request.method} {request.path}: {detail}")
+        connection.close()
+
+    def _drive(requests: list[Request], record: bool) -> float:
+        counter = itertools.count()
+        threads = [threading.Thread(target=_worker, args=(requests, counter, record)) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started
+
+    _drive([scenario.make(rng) for _ in range(warmup)], record=False)
+    seconds = _drive([scenario.make(rng) for _ in range(total)], record=True)
+    if first_error:
+        print(f"  first error in {scenario.name}: {first_error[0]}", file=sys.stderr)
+
+    p50, p95, p99 = _percentiles(latencies)
+    return Result(
+        scenario=scenario.name,
+        concurrency=concurrency,
+        requests=len(latencies),
+        errors=errors,
+        seconds=round(seconds, 3),
+        throughput=round(len(latencies) / seconds, 2) if seconds else 0.0,
+        p50_ms=round(p50 * 1e3, 1),
+        p95_ms=round(p95 * 1e3, 1),
+        p99_ms=round(p99 * 1e3, 1),
+        max_ms=round(max(latencies, default=0.0) * 1e3, 1),
+    )
+
+
+def start_backend(fake: FakeAzureServer, port: int, workers: int, cache: str, scratch: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        **fake.backend_environment(),
+        "DATABASE_URL": os.environ.get("DATABASE_URL", f"sqlite+aiosqlite:///{scratch}/bench.sqlite3"),
+        "CACHE_SQLITE_PATH": f"{scratch}/shared-cache.sqlite3",
+        "COST_HISTORY_ENABLED": "false",
+        "COST_PREFETCH_ENABLED": "false",
+        "STATUS_HISTORY_ENABLED": "false",
+    }
+    if cache == "cold":
+        env.update(_COLD_CACHE_ENV)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=Path(__file__).resolve().parent.parent,
+        env=env,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Backend exited with status {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            connection.request("GET", "/")
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError("Backend did not become healthy within 60s")
+
+
+def _print_table(results: list[Result], baseline: dict[str, dict[str, Any]]) -> None:
+    print(f"{'scenario':<20}{'conc':>5}{'reqs':>7}{'err':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}  vs baseline p95")
+    for result in results:
+        previous = baseline.get(result.key)
+        delta = f"{(result.p95_ms / previous['p95_ms'] - 1) * 100:+.0f}%" if previous and previous["p95_ms"] else ""
+        print(
+            f"{result.scenario:<20}{result.concurrency:>5}{result.requests:>7}{result.errors:>5}{result.throughput:>9.1f}"
+            f"{result.p50_ms:>9.1f}{result.p95_ms:>9.1f}{result.p99_ms:>9.1f}{result.max_ms:>9.1f}  {delta}"
+        )
+
+
+def regressions(results: list[Result], baseline: dict[str, dict[str, Any]], tolerance: float) -> list[str]:
+    found = []
+    for result in results:
+        previous = baseline.get(result.key)
+        if not previous:
+            continue
+        if previous["p95_ms"] and result.p95_ms > previous["p95_ms"] * (1 + tolerance):
+            found.append(f"{result.key}: p95 {previous['p95_ms']} -> {result.p95_ms} ms")
+        if previous["throughput"] and result.throughput < previous["throughput"] * (1 - tolerance):
+            found.append(f"{result.key}: throughput {previous['throughput']} -> {result.throughput} req/s")
+        if result.errors > previous["errors"]:
+            found.append(f"{result.key}: errors {previous['errors']} -> {result.errors}")
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default="all", help="Comma-separated scenario names, or 'all'.")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels.")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario and level.")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests sent first.")
+    parser.add_argument("--cache", choices=["cold", "warm"], default="cold")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes.")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the spawned backend.")
+    parser.add_argument("--app-url", help="Drive this already running backend instead of spawning one.")
+    parser.add_argument("--save-baseline", nargs="?", const=str(DEFAULT_BASELINE), metavar="PATH")
+    parser.add_argument("--compare", nargs="?", const=str(DEFAULT_BASELINE), metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression before failing.")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    config = config_from_arguments(args)
+    available = scenarios(config)
+    names = list(available) if args.scenarios == "all" else args.scenarios.split(",")
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        parser.error(f"unknown scenario(s) {', '.join(unknown)}; choose from {', '.join(available)}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+    run_info = {
+        "cache": args.cache,
+        "workers": args.workers,
+        "fake_azure": asdict(config),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+    baseline: dict[str, dict[str, Any]] = {}
+    if args.compare:
+        saved = json.loads(Path(args.compare).read_text())
+        baseline = saved["results"]
+        if saved.get("run") != run_info:
+            print("Warning: baseline was recorded with different settings; comparison may not be meaningful.", file=sys.stderr)
+
+    fake = FakeAzureServer(config).start()
+    backend: Optional[subprocess.Popen] = None
+    results: list[Result] = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="load-test-") as scratch:
+            app_url = args.app_url
+            if not app_url:
+                backend = start_backend(fake, args.port, args.workers, args.cache, scratch)
+                app_url = f"http://127.0.0.1:{args.port}"
+            print(f"Backend {app_url}, fake Azure {fake.base_url}, cache {args.cache}")
+            for name in names:
+                for level in levels:
+                    results.append(run_scenario(app_url, available[name], level, args.requests, args.warmup, config.seed))
+            if backend is not None:
+                backend.terminate()
+                backend.wait(timeout=30)
+                backend = None
+    finally:
+        if backend is not None:
+            backend.kill()
+        fake.stop()
+
+    print(f"Fake Azure served {fake.state.requests} requests ({fake.state.throttled} throttled)")
+    _print_table(results, baseline)
+
+    if args.save_baseline:
+        path = Path(args.save_baseline)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"run": run_info, "results": {r.key: asdict(r) for r in results}}, indent=2) + "\n")
+        print(f"Baseline saved to {path}")
+
+    if args.compare:
+        found = regressions(results, baseline, args.tolerance)
+        if found:
+            print(f"Regressions beyond {args.tolerance:.0%}:")
+            for line in found:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
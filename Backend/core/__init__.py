@@ -1,4 +1,47 @@
 from core.config import Settings, get_settings
-from core.auth import get_azure_credential
+from core.auth import credential_cache_scope, get_azure_credential, management_client_options
+from core.cache import (
+    CacheBackend,
+    CacheStats,
+    LRUCache,
+    RedisCacheBackend,
+    SQLiteCacheBackend,
+    TieredCache,
+    TieredCacheStats,
+    get_shared_cache_backend,
+)
+from core.metrics import MetricsMiddleware, register_cache, render_metrics
+from core.executors import BoundedExecutor, ExecutorSaturated, ExecutorStats, get_executor, shutdown_executors
+from core.profiling import ProfilingMiddleware, profile_phase, record_phase
+from core.streaming import ExportFormat, Split, error_trailer, stream_in_order
 
-__all__ = ["Settings", "get_settings", "get_azure_credential"] 
\ No newline at end of file
+__all__ = [
+    "Settings",
+    "get_settings",
+    "get_azure_credential",
+    "credential_cache_scope",
+    "management_client_options",
+    "CacheBackend",
+    "CacheStats",
+    "LRUCache",
+    "RedisCacheBackend",
+    "SQLiteCacheBackend",
+    "TieredCache",
+    "TieredCacheStats",
+    "get_shared_cache_backend",
+    "MetricsMiddleware",
+    "register_cache",
+    "render_metrics",
+    "BoundedExecutor",
+    "ExecutorSaturated",
+    "ExecutorStats",
+    "get_executor",
+    "shutdown_executors",
+    "ProfilingMiddleware",
+    "profile_phase",
+    "record_phase",
+    "ExportFormat",
+    "Split",
+    "error_trailer",
+    "stream_in_order",
+]
@@ -15,8 +15,10 @@ Flow:
 
 from __future__ import annotations
 
+import hashlib
 import logging
 import time
+from typing import Any
 
 from azure.core.credentials import AccessToken, TokenCredential
 from azure.core.exceptions import ClientAuthenticationError
@@ -25,6 +27,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from core.config import Settings, get_settings
+from core.profiling import profile_phase
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +52,32 @@ class _BearerTokenCredential:
         return AccessToken(self._token, int(time.time()) + 3600)
 
 
+def credential_cache_scope(credential: TokenCredential) -> str:
+    """
+    Stable identifier of the caller behind ``credential`` for per-user cache keys.
+
+    Bearer tokens are hashed (never stored); all CLI-session requests share one scope
+    because they all act as the same local developer. Any other credential is the
+    server's own identity (background jobs such as the cost prefetch).
+    """
+    if isinstance(credential, _BearerTokenCredential):
+        return hashlib.sha256(credential._token.encode("utf-8")).hexdigest()[:32]
+    if isinstance(credential, AzureCliCredential):
+        return "cli"
+    return "server"
+
+
+def management_client_options(settings: Settings) -> dict[str, Any]:
+    """
+    Keyword arguments pointing an ``azure-mgmt-*`` client at the configured cloud: its ARM
+    endpoint and the token scope that goes with it (the SDK defaults to the public cloud's).
+    """
+    return {
+        "base_url": settings.azure_management_endpoint,
+        "credential_scopes": [settings.azure_management_token_scope],
+    }
+
+
 def get_azure_credential(
     credentials: HTTPAuthorizationCredentials | None = Depends(_bearer_scheme),
     settings: Settings = Depends(get_settings),
@@ -62,20 +91,21 @@ def get_azure_credential(
     3. HTTP 401                                        → neither is available
     """
 
-    # ── 1. User Bearer Token from MSAL login ─────────────────────────────────
-    if credentials and credentials.credentials:
-        logger.debug("Azure credential: Bearer token from Authorization header (user login)")
-        return _BearerTokenCredential(credentials.credentials)
-
-    # ── 2. Azure CLI session (local dev) ─────────────────────────────────────
-    try:
-        cli_cred = AzureCliCredential(tenant_id=settings.azure_tenant_id)
-        # Validate eagerly so we get a clear error rather than failing mid-request.
-        cli_cred.get_token("https://management.azure.com/.default")
-        logger.debug("Azure credential: AzureCliCredential (az login session)")
-        return cli_cred
-    except (CredentialUnavailableError, ClientAuthenticationError) as exc:
-        logger.debug("Azure CLI credential unavailable: %s", exc)
+    with profile_phase("auth"):
+        # ── 1. User Bearer Token from MSAL login ─────────────────────────────────
+        if credentials and credentials.credentials:
+            logger.debug("Azure credential: Bearer token from Authorization header (user login)")
+            return _BearerTokenCredential(credentials.credentials)
+
+        # ── 2. Azure CLI session (local dev) ─────────────────────────────────────
+        try:
+            cli_cred = AzureCliCredential(tenant_id=settings.azure_tenant_id)
+            # Validate eagerly so we get a clear error rather than failing mid-request.
+            cli_cred.get_token(settings.azure_management_token_scope)
+            logger.debug("Azure credential: AzureCliCredential (az login session)")
+            return cli_cred
+        except (CredentialUnavailableError, ClientAuthenticationError) as exc:
+            logger.debug("Azure CLI credential unavailable: %s", exc)
 
     # ── 3. Nothing worked ─────────────────────────────────────────────────────
     raise HTTPException(
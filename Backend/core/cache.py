@@ -0,0 +1,583 @@
+"""
+Caching primitives shared by the API endpoints.
+
+Each cache is two-tiered:
+
+1. **In-process LRU** (:class:`LRUCache`) — decoded values, no I/O, per worker.
+2. **Shared tier** (:class:`CacheBackend`) — encoded bytes visible to every uvicorn
+   worker: a SQLite file by default, or any server speaking the Redis protocol.
+
+:class:`TieredCache` combines both and coalesces concurrent loads of the same key
+(in-process via a shared future, across workers via a short-lived lock in the shared
+tier), so a cold key costs one upstream call no matter how many requests race for it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Generic, Optional, TypeVar
+from urllib.parse import urlparse
+
+from core.config import get_settings
+from core.metrics import register_cache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Point-in-time counters for a cache instance."""
+
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    entries: int
+    size_bytes: int
+    max_bytes: int
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by the total (estimated) size of its values in bytes.
+
+    Every entry carries its own expiry; expired entries are dropped lazily on lookup.
+    Callers pass the size of each value explicitly because only they know how to
+    estimate it cheaply.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float) -> None:
+        self._max_bytes = max_bytes
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, tuple[float, int, Any]] = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = self._expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or ``None`` if it is missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, size, value = entry
+            if expires_at <= now:
+                self._drop(key, size)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, size: int, ttl_seconds: Optional[float] = None) -> None:
+        """Store ``value``, evicting least recently used entries until it fits."""
+        ttl = self._ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0 or size > self._max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size_bytes -= previous[1]
+            while self._entries and self._size_bytes + size > self._max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._size_bytes -= evicted_size
+                self._evictions += 1
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self._size_bytes += size
+
+    @property
+    def ttl_seconds(self) -> float:
+        return self._ttl_seconds
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._drop(key, entry[1])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+                entries=len(self._entries),
+                size_bytes=self._size_bytes,
+                max_bytes=self._max_bytes,
+            )
+
+    def _drop(self, key: Hashable, size: int) -> None:
+        del self._entries[key]
+        self._size_bytes -= size
+
+
+# ── Shared tier ──────────────────────────────────────────────────────────────
+
+class CacheBackend(ABC):
+    """A byte-oriented cache shared between worker processes."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def try_lock(self, key: str, ttl_seconds: float) -> bool:
+        """Take an expiring lock on ``key``; ``False`` if another holder has it."""
+
+    @abstractmethod
+    def refresh_lock(self, key: str, ttl_seconds: float) -> None:
+        """Push the expiry of a held lock on ``key`` to ``ttl_seconds`` from now."""
+
+    @abstractmethod
+    def unlock(self, key: str) -> None:
+        ...
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    File-backed shared tier. WAL mode lets every worker on the host read concurrently;
+    the total stored size is kept under ``max_bytes`` by evicting the oldest writes.
+    """
+
+    _PRUNE_EVERY = 32
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        self._path = path
+        self._max_bytes = max_bytes
+        self._local = threading.local()
+        # next() on a count is atomic, unlike += from concurrent worker threads.
+        self._writes = itertools.count(1)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL, stored_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entries_stored_at ON cache_entries (stored_at)")
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_locks (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections may not be shared across threads, and the cache is
+        # used from both the event loop and worker threads.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._conn().execute(
+            "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        if len(value) > self._max_bytes:
+            return
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, size, expires_at, stored_at) VALUES (?, ?, ?, ?, ?)",
+            (key, value, len(value), now + ttl_seconds, now),
+        )
+        if next(self._writes) % self._PRUNE_EVERY == 0:
+            self._prune(conn, now)
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+        conn.execute("DELETE FROM cache_locks WHERE expires_at <= ?", (now,))
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()
+        if total <= self._max_bytes:
+            return
+        excess = total - self._max_bytes
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM cache_entries ORDER BY stored_at"):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM cache_entries WHERE key = ?", victims)
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def try_lock(self, key: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM cache_locks WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO cache_locks (key, expires_at) VALUES (?, ?)", (key, now + ttl_seconds)
+            )
+            acquired = cursor.rowcount == 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return acquired
+
+    def refresh_lock(self, key: str, ttl_seconds: float) -> None:
+        self._conn().execute(
+            "UPDATE cache_locks SET expires_at = ? WHERE key = ?", (time.time() + ttl_seconds, key)
+        )
+
+    def unlock(self, key: str) -> None:
+        self._conn().execute("DELETE FROM cache_locks WHERE key = ?", (key,))
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Shared tier on any server speaking RESP (Redis, Valkey, KeyDB, a local stand-in, ...).
+
+    Only GET/SET/DEL/PEXPIRE are used, so a minimal blocking client is enough and no extra
+    dependency is needed. Size bounds are the server's ``maxmemory`` policy.
+    """
+
+    def __init__(self, url: str, timeout_seconds: float = 2.0) -> None:
+        parsed = urlparse(url)
+        self._host = parsed.hostname or "localhost"
+        self._port = parsed.port or 6379
+        self._password = parsed.password
+        self._db = int(parsed.path.lstrip("/") or 0)
+        self._timeout = timeout_seconds
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.create_connection((self._host, self._port), timeout=self._timeout)
+            conn = (sock, sock.makefile("rb"))
+            self._local.conn = conn
+            if self._password:
+                self._command("AUTH", self._password)
+            if self._db:
+                self._command("SELECT", str(self._db))
+        return conn
+
+    def _command(self, *args: str | bytes) -> Any:
+        sock, reader = self._connection()
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else arg.encode()
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        try:
+            sock.sendall(b"".join(parts))
+            return self._read_reply(reader)
+        except OSError:
+            # Drop the broken connection so the next command reconnects.
+            self._local.conn = None
+            sock.close()
+            raise
+
+    def _read_reply(self, reader) -> Any:
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by cache server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RuntimeError(f"Cache server error: {payload.decode()}")
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(payload)
+            return None if count < 0 else [self._read_reply(reader) for _ in range(count)]
+        raise ConnectionError(f"Unexpected reply from cache server: {line!r}")
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._command("GET", key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        self._command("SET", key, value, "PX", str(max(int(ttl_seconds * 1000), 1)))
+
+    def delete(self, key: str) -> None:
+        self._command("DEL", key)
+
+    def try_lock(self, key: str, ttl_seconds: float) -> bool:
+        reply = self._command("SET", f"lock:{key}", "1", "NX", "PX", str(max(int(ttl_seconds * 1000), 1)))
+        return reply == "OK"
+
+    def refresh_lock(self, key: str, ttl_seconds: float) -> None:
+        self._command("PEXPIRE", f"lock:{key}", str(max(int(ttl_seconds * 1000), 1)))
+
+    def unlock(self, key: str) -> None:
+        self._command("DEL", f"lock:{key}")
+
+
+@lru_cache
+def get_shared_cache_backend() -> Optional[CacheBackend]:
+    """Return the process-wide shared cache tier configured in settings (``None`` = memory only)."""
+    settings = get_settings()
+    if settings.cache_backend == "redis":
+        if not settings.cache_redis_url:
+            raise ValueError("CACHE_BACKEND=redis requires CACHE_REDIS_URL")
+        return RedisCacheBackend(settings.cache_redis_url)
+    if settings.cache_backend == "sqlite":
+        return SQLiteCacheBackend(settings.cache_sqlite_path, settings.cache_shared_max_bytes)
+    return None
+
+
+# ── Two-tier cache ───────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class TieredCacheStats:
+    local: CacheStats
+    shared_hits: int
+    shared_misses: int
+    shared_errors: int
+    loads: int
+    coalesced: int
+
+
+class TieredCache(Generic[T]):
+    """
+    In-process :class:`LRUCache` in front of an optional shared :class:`CacheBackend`.
+
+    Values are kept decoded locally and encoded (``encode``/``decode``) in the shared tier.
+    Shared-tier failures are logged and treated as misses — the cache never fails a request.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        local: LRUCache,
+        shared: Optional[CacheBackend],
+        encode: Callable[[T], bytes],
+        decode: Callable[[bytes], T],
+        sizeof: Optional[Callable[[T], int]] = None,
+        lock_wait_seconds: float = 10.0,
+    ) -> None:
+        self._namespace = namespace
+        self._local = local
+        self._shared = shared
+        self._encode = encode
+        self._decode = decode
+        self._sizeof = sizeof
+        self._lock_wait_seconds = lock_wait_seconds
+        self._inflight: dict[str, asyncio.Task[T]] = {}
+        self._shared_hits = self._shared_misses = self._shared_errors = 0
+        self._loads = self._coalesced = 0
+        register_cache(namespace, self.stats)
+
+    def _key(self, key: str) -> str:
+        return f"{self._namespace}:{key}"
+
+    def _store_local(self, key: str, value: T, ttl_seconds: Optional[float], encoded: Optional[bytes] = None) -> None:
+        if self._sizeof is not None:
+            size = self._sizeof(value)
+        else:
+            size = len(encoded if encoded is not None else self._encode(value))
+        self._local.set(key, value, size=size, ttl_seconds=ttl_seconds)
+
+    def _shared_get(self, key: str) -> Optional[bytes]:
+        if self._shared is None:
+            return None
+        try:
+            data = self._shared.get(self._key(key))
+        except Exception:  # noqa: BLE001
+            self._shared_errors += 1
+            logger.warning("Shared cache read failed for '%s'", key, exc_info=True)
+            return None
+        if data is None:
+            self._shared_misses += 1
+        else:
+            self._shared_hits += 1
+        return data
+
+    def _shared_call(self, method: str, *args: Any) -> Any:
+        try:
+            return getattr(self._shared, method)(*args)
+        except Exception:  # noqa: BLE001
+            self._shared_errors += 1
+            logger.warning("Shared cache %s failed for '%s'", method, args[0], exc_info=True)
+            return None
+
+    # ── Synchronous API (worker threads) ─────────────────────────────────────
+
+    def get(self, key: str) -> Optional[T]:
+        value = self._local.get(key)
+        if value is not None:
+            return value
+        data = self._shared_get(key)
+        if data is None:
+            return None
+        value = self._decode(data)
+        self._store_local(key, value, None, data)
+        return value
+
+    def set(self, key: str, value: T, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self._local_ttl(ttl_seconds)
+        encoded = self._encode(value) if self._shared is not None or self._sizeof is None else None
+        self._store_local(key, value, ttl, encoded)
+        if self._shared is not None and ttl > 0:
+            self._shared_call("set", self._key(key), encoded, ttl)
+
+    def invalidate(self, key: str) -> None:
+        self._local.invalidate(key)
+        if self._shared is not None:
+            self._shared_call("delete", self._key(key))
+
+    def _local_ttl(self, ttl_seconds: Optional[float]) -> float:
+        return self._local.ttl_seconds if ttl_seconds is None else ttl_seconds
+
+    # ── Async API (event loop) ───────────────────────────────────────────────
+
+    async def aget(self, key: str) -> Optional[T]:
+        value = self._local.get(key)
+        if value is not None or self._shared is None:
+            return value
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: T, ttl_seconds: Optional[float] = None) -> None:
+        if self._shared is None:
+            self.set(key, value, ttl_seconds)
+        else:
+            await asyncio.to_thread(self.set, key, value, ttl_seconds)
+
+    async def ainvalidate(self, key: str) -> None:
+        if self._shared is None:
+            self.invalidate(key)
+        else:
+            await asyncio.to_thread(self.invalidate, key)
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[T]],
+        ttl_seconds: Optional[float] = None,
+    ) -> T:
+        """
+        Return the cached value for ``key`` or produce it with ``loader``.
+
+        Concurrent callers in this process share one in-flight load; callers in other
+        processes wait (up to ``lock_wait_seconds``) for the lock holder to publish.
+        The load runs in its own task, so a caller that is cancelled (e.g. its client
+        disconnected) neither cancels it nor fails the callers still waiting on it.
+        """
+        value = self._local.get(key)
+        if value is not None:
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._coalesced += 1
+        else:
+            task = asyncio.create_task(self._load(key, loader, ttl_seconds), name=f"cache-load:{self._namespace}")
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._load_done(key, done))
+        return await asyncio.shield(task)
+
+    def _load_done(self, key: str, task: asyncio.Task[T]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved when every caller had already gone.
+        if not task.cancelled():
+            task.exception()
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[T]], ttl_seconds: Optional[float]) -> T:
+        if self._shared is None:
+            self._loads += 1
+            value = await loader()
+            self.set(key, value, ttl_seconds)
+            return value
+
+        cached = await asyncio.to_thread(self.get, key)
+        if cached is not None:
+            return cached
+
+        lock_key = self._key(key)
+        ttl = self._local_ttl(ttl_seconds)
+        # True = we hold the lock, False = another worker does, None = the shared tier
+        # failed; then nobody can publish through it either, so load straight away.
+        locked = await asyncio.to_thread(self._shared_call, "try_lock", lock_key, self._lock_ttl_seconds)
+        if locked is False:
+            # Another worker is loading this key — give it a chance to publish first.
+            deadline = time.monotonic() + self._lock_wait_seconds
+            delay = 0.05
+            while time.monotonic() < deadline:
+                await asyncio.sleep(delay)
+                cached = await asyncio.to_thread(self.get, key)
+                if cached is not None:
+                    self._coalesced += 1
+                    return cached
+                delay = min(delay * 2, 1.0)
+
+        keepalive = asyncio.create_task(self._keep_lock(lock_key)) if locked else None
+        try:
+            self._loads += 1
+            value = await loader()
+            await asyncio.to_thread(self.set, key, value, ttl)
+            return value
+        finally:
+            if keepalive is not None:
+                keepalive.cancel()
+            if locked:
+                await asyncio.to_thread(self._shared_call, "unlock", lock_key)
+
+    @property
+    def _lock_ttl_seconds(self) -> float:
+        return max(self._lock_wait_seconds, 1.0)
+
+    async def _keep_lock(self, lock_key: str) -> None:
+        """Extend the load lock while the loader runs, so it cannot expire under a slow load."""
+        while True:
+            await asyncio.sleep(self._lock_ttl_seconds / 3)
+            await asyncio.to_thread(self._shared_call, "refresh_lock", lock_key, self._lock_ttl_seconds)
+
+    def stats(self) -> TieredCacheStats:
+        return TieredCacheStats(
+            local=self._local.stats(),
+            shared_hits=self._shared_hits,
+            shared_misses=self._shared_misses,
+            shared_errors=self._shared_errors,
+            loads=self._loads,
+            coalesced=self._coalesced,
+        )
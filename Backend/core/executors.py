@@ -0,0 +1,164 @@
+"""
+Dedicated, bounded worker pools for the blocking Azure SDK and REST calls.
+
+Each subsystem gets its own pool so that one kind of slow work cannot starve the others:
+a lifecycle operation holds its thread for the whole start/stop (``.wait()`` on the
+poller), and with a shared executor a burst of stuck restarts would queue every log and
+cost read behind it. Pools:
+
+* ``lifecycle`` — container app start/stop/restart.
+* ``discovery`` — ARM inventory and status reads: subscriptions, apps, revisions, metrics.
+* ``cost`` — Cost Management queries and the cost analytics computed from them.
+* ``logs`` — Log Analytics queries and log pattern mining.
+
+A pool accepts at most ``workers + queue`` calls at once; beyond that :meth:`BoundedExecutor.run`
+raises :class:`ExecutorSaturated` (HTTP 503 with ``Retry-After``) immediately instead of
+queueing without bound. Utilization is exported through ``/metrics``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Literal, TypeVar
+
+from fastapi import HTTPException, status
+
+from core.config import get_settings
+from core.metrics import register_executor, timed_call
+
+T = TypeVar("T")
+
+Pool = Literal["lifecycle", "discovery", "cost", "logs"]
+
+
+@dataclass(frozen=True)
+class ExecutorStats:
+    max_workers: int
+    max_queue: int
+    active: int
+    queued: int
+    threads: int
+    rejected: int
+    completed: int
+
+    @property
+    def utilization(self) -> float:
+        return self.active / self.max_workers if self.max_workers else 0.0
+
+
+class ExecutorSaturated(HTTPException):
+    """Raised when a pool already holds as many calls as it may run and queue."""
+
+    def __init__(self, pool: str, retry_after_seconds: int = 1) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"The {pool} worker pool is saturated; retry shortly.",
+            headers={"Retry-After": str(retry_after_seconds)},
+        )
+        self.pool = pool
+
+
+class BoundedExecutor:
+    """A named thread pool with a queue limit and fast rejection."""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-pool")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._active = 0
+        self._rejected = 0
+        self._completed = 0
+        register_executor(name, self.stats)
+
+    async def run(self, upstream: str, operation: str, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+        """
+        Run ``fn`` on this pool, instrumented by ``upstream`` and ``operation`` (see
+        :func:`core.metrics.timed_call`). Raises :class:`ExecutorSaturated` without
+        waiting when the pool is full.
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise ExecutorSaturated(self.name)
+            self._in_flight += 1
+
+        call = timed_call(upstream, operation, fn, *args, **kwargs)
+        # Like asyncio.to_thread, keep context variables (request profiling) in the thread.
+        context = contextvars.copy_context()
+
+        def _run() -> T:
+            with self._lock:
+                self._active += 1
+            try:
+                return context.run(call)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+
+        def _release(_future: Future) -> None:
+            # Also runs for calls cancelled while still queued, which never reach _run.
+            with self._lock:
+                self._in_flight -= 1
+
+        try:
+            future = self._executor.submit(_run)
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        future.add_done_callback(_release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> ExecutorStats:
+        with self._lock:
+            return ExecutorStats(
+                max_workers=self.max_workers,
+                max_queue=self.max_queue,
+                active=self._active,
+                queued=self._in_flight - self._active,
+                threads=len(self._executor._threads),
+                rejected=self._rejected,
+                completed=self._completed,
+            )
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_executors: dict[str, BoundedExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(pool: Pool) -> BoundedExecutor:
+    """The worker pool of ``pool``, created on first use with the configured limits."""
+    executor = _executors.get(pool)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(pool)
+            if executor is None:
+                settings = get_settings()
+                executor = BoundedExecutor(
+                    pool,
+                    max_workers=getattr(settings, f"executor_{pool}_workers"),
+                    max_queue=getattr(settings, f"executor_{pool}_queue"),
+                )
+                _executors[pool] = executor
+    return executor
+
+
+def shutdown_executors() -> None:
+    """Stop every pool without waiting; queued calls are cancelled."""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown()
@@ -0,0 +1,361 @@
+"""
+Minimal Prometheus-style instrumentation: counters, gauges and histograms rendered in the
+text exposition format by :func:`render_metrics`, without a client library dependency.
+
+What gets measured:
+
+* HTTP requests — :class:`MetricsMiddleware` (latency by route/method/status, in-flight).
+* Upstream calls — :func:`timed_call` wraps the blocking Azure SDK/REST calls the endpoints
+  hand to worker pools and times them by upstream and operation.
+* Caches and worker pools — read at scrape time from registered callbacks.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, TypeVar
+
+from core.profiling import record_phase
+
+T = TypeVar("T")
+
+_DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]:
+        """The metric's sample lines in the text exposition format."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = _DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts, sum, count)
+        self._values: dict[tuple[str, ...], tuple[list[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self._buckets), 0.0, 0)
+            for i, bound in enumerate(self._buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self._buckets, counts):
+                cumulative += bucket_count
+                le = 'le="' + _number(bound) + '"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {count}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {count}"
+
+
+class _Registry:
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], Iterable[_Metric]]] = []
+        self._caches: dict[str, Callable[[], Any]] = {}
+        self._executors: dict[str, Callable[[], Any]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, metric: _Metric) -> None:
+        with self._lock:
+            self._metrics.append(metric)
+
+    def add_collector(self, collector: Callable[[], Iterable[_Metric]]) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def add_cache(self, name: str, stats: Callable[[], Any]) -> None:
+        with self._lock:
+            self._caches[name] = stats
+
+    def caches(self) -> list[tuple[str, Callable[[], Any]]]:
+        with self._lock:
+            return sorted(self._caches.items())
+
+    def add_executor(self, name: str, stats: Callable[[], Any]) -> None:
+        with self._lock:
+            self._executors[name] = stats
+
+    def executors(self) -> list[tuple[str, Callable[[], Any]]]:
+        with self._lock:
+            return sorted(self._executors.items())
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        for collector in collectors:
+            metrics.extend(collector())
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = _Registry()
+
+
+def _registered(metric: T) -> T:
+    REGISTRY.add(metric)  # type: ignore[arg-type]
+    return metric
+
+
+REQUEST_DURATION = _registered(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status"),
+))
+REQUESTS_IN_FLIGHT = _registered(Gauge("http_requests_in_flight", "HTTP requests currently being served."))
+UPSTREAM_DURATION = _registered(Histogram(
+    "upstream_call_duration_seconds",
+    "Latency of blocking upstream calls run in worker threads (excludes time queued for a thread).",
+    ("upstream", "operation"),
+))
+UPSTREAM_ERRORS = _registered(Counter(
+    "upstream_call_errors_total", "Upstream calls that raised.", ("upstream", "operation"),
+))
+EXECUTOR_QUEUE_WAIT = _registered(Histogram(
+    "executor_queue_wait_seconds", "Time instrumented calls waited for a worker thread.", ("upstream",),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+))
+
+
+def register_cache(name: str, stats: Callable[[], Any]) -> None:
+    """Export a cache's ``stats()`` (a ``CacheStats`` or ``TieredCacheStats``) under ``name``."""
+    REGISTRY.add_cache(name, stats)
+
+
+def _cache_metrics() -> Iterable[_Metric]:
+    hits = Counter("cache_hits_total", "Cache lookups served, by cache and tier.", ("cache", "tier"))
+    misses = Counter("cache_misses_total", "Cache lookups that missed, by cache and tier.", ("cache", "tier"))
+    ratio = Gauge("cache_hit_ratio", "Local-tier hits / lookups since start.", ("cache",))
+    entries = Gauge("cache_entries", "Entries held in the local tier.", ("cache",))
+    size = Gauge("cache_size_bytes", "Estimated bytes held in the local tier.", ("cache",))
+    loads = Counter("cache_loads_total", "Upstream loads performed on a miss.", ("cache",))
+    coalesced = Counter("cache_coalesced_total", "Misses that waited on another caller's load.", ("cache",))
+    for name, stats_fn in REGISTRY.caches():
+        stats = stats_fn()
+        local = getattr(stats, "local", stats)
+        hits.inc(local.hits, cache=name, tier="local")
+        misses.inc(local.misses, cache=name, tier="local")
+        ratio.set(local.hit_ratio, cache=name)
+        entries.set(local.entries, cache=name)
+        size.set(local.size_bytes, cache=name)
+        if hasattr(stats, "shared_hits"):
+            hits.inc(stats.shared_hits, cache=name, tier="shared")
+            misses.inc(stats.shared_misses, cache=name, tier="shared")
+            loads.inc(stats.loads, cache=name)
+            coalesced.inc(stats.coalesced, cache=name)
+    return [hits, misses, ratio, entries, size, loads, coalesced]
+
+
+def register_executor(name: str, stats: Callable[[], Any]) -> None:
+    """Export a worker pool's ``stats()`` (an ``ExecutorStats``) under ``name``."""
+    REGISTRY.add_executor(name, stats)
+
+
+def _executor_metrics() -> Iterable[_Metric]:
+    queued = Gauge("executor_queue_depth", "Work items waiting for a thread.", ("pool",))
+    threads = Gauge("executor_threads", "Threads started by the pool.", ("pool",))
+    active = Gauge("executor_active", "Work items running on a thread.", ("pool",))
+    capacity = Gauge("executor_max_workers", "Configured thread limit of the pool.", ("pool",))
+    queue_limit = Gauge("executor_queue_limit", "Work items the pool queues before rejecting.", ("pool",))
+    utilization = Gauge("executor_utilization", "Running work items / thread limit.", ("pool",))
+    rejected = Counter("executor_rejected_total", "Work items rejected because the pool was saturated.", ("pool",))
+    completed = Counter("executor_completed_total", "Work items the pool finished.", ("pool",))
+
+    for name, stats_fn in REGISTRY.executors():
+        stats = stats_fn()
+        queued.set(stats.queued, pool=name)
+        threads.set(stats.threads, pool=name)
+        active.set(stats.active, pool=name)
+        capacity.set(stats.max_workers, pool=name)
+        queue_limit.set(stats.max_queue, pool=name)
+        utilization.set(stats.utilization, pool=name)
+        rejected.inc(stats.rejected, pool=name)
+        completed.inc(stats.completed, pool=name)
+    return [queued, threads, active, capacity, queue_limit, utilization, rejected, completed]
+
+
+REGISTRY.add_collector(_cache_metrics)
+REGISTRY.add_collector(_executor_metrics)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+def timed_call(upstream: str, operation: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> Callable[[], T]:
+    """
+    Wrap a blocking call so that, when a worker thread runs it, the time it waited for the
+    thread and the time it ran are recorded, labelled by ``upstream`` (``arm``,
+    ``cost_management``, ``log_analytics``, ``azure_monitor``, ``cpu``) and ``operation``.
+    Both also count towards the phases of a profiled request.
+    """
+    submitted = time.perf_counter()
+
+    def _timed() -> T:
+        started = time.perf_counter()
+        EXECUTOR_QUEUE_WAIT.observe(started - submitted, upstream=upstream)
+        record_phase("queue", started - submitted)
+        try:
+            return fn(*args, **kwargs)
+        except BaseException:
+            UPSTREAM_ERRORS.inc(upstream=upstream, operation=operation)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            UPSTREAM_DURATION.observe(elapsed, upstream=upstream, operation=operation)
+            record_phase(upstream, elapsed)
+
+    return _timed
+
+
+def _route_label(scope: dict[str, Any]) -> str:
+    """
+    The matched route's template (keeping label cardinality bounded) under the prefix it was
+    reached through. A route in an included router or mounted app may only know its own
+    path, so the prefix is the part of the request path before the part the route matched.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    path = scope.get("path", "")
+    regex = getattr(route, "path_regex", None)
+    if regex is not None:
+        for index, char in enumerate(path):
+            if char == "/" and regex.match(path[index:]):
+                return path[:index] + template
+    return template
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency by route template and in-flight requests."""
+
+    def __init__(self, app: Callable[..., Any]) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Callable[..., Any], send: Callable[..., Any]) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def _send(message: dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                method=scope.get("method", ""),
+                route=_route_label(scope),
+                status=status,
+            )
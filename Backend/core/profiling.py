@@ -0,0 +1,215 @@
+"""
+Opt-in per-request profiling.
+
+With ``PROFILING_ENABLED`` set, a request is profiled when it carries an ``X-Profile``
+header matching ``PROFILING_TOKEN`` or is picked by ``PROFILING_SAMPLE_RATE``. A profiled
+request gets:
+
+* a ``Server-Timing`` header with the time spent per phase — ``auth``, thread-pool wait
+  (``queue``), each upstream (``arm``, ``cost_management``, ``log_analytics``,
+  ``azure_monitor``, ``cpu``) — and the ``total`` up to the response headers;
+* a cProfile dump (``.prof``, open with ``python -m pstats`` or snakeviz) and a JSON phase
+  breakdown in ``PROFILING_OUTPUT_DIR``.
+
+Without ``PROFILING_TOKEN`` clients cannot trigger profiling at all: ``X-Profile`` is
+ignored, and sampled requests only get the ``Server-Timing`` header — no cProfile run and
+no files written.
+
+cProfile observes the whole event loop thread, so a dump also contains whatever other
+requests ran concurrently; one request per worker is cProfiled at a time and any others
+selected meanwhile get phase timings only. With profiling disabled the middleware is not
+installed and :func:`record_phase` costs one context variable lookup.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import datetime
+import hmac
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+
+
+class RequestProfile:
+    """Phase durations accumulated over one request, from the event loop and worker threads."""
+
+    def __init__(self) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self._phases: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._phases.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def phases(self) -> dict[str, tuple[float, int]]:
+        with self._lock:
+            return {name: (seconds, int(count)) for name, (seconds, count) in self._phases.items()}
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """Add ``seconds`` to phase ``name`` of the request being profiled, if any."""
+    profile = _current.get()
+    if profile is not None:
+        profile.add(name, seconds)
+
+
+@contextmanager
+def profile_phase(name: str) -> Iterator[None]:
+    """Time the enclosed block as phase ``name`` when the current request is profiled."""
+    if _current.get() is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - started)
+
+
+def _server_timing(phases: dict[str, tuple[float, int]], total: float, profile_id: Optional[str]) -> str:
+    entries = []
+    for name, (seconds, count) in sorted(phases.items(), key=lambda item: -item[1][0]):
+        entry = f"{name};dur={seconds * 1000:.1f}"
+        if count > 1:
+            entry += f';desc="{count} calls"'
+        entries.append(entry)
+    entries.append(f"total;dur={total * 1000:.1f}")
+    if profile_id:
+        entries.append(f'profile;desc="{profile_id}"')
+    return ", ".join(entries)
+
+
+def _write_profile(
+    directory: Path,
+    stem: str,
+    profiler: Optional[cProfile.Profile],
+    breakdown: dict[str, Any],
+) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    if profiler is not None:
+        profiler.dump_stats(directory / f"{stem}.prof")
+    (directory / f"{stem}.json").write_text(json.dumps(breakdown, indent=2), encoding="utf-8")
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests selected by header or sample rate."""
+
+    def __init__(
+        self,
+        app: Callable[..., Any],
+        output_dir: str,
+        sample_rate: float = 0.0,
+        token: Optional[str] = None,
+    ) -> None:
+        self.app = app
+        self._output_dir = Path(output_dir)
+        self._sample_rate = sample_rate
+        self._token = token.encode("latin-1") if token else None
+        # cProfile hooks the whole thread, so only one profiler may run on the loop at once.
+        self._profiler_busy = False
+        if self._token is None:
+            logger.warning(
+                "Profiling enabled without PROFILING_TOKEN: X-Profile is ignored and sampled "
+                "requests get Server-Timing only"
+            )
+
+    def _selected(self, scope: dict[str, Any]) -> bool:
+        if self._token is not None:
+            for name, value in scope.get("headers", ()):
+                if name == PROFILE_HEADER.encode("latin-1") and hmac.compare_digest(value, self._token):
+                    return True
+        return self._sample_rate > 0 and random.random() < self._sample_rate
+
+    async def __call__(self, scope: dict[str, Any], receive: Callable[..., Any], send: Callable[..., Any]) -> None:
+        if scope["type"] != "http" or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        # cProfile runs and profile files are only for deployments that set a token.
+        full = self._token is not None
+        profiler: Optional[cProfile.Profile] = None
+        if full and not self._profiler_busy:
+            self._profiler_busy = True
+            profiler = cProfile.Profile()
+        headers_sent_at: Optional[float] = None
+        status = 500
+
+        async def _send(message: dict[str, Any]) -> None:
+            nonlocal headers_sent_at, status
+            if message["type"] == "http.response.start":
+                headers_sent_at = time.perf_counter()
+                status = message["status"]
+                timing = _server_timing(
+                    profile.phases(), headers_sent_at - profile.started, profile.id if profiler else None,
+                )
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", timing.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            if profiler is not None:
+                profiler.enable()
+            await self.app(scope, receive, _send)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._profiler_busy = False
+            _current.reset(token)
+            if full:
+                await self._write(scope, profile, profiler, status, headers_sent_at)
+
+    async def _write(
+        self,
+        scope: dict[str, Any],
+        profile: RequestProfile,
+        profiler: Optional[cProfile.Profile],
+        status: int,
+        headers_sent_at: Optional[float],
+    ) -> None:
+        """Write the phase breakdown and, if one ran, the cProfile dump of a request."""
+        finished = time.perf_counter()
+        route = scope.get("route")
+        path = getattr(route, "path_format", None) or scope.get("path", "")
+        breakdown = {
+            "id": profile.id,
+            "method": scope.get("method"),
+            "route": path,
+            "status": status,
+            "at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "total_ms": round((finished - profile.started) * 1000, 1),
+            "headers_ms": round((headers_sent_at - profile.started) * 1000, 1) if headers_sent_at else None,
+            "phases_ms": {
+                name: {"ms": round(seconds * 1000, 1), "calls": count}
+                for name, (seconds, count) in profile.phases().items()
+            },
+        }
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", path).strip("-") or "root"
+        stem = f"{datetime.datetime.now():%Y%m%dT%H%M%S}-{scope.get('method', '').lower()}-{slug[:80]}-{profile.id}"
+        try:
+            await asyncio.to_thread(_write_profile, self._output_dir, stem, profiler, breakdown)
+            logger.info("Profiled %s %s in %.1f ms -> %s", scope.get("method"), path, breakdown["total_ms"], stem)
+        except OSError:
+            logger.warning("Could not write profile %s to %s", stem, self._output_dir, exc_info=True)
@@ -0,0 +1,131 @@
+"""
+Ordered, bounded streaming for chunked exports.
+
+Exports split their range into chunks (time slices, months) that are loaded concurrently
+and written out oldest-first. :func:`stream_in_order` keeps at most ``concurrency`` chunks
+in flight, and so in memory; a chunk is released as soon as it has been written. A
+loader may return :class:`Split` instead of output to have its chunk replaced by smaller
+ones, which are then streamed one after another like any other chunk.
+
+Once the first bytes are out the status code can no longer change. A worker pool that
+is momentarily full (:class:`~core.executors.ExecutorSaturated`) is therefore waited out
+with a backoff instead of failing the chunk, and any other failure mid-stream ends the
+body with an explicit error trailer (:func:`error_trailer`) rather than a silently
+truncated file that looks complete.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import json
+import logging
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Sequence
+from dataclasses import dataclass
+from typing import Generic, Literal, TypeVar, Union
+
+from fastapi import HTTPException
+
+from core.executors import ExecutorSaturated
+
+logger = logging.getLogger(__name__)
+
+C = TypeVar("C")
+
+ExportFormat = Literal["ndjson", "csv"]
+
+# A chunk rejected by a saturated pool is retried this many times (about 25 s in all)
+# before the export gives up on it.
+_SATURATED_ATTEMPTS = 8
+_SATURATED_MAX_DELAY = 5.0
+
+
+@dataclass(frozen=True)
+class Split(Generic[C]):
+    """Returned by a loader to replace its chunk with ``parts``, streamed in order."""
+
+    parts: Sequence[C]
+
+
+def error_trailer(fmt: ExportFormat, message: str) -> str:
+    """
+    The last record of an export that failed part way: an ``{"error": ...}`` line in
+    NDJSON, a ``#error`` row in CSV.
+    """
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(["#error", message])
+        return buffer.getvalue()
+    return json.dumps({"error": message, "complete": False}) + "\n"
+
+
+def _describe(exc: Exception) -> str:
+    if isinstance(exc, HTTPException):
+        return f"{exc.status_code}: {exc.detail}"
+    return str(exc) or type(exc).__name__
+
+
+async def stream_in_order(
+    chunks: Iterable[C],
+    load: Callable[[C], Awaitable[Union[str, Split[C]]]],
+    concurrency: int,
+    fmt: ExportFormat,
+    header: str = "",
+    name: str = "export",
+) -> AsyncIterator[str]:
+    """
+    Yield ``header``, then the output of ``load(chunk)`` for every chunk in order.
+
+    Up to ``concurrency`` loads run ahead of the chunk being written. Loads rejected by a
+    saturated worker pool are retried with a backoff; any other exception (or a pool that
+    stays saturated) ends the stream with :func:`error_trailer` and cancels the remaining loads.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    pending: deque[asyncio.Task[Union[str, Split[C]]]] = deque()
+    remaining = iter(chunks)
+
+    async def _load(chunk: C) -> Union[str, Split[C]]:
+        attempt = 0
+        while True:
+            async with semaphore:
+                try:
+                    return await load(chunk)
+                except ExecutorSaturated as e:
+                    attempt += 1
+                    if attempt >= _SATURATED_ATTEMPTS:
+                        raise
+                    pool = e.pool
+                    retry_after = float(e.headers.get("Retry-After", 1)) if e.headers else 1.0
+            logger.debug("%s: the %s pool is saturated; retrying a chunk (attempt %d)", name, pool, attempt)
+            await asyncio.sleep(min(retry_after * 2 ** (attempt - 1), _SATURATED_MAX_DELAY))
+
+    def _fill() -> None:
+        while len(pending) < concurrency:
+            try:
+                chunk = next(remaining)
+            except StopIteration:
+                return
+            pending.append(asyncio.create_task(_load(chunk)))
+
+    if header:
+        yield header
+    try:
+        _fill()
+        while pending:
+            result = await pending.popleft()
+            if isinstance(result, Split):
+                # The parts take the chunk's place at the head of the queue.
+                for part in reversed(result.parts):
+                    pending.appendleft(asyncio.create_task(_load(part)))
+                continue
+            _fill()
+            if result:
+                yield result
+    except Exception as e:  # noqa: BLE001
+        logger.exception("%s failed mid-stream; ending it with an error trailer", name)
+        yield error_trailer(fmt, _describe(e))
+    finally:
+        for task in pending:
+            task.cancel()
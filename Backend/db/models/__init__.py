@@ -1,4 +1,5 @@
+from db.models.cost_history import CostHistory
 from db.models.environment import EnvironmentApp
+from db.models.status_history import StatusObservation, StatusRollup
 
-__all__ = ["EnvironmentApp"]
-
+__all__ = ["CostHistory", "EnvironmentApp", "StatusObservation", "StatusRollup"]
@@ -0,0 +1,26 @@
+import datetime
+from sqlalchemy import Column, Date, DateTime, Float, Integer, String, UniqueConstraint
+
+from db.base import Base
+
+
+class CostHistory(Base):
+    """
+    Daily cost of one resource within a Cost Management scope.
+
+    Every fetched day also gets a row with an empty ``resource_name`` holding the
+    scope's total for that day, so days with no spend are still recorded as fetched.
+    """
+
+    __tablename__ = "cost_history"
+    __table_args__ = (
+        UniqueConstraint("scope", "usage_date", "resource_name", name="uq_cost_history_scope_date_resource"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    scope = Column(String(512), nullable=False)
+    usage_date = Column(Date, nullable=False)
+    resource_name = Column(String(255), nullable=False, server_default="")
+    cost = Column(Float, nullable=False)
+    currency = Column(String(16), nullable=False)
+    fetched_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.datetime.now(datetime.timezone.utc))
@@ -1,5 +1,5 @@
 import datetime
-from sqlalchemy import Boolean, Column, Integer, String, DateTime
+from sqlalchemy import Boolean, Column, Index, Integer, String, DateTime
 
 from db.base import Base
 
@@ -8,13 +8,20 @@ class EnvironmentApp(Base):
     """Database representation of an environment application mapping."""
 
     __tablename__ = "environment_apps"
+    __table_args__ = (
+        Index(
+            "uq_environment_apps_resource_group_apps",
+            "resource_group", "frontend_app_name", "backend_app_name",
+            unique=True,
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), unique=True, nullable=False, index=True)
     resource_group = Column(String(255), nullable=False)
     frontend_app_name = Column(String(255), nullable=False)
     backend_app_name = Column(String(255), nullable=False)
-    type = Column(String(50), nullable=False, server_default="DEV")
-    is_active = Column(Boolean, nullable=False, default=True)
+    type = Column(String(50), nullable=False, server_default="DEV", index=True)
+    is_active = Column(Boolean, nullable=False, default=True, index=True)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.timezone.utc))
 
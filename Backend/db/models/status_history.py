@@ -0,0 +1,51 @@
+import datetime
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String, UniqueConstraint
+
+from db.base import Base
+
+
+class StatusObservation(Base):
+    """
+    One observed status of a container app. Rows are only ever inserted (in batches)
+    and deleted by retention once rolled up into :class:`StatusRollup`.
+    """
+
+    __tablename__ = "status_observations"
+    __table_args__ = (
+        Index(
+            "ix_status_observations_app_observed_at", "subscription_id", "resource_group", "app_name", "observed_at",
+        ),
+        # Rows arrive in observed_at order, so a BRIN index stays tiny and serves the rollup scans.
+        Index("ix_status_observations_observed_at", "observed_at", postgresql_using="brin"),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    subscription_id = Column(String(64), nullable=False, server_default="")
+    resource_group = Column(String(255), nullable=False)
+    app_name = Column(String(255), nullable=False)
+    status = Column(String(64), nullable=False)
+    observed_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.datetime.now(datetime.timezone.utc))
+
+
+class StatusRollup(Base):
+    """Observation counts of one app over an hour or a day (``resolution`` ``"hour"``/``"day"``)."""
+
+    __tablename__ = "status_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "resolution", "subscription_id", "resource_group", "app_name", "bucket_start",
+            name="uq_status_rollups_resolution_app_bucket",
+        ),
+        Index(
+            "ix_status_rollups_app_bucket", "subscription_id", "resource_group", "app_name", "resolution", "bucket_start",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    resolution = Column(String(8), nullable=False)
+    subscription_id = Column(String(64), nullable=False, server_default="")
+    resource_group = Column(String(255), nullable=False)
+    app_name = Column(String(255), nullable=False)
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    samples = Column(Integer, nullable=False)
+    up_samples = Column(Integer, nullable=False)
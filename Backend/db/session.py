@@ -1,27 +1,46 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator
+from typing import Any
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from core.config import get_settings
 
 settings = get_settings()
 
-engine = create_engine(settings.database_url, pool_pre_ping=True, future=True)
-SessionLocal = sessionmaker(
+
+def _async_database_url(url: str) -> str:
+    """Point plain or psycopg2 PostgreSQL URLs at psycopg 3, which has a native async driver."""
+    parsed = make_url(url)
+    if parsed.drivername in ("postgresql", "postgresql+psycopg2"):
+        parsed = parsed.set(drivername="postgresql+psycopg")
+    return parsed.render_as_string(hide_password=False)
+
+
+def _engine_options(url: str) -> dict[str, Any]:
+    options: dict[str, Any] = {"pool_pre_ping": True}
+    # SQLite stand-ins (sqlite+aiosqlite://) manage their own connection pool.
+    if not make_url(url).drivername.startswith("sqlite"):
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_recycle=settings.db_pool_recycle_seconds,
+            pool_timeout=settings.db_pool_timeout_seconds,
+        )
+    return options
+
+
+_database_url = _async_database_url(settings.database_url)
+engine = create_async_engine(_database_url, **_engine_options(_database_url))
+SessionLocal = async_sessionmaker(
     bind=engine,
-    autocommit=False,
     autoflush=False,
     expire_on_commit=False,
-    class_=Session,
+    class_=AsyncSession,
 )
 
 
-def get_db_session() -> Generator[Session, None, None]:
+async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     """Yield a SQLAlchemy session for request scope."""
-    session = SessionLocal()
-    try:
+    async with SessionLocal() as session:
         yield session
-    finally:
-        session.close()
-
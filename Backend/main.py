@@ -1,14 +1,36 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from api import api_router
-from core import get_settings
+from api.v1.endpoints.cost import cost_prefetch_scheduler
+from core import MetricsMiddleware, ProfilingMiddleware, get_settings, render_metrics, shutdown_executors
+from db import engine
+from services import status_history_recorder
 
 
 def create_application() -> FastAPI:
     settings = get_settings()
+
+    @asynccontextmanager
+    async def lifespan(_app: FastAPI):
+        if settings.cost_prefetch_enabled:
+            cost_prefetch_scheduler.start()
+        if settings.status_history_enabled:
+            status_history_recorder.start()
+        try:
+            yield
+        finally:
+            await cost_prefetch_scheduler.stop()
+            await status_history_recorder.stop()
+            shutdown_executors()
+            await engine.dispose()
+
     application = FastAPI(
         title=settings.project_name,
+        lifespan=lifespan,
         docs_url=settings.docs_url,
         openapi_url=settings.openapi_url,
         redoc_url=settings.redoc_url,
@@ -20,7 +42,18 @@ def create_application() -> FastAPI:
         allow_credentials=settings.cors_allow_credentials,
         allow_methods=settings.cors_allow_methods,
         allow_headers=settings.cors_allow_headers,
+        expose_headers=["X-Next-Cursor", "Server-Timing"],
     )
+    if settings.profiling_enabled:
+        application.add_middleware(
+            ProfilingMiddleware,
+            output_dir=settings.profiling_output_dir,
+            sample_rate=settings.profiling_sample_rate,
+            token=settings.profiling_token,
+        )
+    if settings.metrics_enabled:
+        # Added last so it wraps everything, including CORS preflights.
+        application.add_middleware(MetricsMiddleware)
 
     application.include_router(api_router, prefix="/api/v1")
 
@@ -28,6 +61,11 @@ def create_application() -> FastAPI:
     async def healthcheck():
         return {"status": "ok", "message": "System operational"}
 
+    if settings.metrics_enabled:
+        @application.get("/metrics", include_in_schema=False)
+        async def metrics():
+            return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
     return application
 
 
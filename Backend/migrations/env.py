@@ -7,7 +7,7 @@ from sqlalchemy import engine_from_config, pool
 
 from core import get_settings
 from db import Base
-from db.models import environment  # noqa: F401  Ensure models are imported for metadata
+from db.models import cost_history, environment, status_history  # noqa: F401  Ensure models are imported for metadata
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
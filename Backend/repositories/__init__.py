@@ -1,4 +1,5 @@
+from repositories.cost_history_repository import CostHistoryRepository
 from repositories.environment_repository import EnvironmentRepository
+from repositories.status_history_repository import StatusHistoryRepository
 
-__all__ = ["EnvironmentRepository"]
-
+__all__ = ["CostHistoryRepository", "EnvironmentRepository", "StatusHistoryRepository"]
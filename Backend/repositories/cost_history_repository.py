@@ -0,0 +1,49 @@
+import datetime
+from collections.abc import Sequence
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models import CostHistory
+
+
+class CostHistoryRepository:
+    """Data access layer for persisted daily cost history."""
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def list_days(self, scope: str, start: datetime.date, end: datetime.date) -> Sequence[CostHistory]:
+        """Return every stored row of ``scope`` with a usage date in ``[start, end]``."""
+        statement = (
+            select(CostHistory)
+            .where(
+                CostHistory.scope == scope,
+                CostHistory.usage_date >= start,
+                CostHistory.usage_date <= end,
+            )
+            .order_by(CostHistory.usage_date)
+        )
+        return (await self._session.scalars(statement)).all()
+
+    async def replace_days(
+        self,
+        scope: str,
+        start: datetime.date,
+        end: datetime.date,
+        rows: Sequence[CostHistory],
+    ) -> None:
+        """Atomically replace the rows of ``scope`` for ``[start, end]`` with freshly fetched ones."""
+        try:
+            await self._session.execute(
+                delete(CostHistory).where(
+                    CostHistory.scope == scope,
+                    CostHistory.usage_date >= start,
+                    CostHistory.usage_date <= end,
+                )
+            )
+            self._session.add_all(rows)
+            await self._session.commit()
+        except Exception:
+            await self._session.rollback()
+            raise
@@ -1,60 +1,107 @@
-from collections.abc import Sequence
-from typing import Optional
+from collections.abc import Mapping, Sequence
+from typing import Any, Optional
 
 from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.models import EnvironmentApp
 
+# Rows per INSERT statement; keeps bind parameters well under driver limits.
+_BULK_INSERT_BATCH = 500
+
 
 class EnvironmentRepository:
     """Data access layer for environment applications."""
 
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self._session = session
 
-    def create(self, environment: EnvironmentApp) -> EnvironmentApp:
+    async def create(self, environment: EnvironmentApp) -> EnvironmentApp:
         """Persist a new environment record."""
         self._session.add(environment)
         try:
-            self._session.commit()
+            await self._session.commit()
         except IntegrityError as exc:
-            self._session.rollback()
-            raise ValueError(f"Environment with name '{environment.name}' already exists.") from exc
-        self._session.refresh(environment)
+            await self._session.rollback()
+            raise ValueError(
+                f"Environment with name '{environment.name}' or with these apps already exists."
+            ) from exc
+        await self._session.refresh(environment)
         return environment
 
-    def get(self, env_id: int) -> Optional[EnvironmentApp]:
+    async def bulk_create(self, rows: Sequence[Mapping[str, Any]]) -> dict[str, int]:
+        """
+        Insert ``rows`` in one transaction, skipping any that conflict with an existing
+        name or app triple. Returns the ids of the inserted rows by environment name.
+        """
+        insert = postgresql.insert if self._session.bind.dialect.name == "postgresql" else sqlite.insert
+        created: dict[str, int] = {}
+        try:
+            for i in range(0, len(rows), _BULK_INSERT_BATCH):
+                statement = (
+                    insert(EnvironmentApp)
+                    .values(list(rows[i:i + _BULK_INSERT_BATCH]))
+                    .on_conflict_do_nothing()
+                    .returning(EnvironmentApp.id, EnvironmentApp.name)
+                )
+                created.update((name, env_id) for env_id, name in await self._session.execute(statement))
+            await self._session.commit()
+        except Exception:
+            await self._session.rollback()
+            raise
+        return created
+
+    async def get(self, env_id: int) -> Optional[EnvironmentApp]:
         """Fetch an environment by primary key."""
-        return self._session.get(EnvironmentApp, env_id)
+        return await self._session.get(EnvironmentApp, env_id)
 
-    def get_by_name(self, name: str) -> Optional[EnvironmentApp]:
+    async def get_by_name(self, name: str) -> Optional[EnvironmentApp]:
         """Fetch an environment by unique name."""
         statement = select(EnvironmentApp).where(EnvironmentApp.name == name)
-        return self._session.scalar(statement)
+        return await self._session.scalar(statement)
 
-    def get_by_details(self, resource_group: str, frontend_app: str, backend_app: str) -> Optional[EnvironmentApp]:
+    async def get_by_details(self, resource_group: str, frontend_app: str, backend_app: str) -> Optional[EnvironmentApp]:
         """Check for identical environment configuration."""
         statement = select(EnvironmentApp).where(
             EnvironmentApp.resource_group == resource_group,
             EnvironmentApp.frontend_app_name == frontend_app,
             EnvironmentApp.backend_app_name == backend_app
         )
-        return self._session.scalar(statement)
+        return await self._session.scalar(statement)
 
-    def list(self, skip: int = 0, limit: int = 100) -> Sequence[EnvironmentApp]:
-        """Return a paginated list of environments."""
+    async def list(
+        self,
+        after_id: Optional[int] = None,
+        limit: int = 100,
+        type: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        resource_group: Optional[str] = None,
+    ) -> Sequence[EnvironmentApp]:
+        """Return up to ``limit`` environments with an id greater than ``after_id``, in id order."""
+        statement = select(EnvironmentApp)
+        if after_id is not None:
+            statement = statement.where(EnvironmentApp.id > after_id)
+        if type is not None:
+            statement = statement.where(EnvironmentApp.type == type)
+        if is_active is not None:
+            statement = statement.where(EnvironmentApp.is_active.is_(is_active))
+        if resource_group is not None:
+            statement = statement.where(EnvironmentApp.resource_group == resource_group)
+        statement = statement.order_by(EnvironmentApp.id).limit(limit if limit > 0 else 100)
+        return (await self._session.scalars(statement)).all()
+
+    async def list_resource_groups(self) -> Sequence[str]:
+        """Return the distinct resource groups of active environments."""
         statement = (
-            select(EnvironmentApp)
-            .offset(max(skip, 0))
-            .limit(limit if limit > 0 else 100)
-            .order_by(EnvironmentApp.id)
+            select(EnvironmentApp.resource_group)
+            .where(EnvironmentApp.is_active.is_(True))
+            .distinct()
         )
-        return self._session.scalars(statement).all()
+        return (await self._session.scalars(statement)).all()
 
-    def delete(self, environment: EnvironmentApp) -> None:
+    async def delete(self, environment: EnvironmentApp) -> None:
         """Remove an environment from the database."""
-        self._session.delete(environment)
-        self._session.commit()
-
+        await self._session.delete(environment)
+        await self._session.commit()
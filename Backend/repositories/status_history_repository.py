@@ -0,0 +1,187 @@
+import datetime
+from collections.abc import Mapping, Sequence
+from typing import Any, Optional
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models import StatusObservation, StatusRollup
+
+# Statuses counted as "up". Older API versions only report a provisioning state.
+UP_STATUSES = ("running", "succeeded")
+
+
+class StatusHistoryRepository:
+    """Data access layer for container app status observations and their rollups."""
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def add_observations(self, rows: Sequence[Mapping[str, Any]]) -> None:
+        """Insert a batch of observations as one multi-row statement."""
+        try:
+            await self._session.execute(insert(StatusObservation), list(rows))
+            await self._session.commit()
+        except Exception:
+            await self._session.rollback()
+            raise
+
+    async def earliest_observation(self, since: Optional[datetime.datetime] = None) -> Optional[datetime.datetime]:
+        """Time of the oldest observation (at or after ``since``)."""
+        statement = select(func.min(StatusObservation.observed_at))
+        if since is not None:
+            statement = statement.where(StatusObservation.observed_at >= since)
+        return await self._session.scalar(statement)
+
+    async def latest_bucket(self, resolution: str) -> Optional[datetime.datetime]:
+        """Start of the newest rolled-up bucket of ``resolution`` across all apps."""
+        return await self._session.scalar(
+            select(func.max(StatusRollup.bucket_start)).where(StatusRollup.resolution == resolution)
+        )
+
+    async def earliest_bucket(
+        self,
+        resolution: str,
+        since: Optional[datetime.datetime] = None,
+    ) -> Optional[datetime.datetime]:
+        """Start of the oldest rolled-up bucket of ``resolution`` (at or after ``since``)."""
+        statement = select(func.min(StatusRollup.bucket_start)).where(StatusRollup.resolution == resolution)
+        if since is not None:
+            statement = statement.where(StatusRollup.bucket_start >= since)
+        return await self._session.scalar(statement)
+
+    async def count_observations(
+        self,
+        start: datetime.datetime,
+        end: datetime.datetime,
+    ) -> Sequence[tuple[str, str, str, int, int]]:
+        """``(subscription, resource group, app, samples, up samples)`` per app for observations in ``[start, end)``."""
+        statement = (
+            select(
+                StatusObservation.subscription_id,
+                StatusObservation.resource_group,
+                StatusObservation.app_name,
+                func.count(),
+                func.sum(case((func.lower(StatusObservation.status).in_(UP_STATUSES), 1), else_=0)),
+            )
+            .where(StatusObservation.observed_at >= start, StatusObservation.observed_at < end)
+            .group_by(StatusObservation.subscription_id, StatusObservation.resource_group, StatusObservation.app_name)
+        )
+        return [tuple(row) for row in await self._session.execute(statement)]
+
+    async def count_rollups(
+        self,
+        resolution: str,
+        start: datetime.datetime,
+        end: datetime.datetime,
+    ) -> Sequence[tuple[str, str, str, int, int]]:
+        """``(subscription, resource group, app, samples, up samples)`` per app over rollups in ``[start, end)``."""
+        statement = (
+            select(
+                StatusRollup.subscription_id,
+                StatusRollup.resource_group,
+                StatusRollup.app_name,
+                func.sum(StatusRollup.samples),
+                func.sum(StatusRollup.up_samples),
+            )
+            .where(
+                StatusRollup.resolution == resolution,
+                StatusRollup.bucket_start >= start,
+                StatusRollup.bucket_start < end,
+            )
+            .group_by(StatusRollup.subscription_id, StatusRollup.resource_group, StatusRollup.app_name)
+        )
+        return [tuple(row) for row in await self._session.execute(statement)]
+
+    async def replace_bucket(
+        self,
+        resolution: str,
+        bucket_start: datetime.datetime,
+        counts: Sequence[tuple[str, str, str, int, int]],
+    ) -> None:
+        """Atomically replace every app's rollup of ``resolution`` starting at ``bucket_start``."""
+        try:
+            await self._session.execute(
+                delete(StatusRollup).where(
+                    StatusRollup.resolution == resolution,
+                    StatusRollup.bucket_start == bucket_start,
+                )
+            )
+            if counts:
+                await self._session.execute(
+                    insert(StatusRollup),
+                    [
+                        {
+                            "resolution": resolution,
+                            "subscription_id": subscription_id,
+                            "resource_group": resource_group,
+                            "app_name": app_name,
+                            "bucket_start": bucket_start,
+                            "samples": samples,
+                            "up_samples": up_samples,
+                        }
+                        for subscription_id, resource_group, app_name, samples, up_samples in counts
+                    ],
+                )
+            await self._session.commit()
+        except Exception:
+            await self._session.rollback()
+            raise
+
+    async def delete_observations_before(self, cutoff: datetime.datetime) -> int:
+        result = await self._session.execute(delete(StatusObservation).where(StatusObservation.observed_at < cutoff))
+        await self._session.commit()
+        return result.rowcount
+
+    async def delete_rollups_before(self, resolution: str, cutoff: datetime.datetime) -> int:
+        result = await self._session.execute(
+            delete(StatusRollup).where(StatusRollup.resolution == resolution, StatusRollup.bucket_start < cutoff)
+        )
+        await self._session.commit()
+        return result.rowcount
+
+    async def list_observations(
+        self,
+        subscription_id: str,
+        resource_group: str,
+        app_name: str,
+        start: datetime.datetime,
+        end: datetime.datetime,
+    ) -> Sequence[tuple[datetime.datetime, str]]:
+        """``(observed at, status)`` of one app in ``[start, end)``, oldest first."""
+        statement = (
+            select(StatusObservation.observed_at, StatusObservation.status)
+            .where(
+                StatusObservation.subscription_id == subscription_id,
+                StatusObservation.resource_group == resource_group,
+                StatusObservation.app_name == app_name,
+                StatusObservation.observed_at >= start,
+                StatusObservation.observed_at < end,
+            )
+            .order_by(StatusObservation.observed_at)
+        )
+        return [tuple(row) for row in await self._session.execute(statement)]
+
+    async def list_rollups(
+        self,
+        subscription_id: str,
+        resource_group: str,
+        app_name: str,
+        resolution: str,
+        start: datetime.datetime,
+        end: datetime.datetime,
+    ) -> Sequence[tuple[datetime.datetime, int, int]]:
+        """``(bucket start, samples, up samples)`` of one app in ``[start, end)``, oldest first."""
+        statement = (
+            select(StatusRollup.bucket_start, StatusRollup.samples, StatusRollup.up_samples)
+            .where(
+                StatusRollup.subscription_id == subscription_id,
+                StatusRollup.resource_group == resource_group,
+                StatusRollup.app_name == app_name,
+                StatusRollup.resolution == resolution,
+                StatusRollup.bucket_start >= start,
+                StatusRollup.bucket_start < end,
+            )
+            .order_by(StatusRollup.bucket_start)
+        )
+        return [tuple(row) for row in await self._session.execute(statement)]
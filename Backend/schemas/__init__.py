@@ -1,14 +1,20 @@
 from schemas.environment import (
     ContainerStatus,
+    DiscoveryImportRequest,
     EnvironmentBase,
     EnvironmentCreate,
+    EnvironmentImportResponse,
+    EnvironmentImportResult,
     EnvironmentRead,
 )
 
 __all__ = [
     "ContainerStatus",
+    "DiscoveryImportRequest",
     "EnvironmentBase",
     "EnvironmentCreate",
+    "EnvironmentImportResponse",
+    "EnvironmentImportResult",
     "EnvironmentRead",
 ]
 
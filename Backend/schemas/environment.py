@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -32,3 +32,30 @@ class ContainerStatus(BaseModel):
     frontend_status: str
     backend_status: str
 
+
+
+class EnvironmentImportResult(BaseModel):
+    """Outcome of one row of a bulk import, in request order."""
+
+    index: int
+    name: Optional[str] = None
+    status: Literal["created", "skipped", "invalid"]
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class EnvironmentImportResponse(BaseModel):
+    created: int
+    skipped: int
+    invalid: int
+    results: list[EnvironmentImportResult]
+
+
+class DiscoveryImportRequest(BaseModel):
+    """Pair discovered container apps into environments by naming convention."""
+
+    subscription_id: Optional[str] = Field(None, description="Only pair apps of this subscription")
+    resource_group: Optional[str] = Field(None, description="Only pair apps of this resource group")
+    frontend_token: str = Field("frontend", min_length=1, example="frontend")
+    backend_token: str = Field("backend", min_length=1, example="backend")
+    type: str = Field("DEV", example="QA")
@@ -1,5 +1,31 @@
 from services.azure_service import AzureContainerAppService
-from services.environment_service import EnvironmentService
+from services.cost_analytics import CostAnalytics, CostMatrix, analyze as analyze_costs
+from services.cost_prefetch import CostPrefetchScheduler, CostRateLimiter, known_cost_scopes
+from services.cost_rows import GroupedCosts, parse_grouped_pages
+from services.environment_service import EnvironmentService, pair_discovered_apps
+from services.kql import KqlQuery
+from services.metric_series import downsample as downsample_series
+from services.status_history import StatusHistory, StatusHistoryRecorder, status_history_recorder
+from services.log_patterns import LogCluster, LogTemplateMiner
 
-__all__ = ["AzureContainerAppService", "EnvironmentService"]
+__all__ = [
+    "AzureContainerAppService",
+    "CostAnalytics",
+    "CostMatrix",
+    "CostPrefetchScheduler",
+    "CostRateLimiter",
+    "EnvironmentService",
+    "GroupedCosts",
+    "KqlQuery",
+    "LogCluster",
+    "LogTemplateMiner",
+    "StatusHistory",
+    "StatusHistoryRecorder",
+    "analyze_costs",
+    "downsample_series",
+    "known_cost_scopes",
+    "pair_discovered_apps",
+    "parse_grouped_pages",
+    "status_history_recorder",
+]
 
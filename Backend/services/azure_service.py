@@ -1,10 +1,14 @@
 import asyncio
 import logging
-from typing import Optional
+from contextlib import nullcontext
+from typing import Any, Optional
  
 from azure.core.credentials import TokenCredential
 from azure.mgmt.appcontainers import ContainerAppsAPIClient
 from azure.mgmt.appcontainers.models import ContainerApp
+
+from core import ExecutorSaturated, get_executor, get_settings, management_client_options
+from services.status_history import status_history_recorder
  
 logger = logging.getLogger(__name__)
  
@@ -20,21 +24,26 @@ class AzureContainerAppService:
         self._credential = credential
         self._subscription_id = subscription_id
  
-    def _build_client(self) -> ContainerAppsAPIClient:
+    def _build_client(self, subscription_id: Optional[str] = None) -> ContainerAppsAPIClient:
         return ContainerAppsAPIClient(
             credential=self._credential,
-            subscription_id=self._subscription_id,
+            subscription_id=subscription_id or self._subscription_id,
+            **management_client_options(get_settings()),
         )
  
-    async def get_app_status(self, resource_group: str, app_name: str) -> str:
-        """Return the running/provisioning state for a container app."""
-        client = self._build_client()
+    async def get_app_status(self, resource_group: str, app_name: str, subscription_id: Optional[str] = None) -> str:
+        """
+        Return the running/provisioning state for a container app in ``subscription_id``
+        (by default the service's subscription); the observation is recorded under it.
+        """
+        subscription_id = subscription_id or self._subscription_id
+        client = self._build_client(subscription_id)
  
         def _invoke() -> Optional[ContainerApp]:
             return client.container_apps.get(resource_group, app_name)
  
         try:
-            app = await asyncio.to_thread(_invoke)
+            app = await get_executor("discovery").run("arm", "container_apps.get", _invoke)
             if app is None:
                 return "Unknown"
  
@@ -42,18 +51,94 @@ class AzureContainerAppService:
             if not status or status.lower() == "unknown":
                 status = getattr(app, "provisioning_state", "Unknown")
  
+            status_history_recorder.record(subscription_id, resource_group, app_name, str(status))
             return status
+        except ExecutorSaturated:
+            raise
         except Exception:  # noqa: BLE001
             logger.exception("Error fetching status for app '%s'", app_name)
             return "Error"
  
+    async def get_revision_inventory(
+        self,
+        resource_group: str,
+        app_name: str,
+        semaphore: Optional[asyncio.Semaphore] = None,
+    ) -> dict[str, Any]:
+        """
+        Revisions, traffic split and replicas of a container app.
+
+        The app and its revision list are fetched in parallel, then the replica lists
+        of every active revision; ``semaphore`` caps how many calls run at once.
+        """
+        client = self._build_client()
+
+        async def _call(operation, fn, *args):
+            async with semaphore or nullcontext():
+                return await get_executor("discovery").run("arm", operation, fn, *args)
+
+        app, revisions = await asyncio.gather(
+            _call("container_apps.get", client.container_apps.get, resource_group, app_name),
+            _call(
+                "container_apps_revisions.list",
+                lambda: list(client.container_apps_revisions.list_revisions(resource_group, app_name)),
+            ),
+        )
+        active = [revision for revision in revisions if revision.active]
+        replica_lists = await asyncio.gather(*(
+            _call(
+                "container_apps_revision_replicas.list",
+                client.container_apps_revision_replicas.list_replicas, resource_group, app_name, revision.name,
+            )
+            for revision in active
+        ))
+        replicas = {
+            revision.name: [replica.name for replica in (collection.value or [])]
+            for revision, collection in zip(active, replica_lists)
+        }
+
+        configuration = getattr(app, "configuration", None)
+        ingress = getattr(configuration, "ingress", None)
+        return {
+            "app_name": app_name,
+            "resource_group": resource_group,
+            "subscription_id": self._subscription_id,
+            "revision_mode": str(getattr(configuration, "active_revisions_mode", None) or "Single"),
+            "latest_revision": getattr(app, "latest_revision_name", None),
+            "latest_ready_revision": getattr(app, "latest_ready_revision_name", None),
+            "traffic": [
+                {
+                    "revision_name": weight.revision_name,
+                    "latest_revision": bool(weight.latest_revision),
+                    "label": weight.label,
+                    "weight": weight.weight or 0,
+                }
+                for weight in (getattr(ingress, "traffic", None) or [])
+            ],
+            "revisions": [
+                {
+                    "name": revision.name,
+                    "active": bool(revision.active),
+                    "created_time": revision.created_time.isoformat() if revision.created_time else None,
+                    "traffic_weight": revision.traffic_weight or 0,
+                    "running_state": str(getattr(revision, "running_state", None) or "Unknown"),
+                    "health_state": str(getattr(revision, "health_state", None) or "Unknown"),
+                    "replica_count": len(replicas[revision.name]) if revision.name in replicas else (revision.replicas or 0),
+                    "replicas": replicas.get(revision.name, []),
+                }
+                for revision in sorted(revisions, key=lambda r: r.created_time.isoformat() if r.created_time else "", reverse=True)
+            ],
+        }
+
     async def restart_app(self, resource_group: str, app_name: str) -> bool:
         """Restart (stop then start) an Azure Container App."""
         client = self._build_client()
         try:
-            await asyncio.to_thread(lambda: client.container_apps.begin_stop(resource_group, app_name).wait())
-            await asyncio.to_thread(lambda: client.container_apps.begin_start(resource_group, app_name).wait())
+            await get_executor("lifecycle").run("arm", "container_apps.stop", lambda: client.container_apps.begin_stop(resource_group, app_name).wait())
+            await get_executor("lifecycle").run("arm", "container_apps.start", lambda: client.container_apps.begin_start(resource_group, app_name).wait())
             return True
+        except ExecutorSaturated:
+            raise
         except Exception:  # noqa: BLE001
             logger.exception("Error restarting app '%s'", app_name)
             return False
@@ -62,8 +147,10 @@ class AzureContainerAppService:
         """Stop an Azure Container App."""
         client = self._build_client()
         try:
-            await asyncio.to_thread(lambda: client.container_apps.begin_stop(resource_group, app_name).wait())
+            await get_executor("lifecycle").run("arm", "container_apps.stop", lambda: client.container_apps.begin_stop(resource_group, app_name).wait())
             return True
+        except ExecutorSaturated:
+            raise
         except Exception:  # noqa: BLE001
             logger.exception("Error stopping app '%s'", app_name)
             return False
@@ -72,8 +159,10 @@ class AzureContainerAppService:
         """Start an Azure Container App."""
         client = self._build_client()
         try:
-            await asyncio.to_thread(lambda: client.container_apps.begin_start(resource_group, app_name).wait())
+            await get_executor("lifecycle").run("arm", "container_apps.start", lambda: client.container_apps.begin_start(resource_group, app_name).wait())
             return True
+        except ExecutorSaturated:
+            raise
         except Exception:  # noqa: BLE001
             logger.exception("Error starting app '%s'", app_name)
             return False
@@ -0,0 +1,209 @@
+import datetime
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from services.cost_rows import GroupedCosts
+
+# 1.4826 * MAD estimates the standard deviation of normally distributed data.
+_MAD_SCALE = 1.4826
+# sqrt(pi / 2) * mean absolute deviation does the same; used when the MAD is 0.
+_MEAN_AD_SCALE = 1.2533
+
+
+@dataclass(frozen=True)
+class CostMatrix:
+    """Daily cost per resource: ``costs[r, d]`` is resource ``names[r]`` on ``dates[d]``."""
+
+    dates: np.ndarray  # datetime64[D], one entry per day of the window
+    names: list[str]
+    costs: np.ndarray  # float64, shape (len(names), len(dates))
+
+    @classmethod
+    def from_grouped(cls, grouped: GroupedCosts, start: datetime.date, end: datetime.date) -> "CostMatrix":
+        """
+        Align a plan's resource x day matrix to ``start``..``end``; days it lacks are zero.
+        Resources are keyed by name, so same-named resources in different resource groups
+        are added together; resources without any cost in the window are left out.
+        """
+        dates = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+        day = (np.asarray(grouped.dates, dtype="datetime64[D]") - dates[0]).astype(np.int64)
+        in_window = (day >= 0) & (day < len(dates))
+        source = grouped.matrix[:, in_window]
+        active = np.flatnonzero(source.any(axis=1))
+        names, inverse = np.unique(
+            np.asarray([grouped.resources[r][1] or "unknown" for r in active.tolist()], dtype=str), return_inverse=True
+        )
+        costs = np.zeros((len(names), len(dates)))
+        np.add.at(costs, (inverse[:, None], day[in_window][None, :]), source[active])
+        return cls(dates=dates, names=names.tolist(), costs=costs)
+
+    def since(self, start: datetime.date) -> "CostMatrix":
+        """The days from ``start`` onwards (a view, not a copy)."""
+        first = max(int((np.datetime64(start, "D") - self.dates[0]).astype(np.int64)), 0)
+        return CostMatrix(dates=self.dates[first:], names=self.names, costs=self.costs[:, first:])
+
+
+@dataclass(frozen=True)
+class PeriodTotals:
+    starts: np.ndarray  # datetime64[D] first day of each period
+    costs: np.ndarray
+
+
+@dataclass(frozen=True)
+class Forecast:
+    month: np.datetime64
+    actual_to_date: float
+    daily_run_rate: float
+    days_remaining: int
+    projected_total: float
+
+
+@dataclass(frozen=True)
+class Anomalies:
+    resource: np.ndarray  # index into ``CostMatrix.names``
+    day: np.ndarray  # index into ``CostMatrix.dates``
+    change: np.ndarray
+    score: np.ndarray
+
+
+@dataclass(frozen=True)
+class CostAnalytics:
+    totals: np.ndarray
+    rolling_average: np.ndarray
+    change: np.ndarray
+    anomaly: np.ndarray  # bool per day
+    weekly: PeriodTotals
+    monthly: PeriodTotals
+    resource_totals: np.ndarray
+    resource_share: np.ndarray
+    last_day: int  # index of the last day with any cost, -1 if none
+    forecast: Forecast
+    resource_anomalies: Anomalies
+
+
+def _trailing_mean(values: np.ndarray, window: int) -> np.ndarray:
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    upper = np.arange(1, len(values) + 1)
+    lower = np.maximum(upper - window, 0)
+    return (cumulative[upper] - cumulative[lower]) / (upper - lower)
+
+
+def _robust_scores(changes: np.ndarray) -> np.ndarray:
+    """
+    Per-row robust z-scores of ``changes`` (2-D, one series per row).
+
+    Uses the median absolute deviation, falling back to the mean absolute deviation for
+    rows that are mostly flat; rows without any variation score 0 everywhere.
+    """
+    median = np.median(changes, axis=1, keepdims=True)
+    deviation = np.abs(changes - median)
+    scale = np.median(deviation, axis=1, keepdims=True) * _MAD_SCALE
+    fallback = deviation.mean(axis=1, keepdims=True) * _MEAN_AD_SCALE
+    scale = np.where(scale > 0, scale, fallback)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(scale > 0, (changes - median) / scale, 0.0)
+    return scores
+
+
+def _period_totals(period_starts: np.ndarray, totals: np.ndarray) -> PeriodTotals:
+    starts, inverse = np.unique(period_starts, return_inverse=True)
+    return PeriodTotals(starts=starts, costs=np.bincount(inverse, weights=totals, minlength=len(starts)))
+
+
+def _last_reported_day(totals: np.ndarray) -> int:
+    reported = np.flatnonzero(totals > 0)
+    return int(reported[-1]) if len(reported) else -1
+
+
+def _forecast(matrix: CostMatrix, rolling_days: int) -> Forecast:
+    """Month-to-date actuals plus the trailing run rate over the rest of the month."""
+    dates = matrix.dates
+    totals = matrix.costs.sum(axis=0) if len(matrix.names) else np.zeros(len(dates))
+    last_day = _last_reported_day(totals)
+    span = last_day + 1
+
+    anchor = dates[last_day] if last_day >= 0 else dates[-1]
+    month = anchor.astype("datetime64[M]")
+    in_month = dates.astype("datetime64[M]") == month
+    run_rate = float(totals[max(span - rolling_days, 0):span].mean()) if span else 0.0
+    month_end = (month + 1).astype("datetime64[D]") - 1
+    days_remaining = int((month_end - anchor).astype(np.int64))
+    actual_to_date = float(totals[in_month].sum())
+    return Forecast(
+        month=month,
+        actual_to_date=actual_to_date,
+        daily_run_rate=run_rate,
+        days_remaining=days_remaining,
+        projected_total=actual_to_date + run_rate * days_remaining,
+    )
+
+
+def analyze(
+    matrix: CostMatrix,
+    rolling_days: int = 7,
+    anomaly_threshold: float = 3.5,
+    max_anomalies: int = 50,
+    history: Optional[CostMatrix] = None,
+) -> CostAnalytics:
+    """
+    Rollups, shares, a month-end forecast and day-over-day anomalies for ``matrix``.
+
+    Trailing days without any cost are treated as not yet reported (Cost Management lags
+    by a day or two): they are left out of anomaly detection and the forecast run rate.
+    The forecast is computed from ``history`` when given — a longer matrix ending on the
+    same day, e.g. one reaching back to the first of the month.
+    """
+    costs = matrix.costs
+    dates = matrix.dates
+    totals = costs.sum(axis=0) if len(matrix.names) else np.zeros(len(dates))
+
+    last_day = _last_reported_day(totals)
+    span = last_day + 1
+
+    change = np.diff(totals, prepend=totals[:1])
+    anomaly = np.zeros(len(dates), dtype=bool)
+    if span > 2:
+        scores = _robust_scores(change[None, 1:span])[0]
+        anomaly[1:span] = np.abs(scores) > anomaly_threshold
+
+    # Weeks start on Monday; 1970-01-01 was a Thursday.
+    weekday = (dates.astype(np.int64) + 3) % 7
+    weekly = _period_totals(dates - weekday.astype("timedelta64[D]"), totals)
+    monthly = _period_totals(dates.astype("datetime64[M]").astype("datetime64[D]"), totals)
+
+    resource_totals = costs.sum(axis=1)
+    grand_total = resource_totals.sum()
+    resource_share = resource_totals / grand_total if grand_total > 0 else np.zeros_like(resource_totals)
+
+    forecast = _forecast(history if history is not None else matrix, rolling_days)
+
+    if span > 2 and len(matrix.names):
+        resource_changes = np.diff(costs[:, :span], axis=1)
+        resource_scores = _robust_scores(resource_changes)
+        # Ignore sub-cent jitter on resources that barely cost anything.
+        flagged = (np.abs(resource_scores) > anomaly_threshold) & (np.abs(resource_changes) >= 0.01)
+        rows, cols = np.nonzero(flagged)
+        order = np.argsort(-np.abs(resource_scores[rows, cols]))[:max_anomalies]
+        rows, cols = rows[order], cols[order]
+        resource_anomalies = Anomalies(
+            resource=rows, day=cols + 1, change=resource_changes[rows, cols], score=resource_scores[rows, cols]
+        )
+    else:
+        empty = np.zeros(0)
+        resource_anomalies = Anomalies(resource=empty.astype(np.int64), day=empty.astype(np.int64), change=empty, score=empty)
+
+    return CostAnalytics(
+        totals=totals,
+        rolling_average=_trailing_mean(totals, rolling_days),
+        change=change,
+        anomaly=anomaly,
+        weekly=weekly,
+        monthly=monthly,
+        resource_totals=resource_totals,
+        resource_share=resource_share,
+        last_day=last_day,
+        forecast=forecast,
+        resource_anomalies=resource_anomalies,
+    )
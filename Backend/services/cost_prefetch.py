@@ -0,0 +1,298 @@
+import asyncio
+import datetime
+import json
+import logging
+import re
+import threading
+import time
+from collections.abc import Awaitable, Callable, Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from typing import Optional
+
+from core import CacheBackend
+
+logger = logging.getLogger(__name__)
+
+_HEADER_PREFIX = "x-ms-ratelimit-microsoft.costmanagement-"
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+# How often background work re-checks whether interactive requests are still running.
+_INTERACTIVE_POLL_SECONDS = 1.0
+
+# Shared-tier keys. The quota pause is a wall-clock deadline every worker honours.
+_QUOTA_PAUSE_KEY = "cost-quota:paused-until"
+# How long a worker trusts its copy of the shared quota pause before reading it again.
+_QUOTA_SYNC_SECONDS = 1.0
+_PREFETCH_RUN_KEY = "cost-prefetch:run"
+_PREFETCH_SCOPES_KEY = "cost-prefetch:scopes"
+# The daily run lock outlives the day it is for, so a restarted worker does not run it again.
+_PREFETCH_RUN_LOCK_SECONDS = 26 * 3600.0
+_PREFETCH_SCOPES_TTL_SECONDS = 3 * 86400.0
+# Workers wake at the same time; the elected one gives the others this long to publish their scopes.
+_PREFETCH_SETTLE_SECONDS = 10.0
+
+
+class CostRateLimiter:
+    """
+    Tracks the Cost Management quota reported on every response and decides when
+    background work (and bulk work, via :meth:`wait_for_quota`) may send its next query.
+
+    Responses carry ``x-ms-ratelimit-microsoft.costmanagement-qpu-remaining`` and, once a
+    quota is exhausted, ``...-entity-retry-after`` / ``-tenant-retry-after`` /
+    ``-client-retry-after`` in seconds. Interactive requests are never delayed; they
+    register while in flight so background work yields to them.
+
+    The quota belongs to the identity, not the process, so with a ``shared`` tier a pause
+    observed by one worker is published there and honoured by every worker's waits.
+    Interactive requests are tracked per worker.
+    """
+
+    def __init__(
+        self,
+        low_qpu_remaining: float = 10.0,
+        low_qpu_pause_seconds: float = 60.0,
+        shared: Optional[CacheBackend] = None,
+    ) -> None:
+        self._low_qpu_remaining = low_qpu_remaining
+        self._low_qpu_pause_seconds = low_qpu_pause_seconds
+        self._shared = shared
+        self._lock = threading.Lock()
+        self._retry_at = 0.0  # wall clock, comparable across workers
+        self._synced_at = 0.0
+        self._interactive = 0
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        """Record the quota headers of one Cost Management response (blocking with a shared tier)."""
+        now = time.time()
+        for name, value in headers.items():
+            name = name.lower()
+            if not name.startswith(_HEADER_PREFIX):
+                continue
+            numbers = [float(n) for n in _NUMBER_RE.findall(value)]
+            if not numbers:
+                continue
+            suffix = name[len(_HEADER_PREFIX):]
+            if suffix.endswith("retry-after"):
+                self._pause_until(now + max(numbers))
+            elif suffix == "qpu-remaining" and min(numbers) < self._low_qpu_remaining:
+                # The quota refills over time; leave it alone for a while instead of draining it.
+                self._pause_until(now + self._low_qpu_pause_seconds)
+
+    def observe_response(self, pipeline_response) -> None:
+        """``raw_response_hook`` for Azure SDK calls."""
+        self.observe(pipeline_response.http_response.headers)
+
+    def _pause_until(self, deadline: float) -> None:
+        with self._lock:
+            if deadline <= self._retry_at:
+                return
+            self._retry_at = deadline
+        logger.info("Cost Management quota low; holding off queries for %.0fs", deadline - time.time())
+        if self._shared is None:
+            return
+        try:
+            current = self._shared.get(_QUOTA_PAUSE_KEY)
+            if current is None or float(current) < deadline:
+                self._shared.set(_QUOTA_PAUSE_KEY, repr(deadline).encode(), deadline - time.time())
+        except Exception:  # noqa: BLE001
+            logger.warning("Could not publish the Cost Management quota pause", exc_info=True)
+
+    def _sync(self) -> None:
+        """Adopt a longer pause another worker published in the shared tier (blocking)."""
+        try:
+            data = self._shared.get(_QUOTA_PAUSE_KEY)
+        except Exception:  # noqa: BLE001
+            logger.warning("Could not read the shared Cost Management quota pause", exc_info=True)
+            return
+        finally:
+            self._synced_at = time.monotonic()
+        if data:
+            with self._lock:
+                self._retry_at = max(self._retry_at, float(data))
+
+    async def _refresh(self) -> None:
+        if self._shared is not None and time.monotonic() - self._synced_at >= _QUOTA_SYNC_SECONDS:
+            await asyncio.to_thread(self._sync)
+
+    @contextmanager
+    def interactive(self) -> Iterator[None]:
+        """Mark a user-facing query as in flight for the duration of the block."""
+        with self._lock:
+            self._interactive += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._interactive -= 1
+
+    def quota_delay(self) -> float:
+        """Seconds until Cost Management accepts queries again; ``0`` if it does now."""
+        with self._lock:
+            return max(self._retry_at - time.time(), 0.0)
+
+    async def wait_for_quota(self) -> None:
+        await self._refresh()
+        while (delay := self.quota_delay()) > 0:
+            await asyncio.sleep(delay)
+            await self._refresh()
+
+    def background_delay(self) -> float:
+        """Seconds background work should wait before its next query; ``0`` if it may go now."""
+        with self._lock:
+            delay = self._retry_at - time.time()
+            if self._interactive:
+                delay = max(delay, _INTERACTIVE_POLL_SECONDS)
+        return max(delay, 0.0)
+
+    async def wait_for_background(self) -> None:
+        await self._refresh()
+        while (delay := self.background_delay()) > 0:
+            await asyncio.sleep(delay)
+            await self._refresh()
+
+
+class KnownCostScopes:
+    """Subscriptions and resource groups users have looked at, as candidates for prefetching."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._scopes: set[tuple[str, Optional[str]]] = set()
+
+    def add(self, subscription_id: str, resource_group: Optional[str] = None) -> None:
+        with self._lock:
+            self._scopes.add((subscription_id, resource_group or None))
+
+    def update(self, scopes: Iterable[tuple[str, Optional[str]]]) -> None:
+        for subscription_id, resource_group in scopes:
+            self.add(subscription_id, resource_group)
+
+    def snapshot(self) -> list[tuple[str, Optional[str]]]:
+        with self._lock:
+            return list(self._scopes)
+
+
+known_cost_scopes = KnownCostScopes()
+
+
+class CostPrefetchScheduler:
+    """
+    Re-warms cost caches shortly after each UTC day rollover, one subscription at a time.
+
+    ``scopes`` returns the ``(subscription, resource group or None)`` pairs to warm and
+    ``warm`` fills the caches for one subscription and its resource groups; pacing against
+    the quota and interactive traffic is left to ``warm``'s use of :class:`CostRateLimiter`.
+
+    Every uvicorn worker runs a scheduler, but with a ``shared`` tier only one of them
+    warms per day: each publishes the scopes it knows about, and the worker that takes the
+    day's run lock warms all of them. Without a shared tier every worker warms on its own.
+    """
+
+    def __init__(
+        self,
+        scopes: Callable[[], Awaitable[Iterable[tuple[str, Optional[str]]]]],
+        warm: Callable[[str, list[str]], Awaitable[None]],
+        delay_seconds: float,
+        interval_seconds: float,
+        shared: Optional[CacheBackend] = None,
+    ) -> None:
+        self._scopes = scopes
+        self._warm = warm
+        self._delay_seconds = delay_seconds
+        self._interval_seconds = interval_seconds
+        self._shared = shared
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="cost-prefetch")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _seconds_until_next_run(self) -> float:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        midnight = (now + datetime.timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return (midnight - now).total_seconds() + self._delay_seconds
+
+    async def _run(self) -> None:
+        # A freshly started deployment warms right away; after that, once per UTC day.
+        while True:
+            try:
+                await self._run_cycle()
+            except Exception:
+                logger.exception("Cost prefetch run failed")
+            await asyncio.sleep(self._seconds_until_next_run())
+
+    async def _run_cycle(self) -> None:
+        scopes = list(await self._scopes())
+        if self._shared is None:
+            await self.run_once(scopes)
+            return
+
+        await asyncio.to_thread(self._publish_scopes, scopes)
+        day = datetime.datetime.now(datetime.timezone.utc).date().isoformat()
+        try:
+            elected = await asyncio.to_thread(
+                self._shared.try_lock, f"{_PREFETCH_RUN_KEY}:{day}", _PREFETCH_RUN_LOCK_SECONDS
+            )
+        except Exception:  # noqa: BLE001
+            # Without the lock every worker would prefetch; skipping a day only costs warm caches.
+            logger.warning("Cost prefetch for %s skipped: shared cache unavailable", day, exc_info=True)
+            return
+        if not elected:
+            logger.debug("Cost prefetch for %s runs in another worker", day)
+            return
+
+        await asyncio.sleep(_PREFETCH_SETTLE_SECONDS)
+        published = await asyncio.to_thread(self._published_scopes)
+        await self.run_once([*scopes, *published])
+
+    def _published_scopes(self) -> list[tuple[str, Optional[str]]]:
+        try:
+            data = self._shared.get(_PREFETCH_SCOPES_KEY)
+        except Exception:  # noqa: BLE001
+            logger.warning("Could not read the published cost prefetch scopes", exc_info=True)
+            return []
+        return [(subscription_id, resource_group) for subscription_id, resource_group in json.loads(data or "[]")]
+
+    def _publish_scopes(self, scopes: list[tuple[str, Optional[str]]]) -> None:
+        """Merge this worker's scopes into the shared list (blocking; best-effort)."""
+        lock_key = f"{_PREFETCH_SCOPES_KEY}:lock"
+        try:
+            locked = False
+            for _ in range(20):
+                if self._shared.try_lock(lock_key, 5.0):
+                    locked = True
+                    break
+                time.sleep(0.1)
+            try:
+                merged = set(self._published_scopes()) | set(scopes)
+                data = json.dumps(sorted(merged, key=str)).encode("utf-8")
+                self._shared.set(_PREFETCH_SCOPES_KEY, data, _PREFETCH_SCOPES_TTL_SECONDS)
+            finally:
+                if locked:
+                    self._shared.unlock(lock_key)
+        except Exception:  # noqa: BLE001
+            logger.warning("Could not publish cost prefetch scopes", exc_info=True)
+
+    async def run_once(self, scopes: Optional[Iterable[tuple[str, Optional[str]]]] = None) -> None:
+        """Warm ``scopes`` (by default the ones ``scopes()`` returns) in this worker."""
+        by_subscription: dict[str, set[str]] = {}
+        for subscription_id, resource_group in scopes if scopes is not None else await self._scopes():
+            groups = by_subscription.setdefault(subscription_id, set())
+            if resource_group:
+                groups.add(resource_group)
+
+        logger.info("Cost prefetch: warming %d subscription(s)", len(by_subscription))
+        for subscription_id, resource_groups in sorted(by_subscription.items()):
+            try:
+                await self._warm(subscription_id, sorted(resource_groups))
+            except Exception:
+                logger.warning("Cost prefetch failed for subscription '%s'", subscription_id, exc_info=True)
+            await asyncio.sleep(self._interval_seconds)
@@ -0,0 +1,159 @@
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import numpy as np
+
+
+def resource_name(resource_id: str) -> str:
+    # Extract just the resource name from the full resource ID
+    return resource_id.split("/")[-1] if "/" in resource_id else resource_id
+
+
+def _usage_date(value: Any) -> str:
+    """``20260131`` (as returned by Cost Management) -> ``2026-01-31``."""
+    date_str = str(value)
+    return f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}"
+
+
+@dataclass(frozen=True)
+class GroupedCosts:
+    """
+    Daily cost per resource from a ResourceGroupName/ResourceId-grouped usage query:
+    ``matrix[r, d]`` is the cost of ``resources[r]`` on ``dates[d]``.
+    """
+
+    currency: str
+    dates: list[str]  # ISO dates, ascending
+    resources: list[tuple[str, str]]  # (lower-cased resource group, resource name)
+    matrix: np.ndarray  # float64, shape (len(resources), len(dates))
+
+    @property
+    def daily_totals(self) -> np.ndarray:
+        return self.matrix.sum(axis=0)
+
+    @property
+    def resource_totals(self) -> np.ndarray:
+        return self.matrix.sum(axis=1)
+
+    def cells(self) -> Iterator[tuple[str, str, str, float]]:
+        """``(date, resource group, resource name, cost)`` for every non-zero cell."""
+        rows, cols = np.nonzero(self.matrix)
+        for r, d, cost in zip(rows.tolist(), cols.tolist(), self.matrix[rows, cols].tolist()):
+            group, name = self.resources[r]
+            yield self.dates[d], group, name, cost
+
+    def select(self, since: str, resource_group: Optional[str] = None) -> "GroupedCosts":
+        """The usage dates from ``since`` onwards, optionally only the resources of one resource group."""
+        first = bisect_left(self.dates, since)
+        if resource_group is None:
+            return GroupedCosts(self.currency, self.dates[first:], self.resources, self.matrix[:, first:])
+        group = resource_group.lower()
+        keep = [r for r, (row_group, _) in enumerate(self.resources) if row_group == group]
+        return GroupedCosts(
+            self.currency, self.dates[first:], [self.resources[r] for r in keep], self.matrix[keep, first:]
+        )
+
+    @classmethod
+    def from_cells(cls, currency: str, cells: Iterable[tuple[str, str, str, float]]) -> "GroupedCosts":
+        """Build from ``(ISO date, resource group, resource name, cost)`` cells, e.g. stored history."""
+        date_index: dict[str, int] = {}
+        resource_index: dict[tuple[str, str], int] = {}
+        row_idx: list[int] = []
+        day_idx: list[int] = []
+        costs: list[float] = []
+        for date_str, group, name, cost in cells:
+            row_idx.append(resource_index.setdefault((group, name), len(resource_index)))
+            day_idx.append(date_index.setdefault(date_str, len(date_index)))
+            costs.append(float(cost))
+
+        dates = sorted(date_index)
+        day_map = np.empty(len(dates), dtype=np.int64)
+        for slot, date in enumerate(dates):
+            day_map[date_index[date]] = slot
+        matrix = _sum_cells(
+            np.arange(len(resource_index), dtype=np.int64), day_map, row_idx, day_idx, costs, len(resource_index)
+        )
+        return cls(currency=currency, dates=dates, resources=list(resource_index), matrix=matrix)
+
+
+def _sum_cells(
+    resource_map: np.ndarray,
+    day_map: np.ndarray,
+    row_idx: list[int],
+    day_idx: list[int],
+    costs: list[float],
+    resource_count: int,
+) -> np.ndarray:
+    """Sum per-row costs into a resource x day matrix after mapping raw indices to slots."""
+    width = len(day_map)
+    flat = resource_map[np.asarray(row_idx, dtype=np.int64)] * width + day_map[np.asarray(day_idx, dtype=np.int64)]
+    return np.bincount(
+        flat, weights=np.asarray(costs, dtype=np.float64), minlength=resource_count * width
+    ).reshape(resource_count, width)
+
+
+def parse_grouped_pages(pages: Iterable[tuple[Sequence[str], Sequence[Sequence[Any]]]]) -> GroupedCosts:
+    """
+    Parse ``(column names, rows)`` pages of a grouped usage query in one pass.
+
+    Columns are located by name since their order follows the grouping definition.
+    Each row only looks up its raw date and raw (resource group, resource ID) in a
+    dictionary; decoding them into ISO dates and resource names happens once per
+    distinct value afterwards, and the per-cell sums are a single ``bincount``.
+    Resource groups are lower-cased; ARM names are case-insensitive. Amounts in different
+    currencies cannot be summed, so a result mixing currencies raises :class:`ValueError`.
+    """
+    currencies: set[str] = set()
+    date_index: dict[Any, int] = {}
+    resource_index: dict[tuple[Any, Any], int] = {}
+    row_idx: list[int] = []
+    day_idx: list[int] = []
+    costs: list[float] = []
+
+    for columns, rows in pages:
+        if not rows:
+            continue
+        index = {name.lower(): i for i, name in enumerate(columns)}
+        date_i = index.get("usagedate", 1)
+        group_i = index.get("resourcegroupname", index.get("resourcegroup"))
+        resource_i = index.get("resourceid")
+        currency_i = index.get("currency")
+
+        for row in rows:
+            raw_date = row[date_i]
+            d = date_index.get(raw_date)
+            if d is None:
+                d = date_index[raw_date] = len(date_index)
+            raw_resource = (
+                row[group_i] if group_i is not None else None,
+                row[resource_i] if resource_i is not None else None,
+            )
+            r = resource_index.get(raw_resource)
+            if r is None:
+                r = resource_index[raw_resource] = len(resource_index)
+            row_idx.append(r)
+            day_idx.append(d)
+            costs.append(float(row[0]))
+
+        if currency_i is not None:
+            currencies.update(str(row[currency_i]) for row in rows if row[currency_i])
+            if len(currencies) > 1:
+                raise ValueError(f"Cost query returned amounts in several currencies: {', '.join(sorted(currencies))}")
+
+    # Decode each distinct value once; raw values that decode identically share a slot.
+    decoded_dates = [_usage_date(raw) for raw in date_index]
+    dates = sorted(set(decoded_dates))
+    date_slot = {date: i for i, date in enumerate(dates)}
+    day_map = np.fromiter((date_slot[date] for date in decoded_dates), dtype=np.int64, count=len(decoded_dates))
+
+    resource_slot: dict[tuple[str, str], int] = {}
+    resource_map = np.empty(len(resource_index), dtype=np.int64)
+    for raw, r in resource_index.items():
+        key = (str(raw[0] or "").lower(), resource_name(str(raw[1] or "")))
+        resource_map[r] = resource_slot.setdefault(key, len(resource_slot))
+
+    matrix = _sum_cells(resource_map, day_map, row_idx, day_idx, costs, len(resource_slot))
+    currency = next(iter(currencies), "USD")
+    return GroupedCosts(currency=currency, dates=dates, resources=list(resource_slot), matrix=matrix)
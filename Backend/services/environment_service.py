@@ -1,12 +1,158 @@
 import asyncio
-from collections.abc import Sequence
-from typing import Optional
+import logging
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Hashable, Iterable, Mapping, Sequence
+from typing import Any, Optional
 
+from pydantic import ValidationError
+
+from core import LRUCache, get_settings, get_shared_cache_backend, register_cache
 from db.models import EnvironmentApp
 from repositories import EnvironmentRepository
-from schemas import ContainerStatus, EnvironmentCreate
+from schemas import (
+    ContainerStatus,
+    DiscoveryImportRequest,
+    EnvironmentCreate,
+    EnvironmentImportResponse,
+    EnvironmentImportResult,
+    EnvironmentRead,
+)
 from services.azure_service import AzureContainerAppService
 
+logger = logging.getLogger(__name__)
+
+_VERSION_KEY = "environments:version"
+# Environment records are a few hundred bytes; 2 MiB holds thousands of them.
+_ENVIRONMENT_CACHE_MAX_BYTES = 2 * 1024 * 1024
+_ENVIRONMENT_ENTRY_BYTES = 512
+
+
+class _EnvironmentCache:
+    """
+    Per-worker read-through cache of environment records, keyed by id and by name.
+
+    Any write clears both key families (so a deleted or renamed environment is never
+    served under its old id or name) and publishes a new version token in the shared
+    cache tier; other workers compare against that token at most every
+    ``version_check_seconds`` and clear their own copy when it changed. Without a shared tier the cache is
+    process-local and only this worker's writes invalidate it.
+    """
+
+    def __init__(self) -> None:
+        settings = get_settings()
+        self._local = LRUCache(
+            max_bytes=_ENVIRONMENT_CACHE_MAX_BYTES,
+            ttl_seconds=settings.environment_cache_ttl_seconds,
+        )
+        register_cache("environments", self._local.stats)
+        self._version_check_seconds = settings.environment_cache_version_check_seconds
+        self._version: Optional[bytes] = None
+        self._checked_at = float("-inf")
+        # Bumped on every clear so loads that raced a write don't store what they read.
+        self._generation = 0
+
+    def _clear(self) -> None:
+        self._local.clear()
+        self._generation += 1
+
+    def _shared_call(self, method: str, *args: Any) -> Any:
+        try:
+            return getattr(get_shared_cache_backend(), method)(*args)
+        except Exception:  # noqa: BLE001
+            logger.warning("Shared cache %s failed for '%s'", method, _VERSION_KEY, exc_info=True)
+            return None
+
+    async def _check_version(self) -> None:
+        if get_shared_cache_backend() is None:
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self._version_check_seconds:
+            return
+        self._checked_at = now
+        version = await asyncio.to_thread(self._shared_call, "get", _VERSION_KEY)
+        if version != self._version:
+            self._version = version
+            self._clear()
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Optional[EnvironmentApp]]],
+    ) -> Optional[EnvironmentRead]:
+        if self._local.ttl_seconds <= 0:
+            environment = await loader()
+            return EnvironmentRead.model_validate(environment) if environment is not None else None
+
+        await self._check_version()
+        cached = self._local.get(key)
+        if cached is not None:
+            return cached
+
+        generation = self._generation
+        environment = await loader()
+        if environment is None:
+            return None
+        record = EnvironmentRead.model_validate(environment)
+        if generation == self._generation:
+            self._local.set(("id", record.id), record, size=_ENVIRONMENT_ENTRY_BYTES)
+            self._local.set(("name", record.name), record, size=_ENVIRONMENT_ENTRY_BYTES)
+        return record
+
+    async def invalidate(self) -> None:
+        self._clear()
+        if get_shared_cache_backend() is None:
+            return
+        version = uuid.uuid4().hex.encode("ascii")
+        self._version = version
+        # Outlive any cached record so a worker never misses the bump.
+        ttl = max(self._local.ttl_seconds * 2, 3600)
+        await asyncio.to_thread(self._shared_call, "set", _VERSION_KEY, version, ttl)
+
+
+_environment_cache = _EnvironmentCache()
+
+
+def _validation_detail(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+    )
+
+
+def pair_discovered_apps(
+    apps: Iterable[Mapping[str, Any]],
+    request: DiscoveryImportRequest,
+) -> list[dict[str, Any]]:
+    """
+    Pair discovered container apps into environment rows: within a resource group,
+    ``shop-frontend`` pairs with ``shop-backend`` and becomes environment ``shop``.
+    """
+    by_group: dict[str, set[str]] = {}
+    for app in apps:
+        if request.subscription_id and app["subscriptionId"] != request.subscription_id:
+            continue
+        if request.resource_group and app["resourceGroup"].lower() != request.resource_group.lower():
+            continue
+        by_group.setdefault(app["resourceGroup"], set()).add(app["name"])
+
+    rows = []
+    for resource_group, names in sorted(by_group.items()):
+        for frontend in sorted(names):
+            if request.frontend_token not in frontend:
+                continue
+            backend = frontend.replace(request.frontend_token, request.backend_token)
+            if backend == frontend or backend not in names:
+                continue
+            name = frontend.replace(request.frontend_token, "").strip("-_. ") or resource_group
+            rows.append({
+                "name": name,
+                "resource_group": resource_group,
+                "frontend_app_name": frontend,
+                "backend_app_name": backend,
+                "type": request.type,
+            })
+    return rows
+
 
 class EnvironmentService:
     """Business logic for managing environment definitions and Azure operations."""
@@ -19,8 +165,8 @@ class EnvironmentService:
         self._repository = repository
         self._azure_service = azure_service
 
-    def create_environment(self, payload: EnvironmentCreate) -> EnvironmentApp:
-        existing = self._repository.get_by_details(
+    async def create_environment(self, payload: EnvironmentCreate) -> EnvironmentApp:
+        existing = await self._repository.get_by_details(
             resource_group=payload.resource_group,
             frontend_app=payload.frontend_app_name,
             backend_app=payload.backend_app_name
@@ -29,42 +175,121 @@ class EnvironmentService:
             raise ValueError(f"An environment containing these apps already exists (Name: {existing.name}).")
             
         environment = EnvironmentApp(**payload.model_dump())
-        return self._repository.create(environment)
+        try:
+            return await self._repository.create(environment)
+        finally:
+            await _environment_cache.invalidate()
+
+    async def import_environments(self, rows: Sequence[Mapping[str, Any]]) -> EnvironmentImportResponse:
+        """
+        Validate ``rows`` in memory and insert the valid ones in a single transaction.
+        Rows repeating a name or app triple seen earlier in the request, or already
+        stored, are reported as skipped rather than failing the import.
+        """
+        results: list[EnvironmentImportResult] = []
+        pending: list[tuple[int, EnvironmentCreate]] = []
+        names: set[str] = set()
+        triples: set[tuple[str, str, str]] = set()
+
+        for index, row in enumerate(rows):
+            try:
+                payload = EnvironmentCreate.model_validate(row)
+            except ValidationError as exc:
+                name = row.get("name") if isinstance(row, Mapping) else None
+                results.append(EnvironmentImportResult(
+                    index=index, name=name if isinstance(name, str) else None,
+                    status="invalid", detail=_validation_detail(exc),
+                ))
+                continue
+            triple = (payload.resource_group, payload.frontend_app_name, payload.backend_app_name)
+            if payload.name in names or triple in triples:
+                results.append(EnvironmentImportResult(
+                    index=index, name=payload.name, status="skipped", detail="Duplicate within this import.",
+                ))
+                continue
+            names.add(payload.name)
+            triples.add(triple)
+            pending.append((index, payload))
+
+        created: dict[str, int] = {}
+        if pending:
+            try:
+                created = await self._repository.bulk_create([payload.model_dump() for _, payload in pending])
+            finally:
+                await _environment_cache.invalidate()
+        for index, payload in pending:
+            env_id = created.get(payload.name)
+            if env_id is None:
+                results.append(EnvironmentImportResult(
+                    index=index, name=payload.name, status="skipped",
+                    detail="An environment with this name or these apps already exists.",
+                ))
+            else:
+                results.append(EnvironmentImportResult(index=index, name=payload.name, status="created", id=env_id))
+
+        results.sort(key=lambda result: result.index)
+        return EnvironmentImportResponse(
+            created=sum(result.status == "created" for result in results),
+            skipped=sum(result.status == "skipped" for result in results),
+            invalid=sum(result.status == "invalid" for result in results),
+            results=results,
+        )
+
+    async def list_environments(
+        self,
+        after_id: Optional[int] = None,
+        limit: int = 100,
+        type: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        resource_group: Optional[str] = None,
+    ) -> Sequence[EnvironmentApp]:
+        return await self._repository.list(
+            after_id=after_id,
+            limit=limit,
+            type=type,
+            is_active=is_active,
+            resource_group=resource_group,
+        )
 
-    def list_environments(self, skip: int = 0, limit: int = 100) -> Sequence[EnvironmentApp]:
-        return self._repository.list(skip=skip, limit=limit)
+    async def get_environment(self, env_id: int) -> Optional[EnvironmentRead]:
+        """Environment by id, served from the per-worker cache after the first lookup."""
+        return await _environment_cache.get_or_load(("id", env_id), lambda: self._repository.get(env_id))
 
-    def get_environment(self, env_id: int) -> Optional[EnvironmentApp]:
-        return self._repository.get(env_id)
+    async def get_environment_by_name(self, name: str) -> Optional[EnvironmentRead]:
+        """Environment by its unique name, through the same cache as :meth:`get_environment`."""
+        return await _environment_cache.get_or_load(("name", name), lambda: self._repository.get_by_name(name))
 
-    def delete_environment(self, env_id: int) -> None:
-        environment = self._repository.get(env_id)
+    async def delete_environment(self, env_id: int) -> None:
+        environment = await self._repository.get(env_id)
         if environment is None:
             raise ValueError("Environment not found.")
-        self._repository.delete(environment)
+        try:
+            await self._repository.delete(environment)
+        finally:
+            await _environment_cache.invalidate()
 
-    async def get_environment_status(self, environment: EnvironmentApp) -> ContainerStatus:
+    async def get_environment_status(self, environment: EnvironmentRead) -> ContainerStatus:
         frontend_status, backend_status = await asyncio.gather(
             self._azure_service.get_app_status(environment.resource_group, environment.frontend_app_name),
             self._azure_service.get_app_status(environment.resource_group, environment.backend_app_name),
         )
         return ContainerStatus(frontend_status=frontend_status, backend_status=backend_status)
 
-    async def restart_environment(self, environment: EnvironmentApp) -> bool:
+    async def restart_environment(self, environment: EnvironmentRead) -> bool:
         results = await asyncio.gather(
             self._azure_service.restart_app(environment.resource_group, environment.frontend_app_name),
             self._azure_service.restart_app(environment.resource_group, environment.backend_app_name),
         )
         return all(results)
 
-    async def stop_environment(self, environment: EnvironmentApp) -> bool:
+    async def stop_environment(self, environment: EnvironmentRead) -> bool:
         results = await asyncio.gather(
             self._azure_service.stop_app(environment.resource_group, environment.frontend_app_name),
             self._azure_service.stop_app(environment.resource_group, environment.backend_app_name),
         )
         return all(results)
 
-    async def start_environment(self, environment: EnvironmentApp) -> bool:
+    async def start_environment(self, environment: EnvironmentRead) -> bool:
         results = await asyncio.gather(
             self._azure_service.start_app(environment.resource_group, environment.frontend_app_name),
             self._azure_service.start_app(environment.resource_group, environment.backend_app_name),
@@ -0,0 +1,165 @@
+import base64
+import re
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+LOGS_TABLE = "ContainerAppConsoleLogs_CL"
+
+# Values made only of these characters can be emitted as plain string literals.
+_SAFE_LITERAL_RE = re.compile(r"[A-Za-z0-9 _.:/@+=,-]*")
+# KQL terms are maximal runs of alphanumerics; the term index covers terms of 3+ chars.
+_TERM_RE = re.compile(r"[A-Za-z0-9]+")
+_MIN_INDEXED_TERM = 3
+
+
+def _literal(value: str) -> str:
+    """
+    Render ``value`` as a KQL string expression without escaping anything.
+
+    Anything outside a conservative character set is shipped base64-encoded, whose
+    alphabet cannot terminate a string literal, and decoded by the engine.
+    """
+    if _SAFE_LITERAL_RE.fullmatch(value):
+        return f'"{value}"'
+    encoded = base64.b64encode(value.encode("utf-8")).decode("ascii")
+    return f'base64_decode_tostring("{encoded}")'
+
+
+def _datetime_literal(value: datetime) -> str:
+    return f"datetime({value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')})"
+
+
+def _indexed_terms(text: str) -> list[str]:
+    """
+    Terms that any string containing ``text`` must also contain as whole terms.
+
+    Only terms bounded by non-alphanumerics on both sides *inside* ``text`` qualify —
+    the first and last run could be a fragment of a longer term in the log line.
+    """
+    matches = list(_TERM_RE.finditer(text))
+    interior = [
+        m.group() for m in matches
+        if m.start() > 0 and m.end() < len(text) and len(m.group()) >= _MIN_INDEXED_TERM
+    ]
+    return list(dict.fromkeys(interior))
+
+
+class _Bindings:
+    """Parameter and ``let`` statements shared by a query and its branches."""
+
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+        self._count = 0
+
+    def bind(self, expression: str) -> str:
+        name = f"p{self._count}"
+        self._count += 1
+        self.statements.append(f"let {name} = {expression};")
+        return name
+
+
+class KqlQuery:
+    """
+    Builds a Log Analytics query with the time window pushed down and values bound
+    as ``let`` parameters instead of being spliced into predicates.
+
+    The time predicate is always the first operator after the table so the engine
+    can prune by ingestion time before evaluating anything else, and the same
+    window is sent as the request's ``timespan``.
+    """
+
+    def __init__(
+        self,
+        table: str = LOGS_TABLE,
+        *,
+        hours: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        _bindings: Optional[_Bindings] = None,
+    ) -> None:
+        self._bindings = _bindings or _Bindings()
+        self._source = table
+        self._operators: list[str] = []
+        self._timespan: Optional[str] = None
+
+        if hours is not None:
+            self._operators.append(f"where TimeGenerated > ago({int(hours)}h)")
+            self._timespan = f"PT{int(hours)}H"
+        elif start is not None and end is not None:
+            self._operators.append(
+                f"where TimeGenerated >= {_datetime_literal(start)} and TimeGenerated < {_datetime_literal(end)}"
+            )
+            self._timespan = f"{start.astimezone(timezone.utc).isoformat()}/{end.astimezone(timezone.utc).isoformat()}"
+
+    # ── Parameters ───────────────────────────────────────────────────────────
+
+    def param(self, value: str) -> str:
+        """Bind a string value and return the parameter name to use in predicates."""
+        return self._bindings.bind(_literal(value))
+
+    # ── Predicates ───────────────────────────────────────────────────────────
+
+    def where(self, predicate: str) -> "KqlQuery":
+        """Append a predicate built only from constants and bound parameter names."""
+        self._operators.append(f"where {predicate}")
+        return self
+
+    def where_equals(self, column: str, value: str) -> "KqlQuery":
+        """Case-insensitive equality (``=~``)."""
+        return self.where(f"{column} =~ {self.param(value)}")
+
+    def where_in(self, column: str, values: Iterable[str]) -> "KqlQuery":
+        """Case-insensitive set membership (``in~``)."""
+        names = ", ".join(self.param(v) for v in values)
+        return self.where(f"{column} in~ ({names})")
+
+    def where_contains(self, column: str, text: str) -> "KqlQuery":
+        """
+        Case-insensitive substring match (``contains``), preceded by ``has`` checks on
+        the whole terms the substring implies so the term index can discard extents first.
+        """
+        for term in _indexed_terms(text):
+            self.where(f"{column} has {self.param(term)}")
+        return self.where(f"{column} contains {self.param(text)}")
+
+    # ── Pipeline ─────────────────────────────────────────────────────────────
+
+    def pipe(self, operator: str) -> "KqlQuery":
+        """Append a non-filtering operator (project, order, summarize, ...)."""
+        self._operators.append(operator)
+        return self
+
+    def materialize(self, name: str) -> "KqlQuery":
+        """
+        Turn the pipeline built so far into ``let <name> = materialize(...)`` and continue
+        from it, so several branches can read it with a single scan.
+        """
+        self._bindings.statements.append(f"let {name} = materialize({self._pipeline()});")
+        self._source = name
+        self._operators = []
+        return self
+
+    def branch(self) -> "KqlQuery":
+        """A new pipeline over the current source that shares this query's parameters."""
+        other = KqlQuery(self._source, _bindings=self._bindings)
+        other._timespan = self._timespan
+        return other
+
+    def union(self, other: "KqlQuery") -> "KqlQuery":
+        return self.pipe(f"union ({other._pipeline()})")
+
+    # ── Output ───────────────────────────────────────────────────────────────
+
+    def _pipeline(self) -> str:
+        return "\n| ".join([self._source, *self._operators])
+
+    def render(self) -> str:
+        return "\n".join([*self._bindings.statements, self._pipeline()])
+
+    def body(self) -> dict[str, Any]:
+        """JSON body for the Log Analytics ``api/query`` endpoint."""
+        body: dict[str, Any] = {"query": self.render()}
+        if self._timespan:
+            body["timespan"] = self._timespan
+        return body
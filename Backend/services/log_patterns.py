@@ -0,0 +1,126 @@
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+WILDCARD = "<*>"
+
+# Tokens that are almost certainly variables: numbers, hex ids, UUIDs, IPs, dates.
+_VARIABLE_TOKEN_RE = re.compile(
+    r"""^(
+        [-+]?\d+([.,:]\d+)*[a-zA-Z%]{0,3}            # 42, 3.14, 10:32:01, 250ms, 99%
+      | (0x)?[0-9a-fA-F]{8,}                          # hashes, long hex ids
+      | [0-9a-fA-F]{8}(-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}  # UUIDs
+      | \d{1,3}(\.\d{1,3}){3}(:\d+)?                  # IPv4[:port]
+      | \d{4}-\d{2}-\d{2}([T ][\d:.]+Z?)?             # ISO dates / datetimes
+    )$""",
+    re.VERBOSE,
+)
+_HAS_DIGIT_RE = re.compile(r"\d")
+_PUNCTUATION = "\"'()[]{},;"
+_MAX_MEMO_SIZE = 100_000
+
+
+@dataclass
+class LogCluster:
+    """A mined template and the statistics of the lines that matched it."""
+
+    tokens: list[str]
+    count: int = 0
+    first_seen: str = ""
+    last_seen: str = ""
+    samples: list[str] = field(default_factory=list)
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+
+class LogTemplateMiner:
+    """
+    Online log template miner based on Drain (He et al., ICWS 2017).
+
+    Lines are tokenized on whitespace and obviously variable tokens are masked.
+    Candidate clusters are found through a fixed-depth tree keyed by token count and
+    the first token, and a line joins the most similar cluster if the fraction of
+    matching positions reaches ``similarity_threshold``; positions that differ become
+    wildcards.  Masked token tuples that have been seen before skip the tree entirely,
+    which is what keeps repetitive container logs cheap to process.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.4,
+        max_clusters_per_leaf: int = 100,
+        max_samples: int = 3,
+    ) -> None:
+        self._similarity_threshold = similarity_threshold
+        self._max_clusters_per_leaf = max_clusters_per_leaf
+        self._max_samples = max_samples
+        self._leaves: dict[tuple[int, str], list[LogCluster]] = {}
+        self._by_masked: dict[tuple[str, ...], LogCluster] = {}
+        self._token_masks: dict[str, str] = {}
+        self.clusters: list[LogCluster] = []
+
+    def _mask(self, token: str) -> str:
+        masked = self._token_masks.get(token)
+        if masked is None:
+            core = token.strip(_PUNCTUATION)
+            masked = WILDCARD if core and _VARIABLE_TOKEN_RE.match(core) else token
+            # Bounded memo — high-cardinality tokens (ids) would otherwise grow it forever.
+            if len(self._token_masks) < _MAX_MEMO_SIZE:
+                self._token_masks[token] = masked
+        return masked
+
+    def _find_cluster(self, leaf: list[LogCluster], tokens: tuple[str, ...]) -> Optional[LogCluster]:
+        best: Optional[LogCluster] = None
+        best_score = -1.0
+        size = len(tokens)
+        for cluster in leaf:
+            same = 0
+            for template_token, token in zip(cluster.tokens, tokens):
+                if template_token == token:
+                    same += 1
+            score = same / size
+            if score > best_score:
+                best, best_score = cluster, score
+        if best is not None and best_score >= self._similarity_threshold:
+            return best
+        return None
+
+    def add(self, message: str, timestamp: str = "") -> LogCluster:
+        """Assign ``message`` to a cluster (creating or generalizing one) and return it."""
+        tokens = tuple(self._mask(tok) for tok in message.split())
+        cluster = self._by_masked.get(tokens)
+
+        if cluster is None:
+            first = tokens[0] if tokens else ""
+            leaf_key = (len(tokens), WILDCARD if _HAS_DIGIT_RE.search(first) else first)
+            leaf = self._leaves.setdefault(leaf_key, [])
+            cluster = self._find_cluster(leaf, tokens) if tokens else (leaf[0] if leaf else None)
+            if cluster is None:
+                cluster = LogCluster(tokens=list(tokens))
+                self.clusters.append(cluster)
+                if len(leaf) < self._max_clusters_per_leaf:
+                    leaf.append(cluster)
+            else:
+                template = cluster.tokens
+                for i, token in enumerate(tokens):
+                    if template[i] != token:
+                        template[i] = WILDCARD
+            if len(self._by_masked) < _MAX_MEMO_SIZE:
+                self._by_masked[tokens] = cluster
+
+        cluster.count += 1
+        if timestamp:
+            if not cluster.first_seen or timestamp < cluster.first_seen:
+                cluster.first_seen = timestamp
+            if timestamp > cluster.last_seen:
+                cluster.last_seen = timestamp
+        if len(cluster.samples) < self._max_samples:
+            cluster.samples.append(message)
+        return cluster
+
+    def top(self, n: Optional[int] = None) -> list[LogCluster]:
+        """Clusters ordered by descending line count."""
+        ordered = sorted(self.clusters, key=lambda c: c.count, reverse=True)
+        return ordered if n is None else ordered[:n]
@@ -0,0 +1,26 @@
+from collections.abc import Sequence
+from typing import Literal, Optional
+
+import numpy as np
+
+
+def downsample(
+    values: Sequence[Optional[float]],
+    factor: int,
+    how: Literal["mean", "max"],
+) -> list[Optional[float]]:
+    """
+    Collapse every ``factor`` consecutive samples into one, ignoring gaps (``None``).
+    A bucket with no samples at all stays ``None``.
+    """
+    series = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    if factor > 1:
+        series = np.pad(series, (0, -len(series) % factor), constant_values=np.nan).reshape(-1, factor)
+        present = ~np.isnan(series)
+        counts = present.sum(axis=1)
+        if how == "max":
+            reduced = np.where(present, series, -np.inf).max(axis=1)
+        else:
+            reduced = np.where(present, series, 0.0).sum(axis=1) / np.maximum(counts, 1)
+        series = np.where(counts > 0, reduced, np.nan)
+    return [None if np.isnan(value) else value for value in series.tolist()]
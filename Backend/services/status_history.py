@@ -0,0 +1,247 @@
+import asyncio
+import datetime
+import logging
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Literal, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import get_settings, get_shared_cache_backend
+from db import SessionLocal
+from repositories import StatusHistoryRepository
+from repositories.status_history_repository import UP_STATUSES
+
+logger = logging.getLogger(__name__)
+
+Resolution = Literal["raw", "hour", "day"]
+
+_HOUR = datetime.timedelta(hours=1)
+_DAY = datetime.timedelta(days=1)
+# Hours are rolled up once they are this far in the past, leaving time for buffered writes to land.
+_ROLLUP_GRACE = datetime.timedelta(minutes=5)
+_MAINTENANCE_INTERVAL_SECONDS = 300.0
+_MAINTENANCE_LOCK_KEY = "status-history:maintenance"
+# Observations kept in memory while the database is unreachable; the oldest are dropped first.
+_MAX_BUFFERED = 50_000
+
+
+def _as_utc(value: datetime.datetime) -> datetime.datetime:
+    # SQLite hands timestamps back naive.
+    return value if value.tzinfo is not None else value.replace(tzinfo=datetime.timezone.utc)
+
+
+def _floor(value: datetime.datetime, resolution: Resolution) -> datetime.datetime:
+    value = _as_utc(value).replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0) if resolution == "day" else value
+
+
+@dataclass(frozen=True)
+class StatusPoint:
+    time: datetime.datetime
+    samples: int
+    up_samples: int
+    status: Optional[str] = None  # only for raw observations
+
+
+@dataclass(frozen=True)
+class StatusHistory:
+    resolution: Resolution
+    points: list[StatusPoint]
+
+
+class StatusHistoryRecorder:
+    """
+    Buffers container app status observations and writes them in batches; rolls them up
+    into hourly and daily uptime counts and applies retention to each resolution.
+
+    Recording never blocks or fails the caller. A batch that cannot be written is
+    logged and dropped; status history is best-effort.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        flush_seconds: float,
+        batch_size: int,
+        raw_retention_days: int,
+        hourly_retention_days: int,
+        daily_retention_days: int,
+    ) -> None:
+        self._session_factory = session_factory
+        self._flush_seconds = flush_seconds
+        self._batch_size = batch_size
+        self._raw_retention = datetime.timedelta(days=raw_retention_days)
+        self._hourly_retention = datetime.timedelta(days=hourly_retention_days)
+        self._daily_retention = datetime.timedelta(days=daily_retention_days)
+        self._buffer: deque[dict[str, Any]] = deque(maxlen=_MAX_BUFFERED)
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task] = []
+
+    def record(self, subscription_id: str, resource_group: str, app_name: str, status: str) -> None:
+        if not self._tasks:
+            return
+        self._buffer.append({
+            "subscription_id": subscription_id,
+            "resource_group": resource_group,
+            "app_name": app_name,
+            "status": status[:64],
+            "observed_at": datetime.datetime.now(datetime.timezone.utc),
+        })
+        if len(self._buffer) >= self._batch_size:
+            self._wake.set()
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._wake = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._flush_loop(), name="status-history-flush"),
+            asyncio.create_task(self._maintenance_loop(), name="status-history-maintenance"),
+        ]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        while self._buffer:
+            batch = [self._buffer.popleft() for _ in range(min(len(self._buffer), self._batch_size))]
+            try:
+                async with self._session_factory() as session:
+                    await StatusHistoryRepository(session).add_observations(batch)
+            except Exception:
+                logger.warning("Dropped %d status observation(s): write failed", len(batch), exc_info=True)
+                return
+
+    async def _maintenance_loop(self) -> None:
+        while True:
+            await asyncio.sleep(_MAINTENANCE_INTERVAL_SECONDS)
+            try:
+                await self.maintain()
+            except Exception:
+                logger.exception("Status history maintenance failed")
+
+    async def maintain(self, now: Optional[datetime.datetime] = None) -> None:
+        """Roll up completed hours and days, then apply retention. One worker at a time."""
+        shared = get_shared_cache_backend()
+        if shared is not None:
+            locked = await asyncio.to_thread(shared.try_lock, _MAINTENANCE_LOCK_KEY, _MAINTENANCE_INTERVAL_SECONDS)
+            if not locked:
+                return
+        try:
+            now = now or datetime.datetime.now(datetime.timezone.utc)
+            async with self._session_factory() as session:
+                repository = StatusHistoryRepository(session)
+                hourly_done = await self._roll_up_hours(repository, _floor(now - _ROLLUP_GRACE, "hour"))
+                daily_done = await self._roll_up_days(repository, _floor(hourly_done, "day"))
+                # Never drop a resolution's rows before they are covered by the next coarser one.
+                await repository.delete_observations_before(min(now - self._raw_retention, hourly_done))
+                await repository.delete_rollups_before("hour", min(now - self._hourly_retention, daily_done))
+                await repository.delete_rollups_before("day", now - self._daily_retention)
+        finally:
+            if shared is not None:
+                await asyncio.to_thread(shared.unlock, _MAINTENANCE_LOCK_KEY)
+
+    async def _roll_up_hours(self, repository: StatusHistoryRepository, ready_until: datetime.datetime) -> datetime.datetime:
+        """Roll up every complete hour before ``ready_until``; returns where rolled-up data ends."""
+        latest = await repository.latest_bucket("hour")
+        bucket = _as_utc(latest) + _HOUR if latest is not None else None
+        while True:
+            # Jump straight to the next hour that has observations instead of walking idle gaps.
+            first = await repository.earliest_observation(since=bucket)
+            if first is None:
+                return ready_until
+            bucket = _floor(first, "hour")
+            if bucket + _HOUR > ready_until:
+                return bucket
+            counts = await repository.count_observations(bucket, bucket + _HOUR)
+            await repository.replace_bucket("hour", bucket, counts)
+            bucket += _HOUR
+
+    async def _roll_up_days(self, repository: StatusHistoryRepository, ready_until: datetime.datetime) -> datetime.datetime:
+        """Roll up every complete day of hourly rollups before ``ready_until``."""
+        latest = await repository.latest_bucket("day")
+        day = _as_utc(latest) + _DAY if latest is not None else None
+        while True:
+            first = await repository.earliest_bucket("hour", since=day)
+            if first is None:
+                return ready_until
+            day = _floor(first, "day")
+            if day + _DAY > ready_until:
+                return day
+            counts = await repository.count_rollups("hour", day, day + _DAY)
+            await repository.replace_bucket("day", day, counts)
+            day += _DAY
+
+    def resolution_for(self, start: datetime.datetime, end: datetime.datetime, now: datetime.datetime) -> Resolution:
+        """The finest resolution that is still retained for ``start`` and keeps the series short."""
+        span = end - start
+        if span <= _DAY and start >= now - self._raw_retention:
+            return "raw"
+        if span <= datetime.timedelta(days=31) and start >= now - self._hourly_retention:
+            return "hour"
+        return "day"
+
+    async def read(
+        self,
+        repository: StatusHistoryRepository,
+        subscription_id: str,
+        resource_group: str,
+        app_name: str,
+        start: datetime.datetime,
+        end: datetime.datetime,
+    ) -> StatusHistory:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        resolution = self.resolution_for(start, end, now)
+        if resolution == "raw":
+            observations = await repository.list_observations(subscription_id, resource_group, app_name, start, end)
+            return StatusHistory(resolution, [
+                StatusPoint(_as_utc(observed_at), 1, int(status.lower() in UP_STATUSES), status)
+                for observed_at, status in observations
+            ])
+
+        rollups = await repository.list_rollups(subscription_id, resource_group, app_name, resolution, start, end)
+        points = [StatusPoint(_as_utc(bucket), samples, up_samples) for bucket, samples, up_samples in rollups]
+
+        # Buckets not rolled up yet (the current hour or day) are counted from raw observations.
+        latest = await repository.latest_bucket(resolution)
+        size = _HOUR if resolution == "hour" else _DAY
+        tail_start = max(start, _as_utc(latest) + size) if latest is not None else start
+        if tail_start < end:
+            tail: dict[datetime.datetime, list[int]] = {}
+            observations = await repository.list_observations(subscription_id, resource_group, app_name, tail_start, end)
+            for observed_at, status in observations:
+                counts = tail.setdefault(_floor(observed_at, resolution), [0, 0])
+                counts[0] += 1
+                counts[1] += status.lower() in UP_STATUSES
+            points.extend(StatusPoint(bucket, samples, up) for bucket, (samples, up) in sorted(tail.items()))
+        return StatusHistory(resolution, points)
+
+
+_settings = get_settings()
+status_history_recorder = StatusHistoryRecorder(
+    SessionLocal,
+    flush_seconds=_settings.status_history_flush_seconds,
+    batch_size=_settings.status_history_batch_size,
+    raw_retention_days=_settings.status_history_raw_retention_days,
+    hourly_retention_days=_settings.status_history_hourly_retention_days,
+    daily_retention_days=_settings.status_history_daily_retention_days,
+)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The backend is run from its own directory (``uvicorn main:app``), so its packages
+# are imported top-level: ``core``, ``services``, ``db``, ...
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
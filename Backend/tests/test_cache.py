@@ -0,0 +1,121 @@
+import asyncio
+import json
+
+import pytest
+
+from core.cache import LRUCache, SQLiteCacheBackend, TieredCache
+
+
+def _cache(namespace: str, shared=None) -> TieredCache:
+    return TieredCache(
+        namespace,
+        LRUCache(max_bytes=1 << 20, ttl_seconds=60),
+        shared,
+        encode=lambda value: json.dumps(value).encode(),
+        decode=json.loads,
+    )
+
+
+def test_concurrent_misses_share_one_load():
+    cache = _cache("test-coalesce")
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"value": calls}
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_load("k", loader) for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert calls == 1
+    assert results == [{"value": 1}] * 5
+    stats = cache.stats()
+    assert stats.loads == 1 and stats.coalesced == 4
+
+
+def test_invalidate_forces_a_reload():
+    cache = _cache("test-invalidate")
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    async def main():
+        first = await cache.get_or_load("k", loader)
+        cached = await cache.get_or_load("k", loader)
+        await cache.ainvalidate("k")
+        return first, cached, await cache.get_or_load("k", loader)
+
+    assert asyncio.run(main()) == (1, 1, 2)
+
+
+def test_cancelled_caller_does_not_fail_the_others():
+    cache = _cache("test-cancel")
+    release = None
+
+    async def loader():
+        await release.wait()
+        return "loaded"
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        leader = asyncio.create_task(cache.get_or_load("k", loader))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_load("k", loader))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "loaded"
+    assert cache.get("k") == "loaded"
+
+
+def test_failed_load_reaches_every_caller_and_is_not_cached():
+    cache = _cache("test-failure")
+    attempts = 0
+
+    async def failing():
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def main():
+        results = await asyncio.gather(
+            cache.get_or_load("k", failing), cache.get_or_load("k", failing), return_exceptions=True
+        )
+        assert [str(r) for r in results] == ["upstream down"] * 2
+        return await cache.get_or_load("k", lambda: asyncio.sleep(0, result="recovered"))
+
+    assert asyncio.run(main()) == "recovered"
+    assert attempts == 1
+
+
+def test_shared_tier_serves_other_instances(tmp_path):
+    shared = SQLiteCacheBackend(str(tmp_path / "cache.db"), max_bytes=1 << 20)
+    writer = _cache("test-shared", shared)
+    reader = _cache("test-shared", shared)
+
+    async def main():
+        await writer.get_or_load("k", lambda: asyncio.sleep(0, result=[1, 2]))
+        from_shared = await reader.aget("k")
+        await reader.ainvalidate("k")
+        return from_shared, await writer.aget("k"), shared.get("test-shared:k")
+
+    from_shared, local_copy, stored = asyncio.run(main())
+
+    assert from_shared == [1, 2]
+    # Invalidation drops the shared copy; other workers' local copies expire by TTL.
+    assert local_copy == [1, 2]
+    assert stored is None
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from services.cost_rows import GroupedCosts, parse_grouped_pages
+
+COLUMNS = ["Cost", "UsageDate", "ResourceGroupName", "ResourceId", "Currency"]
+APP = "/subscriptions/s/resourceGroups/RG-One/providers/Microsoft.App/containerApps/api"
+DB = "/subscriptions/s/resourceGroups/rg-two/providers/Microsoft.DBforPostgreSQL/flexibleServers/db"
+
+
+def test_pages_are_summed_into_a_resource_by_day_matrix():
+    costs = parse_grouped_pages([
+        (COLUMNS, [
+            [1.5, 20261002, "RG-One", APP, "EUR"],
+            [2.0, 20261001, "rg-two", DB, "EUR"],
+        ]),
+        (COLUMNS, [
+            # Same resource, differently cased group: one row after lower-casing.
+            [0.5, 20261002, "rg-one", APP, "EUR"],
+            [3.0, 20261002, "rg-two", DB, "EUR"],
+        ]),
+    ])
+
+    assert costs.currency == "EUR"
+    assert costs.dates == ["2026-10-01", "2026-10-02"]
+    assert costs.resources == [("rg-one", "api"), ("rg-two", "db")]
+    np.testing.assert_allclose(costs.matrix, [[0.0, 2.0], [2.0, 3.0]])
+    np.testing.assert_allclose(costs.daily_totals, [2.0, 5.0])
+    np.testing.assert_allclose(costs.resource_totals, [2.0, 5.0])
+
+
+def test_columns_are_located_by_name():
+    columns = ["Cost", "ResourceId", "ResourceGroupName", "UsageDate", "Currency"]
+
+    costs = parse_grouped_pages([(columns, [[4.0, APP, "RG-One", 20261003, "USD"]])])
+
+    assert list(costs.cells()) == [("2026-10-03", "rg-one", "api", 4.0)]
+
+
+def test_mixed_currencies_are_rejected():
+    with pytest.raises(ValueError, match="EUR, USD"):
+        parse_grouped_pages([
+            (COLUMNS, [[1.0, 20261001, "rg", APP, "EUR"]]),
+            (COLUMNS, [[1.0, 20261001, "rg", APP, "USD"]]),
+        ])
+
+
+def test_empty_result():
+    costs = parse_grouped_pages([(COLUMNS, [])])
+
+    assert costs.currency == "USD"
+    assert costs.dates == [] and costs.resources == []
+    assert costs.matrix.shape == (0, 0)
+
+
+def test_select_and_round_trip_through_cells():
+    costs = parse_grouped_pages([
+        (COLUMNS, [
+            [1.0, 20261001, "rg-one", APP, "EUR"],
+            [2.0, 20261002, "rg-two", DB, "EUR"],
+            [3.0, 20261003, "rg-one", APP, "EUR"],
+        ]),
+    ])
+
+    recent = costs.select("2026-10-02", resource_group="RG-ONE")
+    assert recent.dates == ["2026-10-02", "2026-10-03"]
+    assert recent.resources == [("rg-one", "api")]
+    np.testing.assert_allclose(recent.matrix, [[0.0, 3.0]])
+
+    rebuilt = GroupedCosts.from_cells(costs.currency, costs.cells())
+    assert rebuilt.dates == costs.dates
+    assert sorted(rebuilt.cells()) == sorted(costs.cells())
@@ -0,0 +1,85 @@
+from datetime import datetime, timezone
+
+from services.kql import LOGS_TABLE, KqlQuery
+
+
+def test_time_window_is_the_first_operator():
+    query = KqlQuery(hours=6).where_equals("ContainerAppName_s", "api")
+
+    assert query.render().splitlines()[1:3] == [
+        f"{LOGS_TABLE}",
+        "| where TimeGenerated > ago(6h)",
+    ]
+    assert query.body()["timespan"] == "PT6H"
+
+
+def test_absolute_window_is_rendered_in_utc():
+    start = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    end = datetime(2026, 10, 2, tzinfo=timezone.utc)
+
+    body = KqlQuery(start=start, end=end).body()
+
+    assert "TimeGenerated >= datetime(2026-10-01T00:00:00.000000Z)" in body["query"]
+    assert "TimeGenerated < datetime(2026-10-02T00:00:00.000000Z)" in body["query"]
+    assert body["timespan"] == "2026-10-01T00:00:00+00:00/2026-10-02T00:00:00+00:00"
+
+
+def test_values_are_bound_as_let_parameters():
+    query = KqlQuery(hours=1).where_equals("ContainerAppName_s", "my-app").where_in("Level", ["info", "warn"])
+
+    assert query.render() == "\n".join([
+        'let p0 = "my-app";',
+        'let p1 = "info";',
+        'let p2 = "warn";',
+        LOGS_TABLE,
+        "| where TimeGenerated > ago(1h)",
+        "| where ContainerAppName_s =~ p0",
+        "| where Level in~ (p1, p2)",
+    ])
+
+
+def test_unsafe_values_are_base64_encoded():
+    hostile = '" | project secret //'
+
+    rendered = KqlQuery().where_equals("Log_s", hostile).render()
+
+    assert 'let p0 = base64_decode_tostring("IiB8IHByb2plY3Qgc2VjcmV0IC8v");' in rendered
+    assert hostile not in rendered
+
+
+def test_contains_is_preceded_by_has_on_interior_terms():
+    rendered = KqlQuery().where_contains("Log_s", "xx failed to connect db").render()
+
+    # "xx" and "db" may be fragments of longer terms; "to" is too short for the index.
+    assert rendered.splitlines() == [
+        'let p0 = "failed";',
+        'let p1 = "connect";',
+        'let p2 = "xx failed to connect db";',
+        LOGS_TABLE,
+        "| where Log_s has p0",
+        "| where Log_s has p1",
+        "| where Log_s contains p2",
+    ]
+
+
+def test_three_character_terms_use_the_index():
+    rendered = KqlQuery().where_contains("Log_s", "a GET b").render()
+
+    assert "| where Log_s has p0" in rendered
+    assert rendered.startswith('let p0 = "GET";')
+
+
+def test_branches_share_parameters_and_the_materialized_source():
+    query = KqlQuery(hours=2).where_equals("ContainerAppName_s", "api").materialize("logs")
+    errors = query.branch().where_equals("Level", "error").pipe("count")
+    query.pipe("summarize by Level").union(errors)
+
+    assert query.render() == "\n".join([
+        'let p0 = "api";',
+        f"let logs = materialize({LOGS_TABLE}\n| where TimeGenerated > ago(2h)\n| where ContainerAppName_s =~ p0);",
+        'let p1 = "error";',
+        "logs",
+        "| summarize by Level",
+        "| union (logs\n| where Level =~ p1\n| count)",
+    ])
+    assert errors.body()["timespan"] == "PT2H"
@@ -0,0 +1,56 @@
+from services.log_patterns import WILDCARD, LogTemplateMiner
+
+
+def test_variable_tokens_are_masked():
+    miner = LogTemplateMiner()
+
+    cluster = miner.add("request 3f2a9c1e-0b4d-4e8a-9f00-1234567890ab took 250ms from 10.0.0.12:443")
+
+    assert cluster.template == f"request {WILDCARD} took {WILDCARD} from {WILDCARD}"
+
+
+def test_similar_lines_are_generalized_into_one_template():
+    miner = LogTemplateMiner()
+
+    miner.add("user alice logged in", "2026-10-19T10:00:00Z")
+    miner.add("user bob logged in", "2026-10-19T09:00:00Z")
+    cluster = miner.add("user carol logged in", "2026-10-19T11:00:00Z")
+
+    assert len(miner.clusters) == 1
+    assert cluster.template == f"user {WILDCARD} logged in"
+    assert cluster.count == 3
+    assert cluster.first_seen == "2026-10-19T09:00:00Z"
+    assert cluster.last_seen == "2026-10-19T11:00:00Z"
+
+
+def test_dissimilar_lines_get_their_own_clusters():
+    miner = LogTemplateMiner()
+
+    miner.add("connection refused by upstream")
+    miner.add("cache warmed in background")
+    miner.add("connection refused by upstream")
+
+    assert [(c.template, c.count) for c in miner.top()] == [
+        ("connection refused by upstream", 2),
+        ("cache warmed in background", 1),
+    ]
+    assert len(miner.top(1)) == 1
+
+
+def test_lines_of_different_length_never_share_a_cluster():
+    miner = LogTemplateMiner()
+
+    miner.add("worker started")
+    miner.add("worker started again")
+
+    assert len(miner.clusters) == 2
+
+
+def test_samples_are_bounded():
+    miner = LogTemplateMiner(max_samples=2)
+
+    for i in range(5):
+        cluster = miner.add(f"job {i} done")
+
+    assert cluster.count == 5
+    assert cluster.samples == ["job 0 done", "job 1 done"]
@@ -0,0 +1,116 @@
+import importlib.util
+import os
+
+import pytest
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+VERSIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations", "versions")
+# Oldest first; each revises the one before it.
+CHAIN = ["467c696c9829", "8b1f3c2d9e47", "c4a7e91f0b23", "5e2d8a6b1c90"]
+
+
+def _revision(revision_id: str):
+    (filename,) = [f for f in os.listdir(VERSIONS_DIR) if f.startswith(revision_id) and f.endswith(".py")]
+    spec = importlib.util.spec_from_file_location(f"migration_{revision_id}", os.path.join(VERSIONS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _run(engine: sa.Engine, revision_id: str, direction: str) -> None:
+    with engine.begin() as conn:
+        with Operations.context(MigrationContext.configure(conn)):
+            getattr(_revision(revision_id), direction)()
+
+
+def _upgrade_to(engine: sa.Engine, revision_id: str) -> None:
+    for rev in CHAIN[: CHAIN.index(revision_id) + 1]:
+        _run(engine, rev, "upgrade")
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_chain_is_linear():
+    for previous, current in zip([None, *CHAIN], CHAIN):
+        assert _revision(current).down_revision == previous
+
+
+def _indexes(engine: sa.Engine, table: str) -> dict[str, tuple[list[str], bool]]:
+    return {
+        index["name"]: (index["column_names"], bool(index["unique"]))
+        for index in sa.inspect(engine).get_indexes(table)
+    }
+
+
+def _insert_environment(engine: sa.Engine, name: str, frontend: str, backend: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(sa.text(
+            "INSERT INTO environment_apps (name, resource_group, frontend_app_name, backend_app_name, is_active)"
+            " VALUES (:name, 'rg', :frontend, :backend, 1)"
+        ), {"name": name, "frontend": frontend, "backend": backend})
+
+
+def test_environment_app_indexes_upgrade_and_downgrade(engine):
+    _upgrade_to(engine, "8b1f3c2d9e47")
+    before = _indexes(engine, "environment_apps")
+    _run(engine, "c4a7e91f0b23", "upgrade")
+
+    indexes = _indexes(engine, "environment_apps")
+    assert indexes["uq_environment_apps_resource_group_apps"] == (
+        ["resource_group", "frontend_app_name", "backend_app_name"], True
+    )
+    assert "ix_environment_apps_type" in indexes and "ix_environment_apps_is_active" in indexes
+
+    _run(engine, "c4a7e91f0b23", "downgrade")
+    assert _indexes(engine, "environment_apps") == before
+
+
+def test_environment_app_indexes_refuse_duplicates(engine):
+    _upgrade_to(engine, "8b1f3c2d9e47")
+    _insert_environment(engine, "dev", "web", "api")
+    _insert_environment(engine, "dev-copy", "web", "api")
+    _insert_environment(engine, "prod", "web-prod", "api-prod")
+
+    with pytest.raises(RuntimeError) as excinfo:
+        _run(engine, "c4a7e91f0b23", "upgrade")
+
+    message = str(excinfo.value)
+    assert "name='dev'" in message and "name='dev-copy'" in message
+    assert "prod" not in message
+    # Nothing was deleted and no index was left behind.
+    with engine.connect() as conn:
+        assert conn.execute(sa.text("SELECT COUNT(*) FROM environment_apps")).scalar() == 3
+    assert "uq_environment_apps_resource_group_apps" not in _indexes(engine, "environment_apps")
+
+
+def test_status_history_tables_upgrade_and_downgrade(engine):
+    _upgrade_to(engine, "5e2d8a6b1c90")
+
+    inspector = sa.inspect(engine)
+    for table in ("status_observations", "status_rollups"):
+        assert "subscription_id" in {c["name"] for c in inspector.get_columns(table)}
+    assert _indexes(engine, "status_observations")["ix_status_observations_app_observed_at"][0] == [
+        "subscription_id", "resource_group", "app_name", "observed_at"
+    ]
+    (unique,) = inspector.get_unique_constraints("status_rollups")
+    assert unique["column_names"] == ["resolution", "subscription_id", "resource_group", "app_name", "bucket_start"]
+
+    # The same app observed under two subscriptions is two rollup rows.
+    with engine.begin() as conn:
+        for subscription_id in ("sub-a", "sub-b"):
+            conn.execute(sa.text(
+                "INSERT INTO status_rollups (resolution, subscription_id, resource_group, app_name,"
+                " bucket_start, samples, up_samples) VALUES ('1h', :sub, 'rg', 'api', '2026-10-19 00:00:00', 1, 1)"
+            ), {"sub": subscription_id})
+
+    _run(engine, "5e2d8a6b1c90", "downgrade")
+    remaining = set(sa.inspect(engine).get_table_names())
+    assert not {"status_observations", "status_rollups"} & remaining
+    assert "environment_apps" in remaining
@@ -0,0 +1,72 @@
+import asyncio
+import json
+import random
+
+from fastapi import HTTPException
+
+from core.streaming import Split, error_trailer, stream_in_order
+
+
+def _collect(chunks, load, concurrency=3, fmt="ndjson", header=""):
+    async def main():
+        return [part async for part in stream_in_order(chunks, load, concurrency, fmt, header=header)]
+
+    return asyncio.run(main())
+
+
+def test_output_keeps_chunk_order_despite_completion_order():
+    rng = random.Random(7)
+    delays = {i: rng.uniform(0, 0.02) for i in range(10)}
+
+    async def load(i):
+        await asyncio.sleep(delays[i])
+        return f"{i}\n"
+
+    assert _collect(range(10), load, header="h\n") == ["h\n", *(f"{i}\n" for i in range(10))]
+
+
+def test_at_most_concurrency_loads_in_flight():
+    running = peak = 0
+
+    async def load(i):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.005)
+        running -= 1
+        return f"{i}\n"
+
+    _collect(range(12), load, concurrency=3)
+
+    assert peak <= 3
+
+
+def test_split_chunks_are_streamed_in_place():
+    async def load(chunk):
+        if chunk == "b":
+            return Split(["b1", "b2"])
+        return f"{chunk}\n"
+
+    # Empty output is skipped rather than yielded.
+    assert _collect(["a", "b", "c"], load) == ["a\n", "b1\n", "b2\n", "c\n"]
+
+
+def test_failure_ends_the_stream_with_an_error_trailer():
+    async def load(i):
+        if i == 2:
+            raise HTTPException(status_code=502, detail="upstream down")
+        return f"{i}\n"
+
+    parts = _collect(range(5), load, concurrency=1)
+
+    assert parts[:2] == ["0\n", "1\n"]
+    assert json.loads(parts[-1]) == {"error": "502: upstream down", "complete": False}
+    assert len(parts) == 3
+
+
+def test_csv_error_trailer():
+    async def load(_):
+        raise RuntimeError("quota, exceeded")
+
+    assert _collect([1], load, fmt="csv", header="a,b\r\n") == ["a,b\r\n", '#error,"quota, exceeded"\r\n']
+    assert error_trailer("csv", "x") == "#error,x\r\n"
@@ -22,6 +22,10 @@ export const QUERY_KEYS = {
     SUBSCRIPTION_COST: (subscriptionId: string) => ['cost', 'subscription', subscriptionId] as const,
     RG_COST: (subscriptionId: string, resourceGroup: string, days: number) =>
         ['cost', 'rg', subscriptionId, resourceGroup, days] as const,
+    RG_COST_ANALYTICS: (subscriptionId: string, resourceGroup: string, days: number) =>
+        ['cost', 'rg-analytics', subscriptionId, resourceGroup, days] as const,
+    RG_METRICS: (subscriptionId: string, resourceGroup: string, hours: number) =>
+        ['metrics', 'rg', subscriptionId, resourceGroup, hours] as const,
 } as const;
 
 export const QUERY_CONFIG = {
@@ -48,4 +52,12 @@ export const QUERY_CONFIG = {
         retry: parseMs(import.meta.env.VITE_QUERY_RETRY, 2),
         refetchOnWindowFocus: false,
     },
+
+    /** Resource group metrics: the newest bucket keeps changing, so refresh every minute */
+    RG_METRICS: {
+        staleTime: 60 * 1000,
+        gcTime: parseMs(import.meta.env.VITE_QUERY_GC_TIME, 10 * 60 * 1000),
+        retry: parseMs(import.meta.env.VITE_QUERY_RETRY, 2),
+        refetchOnWindowFocus: false,
+    },
 } as const;
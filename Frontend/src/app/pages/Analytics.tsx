@@ -66,14 +66,14 @@ export function Analytics() {
   const uniqueSubscriptions = Array.from(new Set(apps.map(a => JSON.stringify({ id: a.subscriptionId, name: a.subscriptionName }))))
     .map(s => JSON.parse(s)) as { id: string; name: string }[];
 
-  // ─── RG cost query — cached per (subscriptionId, resourceGroup, days) ──────
+  // ─── RG cost analytics — rollups and forecast are computed server-side ─────
   const {
     data: costData,
     isFetching: loading,
     error: queryError,
   } = useQuery({
-    queryKey: QUERY_KEYS.RG_COST(subscriptionId ?? '', decodedRG, days),
-    queryFn: () => environmentService.fetchResourceGroupCost(subscriptionId!, decodedRG, days),
+    queryKey: QUERY_KEYS.RG_COST_ANALYTICS(subscriptionId ?? '', decodedRG, days),
+    queryFn: () => environmentService.fetchResourceGroupCostAnalytics(subscriptionId!, decodedRG, days),
     enabled: Boolean(subscriptionId && resourceGroup),
     ...QUERY_CONFIG.RG_COST,
   });
@@ -84,26 +84,41 @@ export function Analytics() {
   const chartData = (costData?.daily_costs || []).map(d => ({ name: d.date, cost: d.cost }));
   const perAppData = costData?.per_app_costs || [];
   const totalCost = costData?.total_cost || 0;
-  const avgDailyCost = chartData.length > 0 ? chartData.reduce((s, d) => s + d.cost, 0) / chartData.length : 0;
-  const projectedEOM = avgDailyCost * 30;
+  const avgDailyCost = costData?.average_daily_cost || 0;
+  const projectedEOM = costData?.forecast?.projected_total || 0;
   const costToday = chartData.length > 0 ? chartData[chartData.length - 1].cost : 0;
   const lastUpdated = costData?.last_updated ?? null;
 
-  // Weekly aggregation
-  const weeklyData = [
-    { week: 'Week 1', cost: chartData.slice(0, 7).reduce((s, d) => s + d.cost, 0) },
-    { week: 'Week 2', cost: chartData.slice(7, 14).reduce((s, d) => s + d.cost, 0) },
-    { week: 'Week 3', cost: chartData.slice(14, 21).reduce((s, d) => s + d.cost, 0) },
-    { week: 'Week 4', cost: chartData.slice(21, 28).reduce((s, d) => s + d.cost, 0) },
-  ].filter(w => w.cost > 0);
+  // Weekly aggregation (weeks start on Monday)
+  const weeklyData = (costData?.weekly || [])
+    .map(w => ({ week: `Week of ${w.start}`, cost: w.cost }))
+    .filter(w => w.cost > 0);
 
-  // Live performance (simulated — Azure Metrics API is separate integration)
-  const performanceData = Array.from({ length: 24 }).map((_, i) => ({
-    time: `${String(i).padStart(2, '0')}:00`,
-    cpu: Number((Math.random() * 1.5 + 0.2).toFixed(2)),
-    memory: Number((Math.random() * 2.0 + 0.5).toFixed(2)),
-    replicas: Math.floor(i / 6) % 2 === 0 ? 2 : 4,
-  }));
+  // Last 24h of Azure Monitor metrics, summed over the resource group's apps
+  const { data: metricsData } = useQuery({
+    queryKey: QUERY_KEYS.RG_METRICS(subscriptionId ?? '', decodedRG, 24),
+    queryFn: () => environmentService.fetchResourceGroupMetrics(subscriptionId!, decodedRG, 24),
+    enabled: Boolean(subscriptionId && resourceGroup),
+    ...QUERY_CONFIG.RG_METRICS,
+  });
+
+  const sumAt = (series: (number | null)[][], i: number): number | null => {
+    const present = series.map(s => s[i]).filter((v): v is number => v != null);
+    return present.length ? present.reduce((a, b) => a + b, 0) : null;
+  };
+  const performanceData = metricsData
+    ? Array.from({ length: metricsData.count }).map((_, i) => {
+        const memory = sumAt(metricsData.apps.map(a => a.memory_bytes), i);
+        const cpu = sumAt(metricsData.apps.map(a => a.cpu_cores), i);
+        return {
+          time: new Date(new Date(metricsData.start).getTime() + i * metricsData.interval_seconds * 1000)
+            .toLocaleTimeString('en-IN', { hour: '2-digit', minute: '2-digit', hour12: false }),
+          cpu: cpu == null ? null : Number(cpu.toFixed(3)),
+          memory: memory == null ? null : Number((memory / 1024 ** 3).toFixed(2)),
+          replicas: sumAt(metricsData.apps.map(a => a.replicas), i),
+        };
+      })
+    : [];
 
   const overviewCards = [
     {
@@ -121,7 +136,7 @@ export function Analytics() {
     {
       title: 'Projected EOM',
       value: loading ? '…' : `${currencySymbol}${projectedEOM.toLocaleString('en-IN', { maximumFractionDigits: 0 })}`,
-      sub: <span className="text-muted-foreground">Based on {days}d average</span>,
+      sub: <span className="text-muted-foreground">Month to date + 7d run rate</span>,
       icon: Target, iconColor: 'text-blue-400', iconBg: 'bg-blue-500/10',
     },
     {
@@ -418,14 +433,14 @@ export function Analytics() {
             <TabsContent value="performance" className="space-y-5">
               <Card className="bg-white/60 dark:bg-[#0f172a]/60 backdrop-blur-md border border-slate-200 dark:border-slate-800 shadow-none rounded-2xl overflow-hidden">
                 <CardHeader className="pb-2">
-                  <CardTitle className="text-base">Active Replicas Timeline (Simulated)</CardTitle>
-                  <CardDescription className="text-xs">Scaling events over the last 24 hours · Live metrics require Azure Monitor integration</CardDescription>
+                  <CardTitle className="text-base">Active Replicas Timeline</CardTitle>
+                  <CardDescription className="text-xs">Scaling events over the last 24 hours · All apps in the resource group</CardDescription>
                 </CardHeader>
                 <CardContent className="h-[250px] pt-2">
                   <ResponsiveContainer width="100%" height="100%">
                     <LineChart data={performanceData} margin={{ top: 5, right: 10, bottom: 5, left: 0 }}>
                       <CartesianGrid strokeDasharray="3 3" stroke="rgba(128,128,128,0.08)" vertical={false} />
-                      <XAxis dataKey="time" fontSize={11} tickLine={false} axisLine={false} stroke="currentColor" className="text-muted-foreground" interval={3} />
+                      <XAxis dataKey="time" fontSize={11} tickLine={false} axisLine={false} stroke="currentColor" className="text-muted-foreground" interval={11} />
                       <YAxis fontSize={11} tickLine={false} axisLine={false} stroke="currentColor" className="text-muted-foreground" width={30} />
                       <Tooltip content={<CustomTooltip />} />
                       <Legend wrapperStyle={{ fontSize: '12px', paddingTop: '8px' }} />
@@ -438,7 +453,7 @@ export function Analytics() {
               <div className="grid grid-cols-1 lg:grid-cols-2 gap-5">
                 <Card className="bg-white/60 dark:bg-[#0f172a]/60 backdrop-blur-md border border-slate-200 dark:border-slate-800 shadow-none rounded-2xl overflow-hidden">
                   <CardHeader className="pb-2">
-                    <CardTitle className="text-base">CPU Usage (Cores) — Simulated</CardTitle>
+                    <CardTitle className="text-base">CPU Usage (Cores)</CardTitle>
                   </CardHeader>
                   <CardContent className="h-[250px] pt-2">
                     <ResponsiveContainer width="100%" height="100%">
@@ -450,7 +465,7 @@ export function Analytics() {
                           </linearGradient>
                         </defs>
                         <CartesianGrid strokeDasharray="3 3" stroke="rgba(128,128,128,0.08)" vertical={false} />
-                        <XAxis dataKey="time" fontSize={11} tickLine={false} axisLine={false} stroke="currentColor" className="text-muted-foreground" interval={5} />
+                        <XAxis dataKey="time" fontSize={11} tickLine={false} axisLine={false} stroke="currentColor" className="text-muted-foreground" interval={15} />
                         <YAxis fontSize={11} tickLine={false} axisLine={false} stroke="currentColor" className="text-muted-foreground" width={40} />
                         <Tooltip content={<CustomTooltip />} />
                         <Area type="monotone" dataKey="cpu" name="CPU" stroke="#6366F1" strokeWidth={2} fill="url(#cpuGrad)" dot={false} />
@@ -461,13 +476,13 @@ export function Analytics() {
 
                 <Card className="bg-white/60 dark:bg-[#0f172a]/60 backdrop-blur-md border border-slate-200 dark:border-slate-800 shadow-none rounded-2xl overflow-hidden">
                   <CardHeader className="pb-2">
-                    <CardTitle className="text-base">Memory Usage (GiB) — Simulated</CardTitle>
+                    <CardTitle className="text-base">Memory Usage (GiB)</CardTitle>
                   </CardHeader>
                   <CardContent className="h-[250px] pt-2">
                     <ResponsiveContainer width="100%" height="100%">
                       <LineChart data={performanceData} margin={{ top: 5, right: 10, bottom: 5, left: 0 }}>
                         <CartesianGrid strokeDasharray="3 3" stroke="rgba(128,128,128,0.08)" vertical={false} />
-                        <XAxis dataKey="time" fontSize={11} tickLine={false} axisLine={false} stroke="currentColor" className="text-muted-foreground" interval={5} />
+                        <XAxis dataKey="time" fontSize={11} tickLine={false} axisLine={false} stroke="currentColor" className="text-muted-foreground" interval={15} />
                         <YAxis fontSize={11} tickLine={false} axisLine={false} stroke="currentColor" className="text-muted-foreground" width={40} />
                         <Tooltip content={<CustomTooltip />} />
                         <Legend wrapperStyle={{ fontSize: '12px', paddingTop: '8px' }} />
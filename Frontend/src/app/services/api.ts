@@ -29,6 +29,43 @@ export interface LogsResponse {
     has_more: boolean;
 }
 
+export interface CostAnalyticsResponse {
+    currency: string;
+    total_cost: number;
+    scope: string;
+    last_updated: string | null;
+    daily_costs: { date: string; cost: number }[];
+    per_app_costs: { app_name: string; cost: number }[];
+    average_daily_cost: number;
+    daily: { date: string; cost: number; rolling_average: number; change: number; anomaly: boolean }[];
+    weekly: { start: string; cost: number }[];
+    monthly: { start: string; cost: number }[];
+    per_app_share: { app_name: string; cost: number; share: number }[];
+    anomalies: { app_name: string; date: string; cost: number; change: number; score: number }[];
+    forecast: {
+        month: string;
+        actual_to_date: number;
+        daily_run_rate: number;
+        days_remaining: number;
+        projected_total: number;
+    } | null;
+}
+
+/** Columnar: value i of each series belongs to the bucket starting at start + i * interval_seconds. */
+export interface AppMetricsResponse {
+    subscription_id: string;
+    resource_group: string;
+    start: string;
+    interval_seconds: number;
+    count: number;
+    apps: {
+        app_name: string;
+        cpu_cores: (number | null)[];
+        memory_bytes: (number | null)[];
+        replicas: (number | null)[];
+    }[];
+}
+
 const API_BASE_URL = 'http://127.0.0.1:8000/api/v1';
 
 /**
@@ -131,6 +168,33 @@ export const environmentService = {
         return response.json();
     },
 
+    async fetchResourceGroupCostAnalytics(
+        subscriptionId: string,
+        resourceGroup: string,
+        days: number = 30,
+    ): Promise<CostAnalyticsResponse> {
+        const response = await fetch(
+            `${API_BASE_URL}/cost/analytics/resource-group/${subscriptionId}/${resourceGroup}?days=${days}`,
+            { headers: await authHeaders() },
+        );
+        if (!response.ok) throw new Error(`Failed to fetch RG cost analytics: ${response.statusText}`);
+        return response.json();
+    },
+
+    async fetchResourceGroupMetrics(
+        subscriptionId: string,
+        resourceGroup: string,
+        hours: number = 24,
+        points: number = 96,
+    ): Promise<AppMetricsResponse> {
+        const response = await fetch(
+            `${API_BASE_URL}/app-metrics/${subscriptionId}/${resourceGroup}?hours=${hours}&points=${points}`,
+            { headers: await authHeaders() },
+        );
+        if (!response.ok) throw new Error(`Failed to fetch RG metrics: ${response.statusText}`);
+        return response.json();
+    },
+
     async fetchAppLogs(
         subscriptionId: string,
         resourceGroup: string,